@@ -0,0 +1,25 @@
+"""Add application version_id
+
+Revision ID: 3c9d52a7e1f4
+Revises: b41f9c2e8d17
+Create Date: 2026-10-19 11:12:40.771902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d52a7e1f4'
+down_revision = 'b41f9c2e8d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('applications', sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('applications') as batch_op:
+        batch_op.drop_column('version_id')
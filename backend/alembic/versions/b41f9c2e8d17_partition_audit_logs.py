@@ -0,0 +1,117 @@
+"""Partition audit logs by month
+
+Revision ID: b41f9c2e8d17
+Revises: 7a3ec7efdcbb
+Create Date: 2026-10-19 10:05:12.418230
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41f9c2e8d17'
+down_revision = '7a3ec7efdcbb'
+branch_labels = None
+depends_on = None
+
+
+def _month_starts(bind):
+    # Every month that already has audit rows, plus the current and next month
+    now = datetime.now(timezone.utc)
+    months = {(now.year, now.month), (now.year + now.month // 12, now.month % 12 + 1)}
+    rows = bind.execute(sa.text(
+        "SELECT DISTINCT date_trunc('month', created_at) FROM audit_logs_legacy WHERE created_at IS NOT NULL"
+    ))
+    for (start,) in rows:
+        months.add((start.year, start.month))
+    return sorted(months)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        # SQLite rotates audit_logs_YYYY_MM tables at runtime; only index the base table
+        op.create_index('ix_audit_logs_entity_created', 'audit_logs', ['entity_type', 'entity_id', 'created_at'], unique=False)
+        op.create_index('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'], unique=False)
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+    op.execute("ALTER INDEX ix_audit_logs_id RENAME TO ix_audit_logs_legacy_id")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq RENAME TO audit_logs_legacy_id_seq")
+
+    # The partition key must be part of the primary key
+    op.execute("CREATE SEQUENCE audit_logs_id_seq")
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR NOT NULL,
+            entity_type VARCHAR,
+            entity_id INTEGER,
+            old_value JSON,
+            new_value JSON,
+            ip_address VARCHAR,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.create_index('ix_audit_logs_id', 'audit_logs', ['id'], unique=False)
+    op.create_index('ix_audit_logs_entity_created', 'audit_logs', ['entity_type', 'entity_id', 'created_at'], unique=False)
+    op.create_index('ix_audit_logs_user_created', 'audit_logs', ['user_id', 'created_at'], unique=False)
+
+    for year, month in _month_starts(bind):
+        next_year, next_month = year + month // 12, month % 12 + 1
+        op.execute(
+            f"CREATE TABLE audit_logs_{year:04d}_{month:02d} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{year:04d}-{month:02d}-01T00:00:00+00:00') "
+            f"TO ('{next_year:04d}-{next_month:02d}-01T00:00:00+00:00')"
+        )
+
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, created_at)
+        SELECT id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, COALESCE(created_at, now())
+        FROM audit_logs_legacy
+    """)
+    op.execute("SELECT setval('audit_logs_id_seq', COALESCE((SELECT MAX(id) FROM audit_logs), 0) + 1, false)")
+    op.execute("DROP TABLE audit_logs_legacy")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name != "postgresql":
+        op.drop_index('ix_audit_logs_user_created', table_name='audit_logs')
+        op.drop_index('ix_audit_logs_entity_created', table_name='audit_logs')
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("ALTER INDEX ix_audit_logs_id RENAME TO ix_audit_logs_partitioned_id")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq RENAME TO audit_logs_partitioned_id_seq")
+    op.create_table('audit_logs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('action', sa.String(), nullable=False),
+    sa.Column('entity_type', sa.String(), nullable=True),
+    sa.Column('entity_id', sa.Integer(), nullable=True),
+    sa.Column('old_value', sa.JSON(), nullable=True),
+    sa.Column('new_value', sa.JSON(), nullable=True),
+    sa.Column('ip_address', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audit_logs_id'), 'audit_logs', ['id'], unique=False)
+    op.execute("""
+        INSERT INTO audit_logs (id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, created_at)
+        SELECT id, user_id, action, entity_type, entity_id, old_value, new_value, ip_address, created_at
+        FROM audit_logs_partitioned
+    """)
+    op.execute("SELECT setval('audit_logs_id_seq', COALESCE((SELECT MAX(id) FROM audit_logs), 0) + 1, false)")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
@@ -1,31 +1,68 @@
-from typing import Generator, AsyncGenerator
-from fastapi import Depends, HTTPException, status
+from typing import Generator, AsyncGenerator, Optional
+from fastapi import Depends, Header, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.security import DASHBOARD_STREAM_SCOPE
+from app.core.request_timing import timed
+from app.core.rate_limit import Overloaded, RateLimitExceeded, retry_after_header, scoring_admission
 from app.models import User
 from app.schemas import TokenPayload
+from app.database import session as db_session
 from app.database.session import AsyncSessionLocal
+from app.services.scoring_queue import QUEUE_DEPTH
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token"
 )
+optional_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login/access-token", auto_error=False
+)
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
 
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints: the replica when configured and within
+    the lag tolerance, otherwise the primary.
+    """
+    health = db_session.replica_health
+    if health is not None and await health.is_available():
+        db_session.READ_SESSIONS.inc(target="replica")
+        async with db_session.AsyncReadSessionLocal() as session:
+            try:
+                yield session
+            except DBAPIError as e:
+                if e.connection_invalidated:
+                    health.mark_unavailable()
+                raise
+        return
+
+    db_session.READ_SESSIONS.inc(target="primary")
+    async with AsyncSessionLocal() as session:
+        yield session
+
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(reusable_oauth2)
 ) -> User:
+    return await _user_from_token(db, token)
+
+async def _user_from_token(db: AsyncSession, token: str, scope: Optional[str] = None) -> User:
+    """User for ``token``, which must carry exactly ``scope`` (None for a regular bearer token)."""
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        with timed("jwt"):
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        if token_data.scope != scope:
+            raise JWTError("Token scope not accepted here")
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -33,8 +70,9 @@ async def get_current_user(
         )
     
     # Async query
-    result = await db.execute(select(User).where(User.id == int(token_data.sub)))
-    user = result.scalars().first()
+    with timed("user_lookup"):
+        result = await db.execute(select(User).where(User.id == int(token_data.sub)))
+        user = result.scalars().first()
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -47,6 +85,29 @@ async def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
+async def get_stream_user(
+    token: Optional[str] = Depends(optional_oauth2),
+    ticket: Optional[str] = Query(None),
+) -> User:
+    """
+    Authenticate a long-lived stream. EventSource cannot send headers, so it
+    passes a stream ticket as ``?ticket=`` instead: a token scoped to the
+    stream that expires within a minute, so the URL is safe to end up in
+    access logs. Regular bearer tokens are only accepted in the header. Uses
+    its own short session so the stream doesn't hold a pooled connection
+    while it is open.
+    """
+    if not token and not ticket:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    async with AsyncSessionLocal() as db:
+        if token:
+            user = await _user_from_token(db, token)
+        else:
+            user = await _user_from_token(db, ticket, scope=DASHBOARD_STREAM_SCOPE)
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return user
+
 async def get_current_active_superuser(
     current_user: User = Depends(get_current_active_user),
 ) -> User:
@@ -55,3 +116,42 @@ async def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+) -> Optional[str]:
+    if not settings.IDEMPOTENCY_ENABLED or idempotency_key is None:
+        return None
+    idempotency_key = idempotency_key.strip()
+    if not idempotency_key or len(idempotency_key) > settings.IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Idempotency-Key must be 1-{settings.IDEMPOTENCY_KEY_MAX_LENGTH} characters",
+        )
+    return idempotency_key
+
+async def admit_scoring(
+    current_user: User = Depends(get_current_active_user),
+) -> AsyncGenerator[User, None]:
+    """
+    Admission control for synchronous scoring: shed load when the scoring
+    backlog is too deep (503), then apply the user's rate limit (429).
+    """
+    try:
+        with timed("admission"):
+            scoring_admission.check_load(QUEUE_DEPTH.value())
+            await scoring_admission.check_rate(current_user, "scoring")
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scoring is temporarily overloaded, please retry later",
+            headers=retry_after_header(e.retry_after),
+        )
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded",
+            headers=retry_after_header(e.retry_after),
+        )
+    with scoring_admission.track():
+        yield current_user
@@ -1,18 +1,24 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import dependencies
 from app.models.user import User
+from app.core.config import settings
+from app.schemas.audit_log import AuditLog as AuditLogSchema
 from app.schemas.user import User as UserSchema
+from app.services.audit_service import audit_buffer
+from app.services.audit_storage import audit_store, audit_retention_job
 
 router = APIRouter()
 
 @router.get("/users", response_model=List[UserSchema])
 async def read_users(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(dependencies.get_db),
+    db: AsyncSession = Depends(dependencies.get_read_db),
     current_user: User = Depends(dependencies.get_current_active_superuser),
 ) -> Any:
     """
@@ -20,4 +26,40 @@ async def read_users(
     """
     result = await db.execute(select(User).offset(skip).limit(limit))
     users = result.scalars().all()
+    audit_buffer.record(
+        "ADMIN_LIST_USERS", "User",
+        user_id=current_user.id,
+        new_value={"skip": skip, "limit": limit, "returned": len(users)},
+        ip_address=request.client.host if request.client else None,
+    )
     return users
+
+@router.get("/audit/{entity_type}/{entity_id}", response_model=List[AuditLogSchema])
+async def read_entity_history(
+    entity_type: str,
+    entity_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(100, le=1000),
+    db: AsyncSession = Depends(dependencies.get_read_db),
+    current_user: User = Depends(dependencies.get_current_active_superuser),
+) -> Any:
+    """
+    Audit history of one entity, newest first (Admin only).
+    Only the monthly partitions overlapping [since, until) are read.
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=settings.AUDIT_HISTORY_DEFAULT_DAYS)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="'since' must be before 'until'")
+    return await audit_store.entity_history(db, entity_type, entity_id, since, until, limit=limit)
+
+@router.post("/audit/retention")
+async def run_audit_retention(
+    current_user: User = Depends(dependencies.get_current_active_superuser),
+) -> Any:
+    """
+    Apply audit retention now instead of waiting for the background job (Admin only).
+    """
+    dropped = await audit_retention_job.run_once()
+    return {"dropped_partitions": dropped, "retention_months": settings.AUDIT_RETENTION_MONTHS}
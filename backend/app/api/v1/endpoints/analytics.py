@@ -1,15 +1,64 @@
+from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import dependencies
+from app.core import security
+from app.core.config import settings
+from app.core.http_cache import conditional_response
 from app.services import analytics_service
+from app.services.dashboard_stream import dashboard_broadcaster
+from app.services.event_bus import DASHBOARD_UPDATED, event_bus
 from app.models.user import User
+from app.schemas.token import StreamTicket
 
 router = APIRouter()
 
 @router.get("/dashboard")
 async def read_dashboard_stats(
-    db: AsyncSession = Depends(dependencies.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(dependencies.get_read_db),
     current_user: User = Depends(dependencies.get_current_active_user),
 ) -> Any:
+    if settings.HTTP_ETAGS_ENABLED:
+        version = await analytics_service.get_dashboard_version(db)
+        not_modified, headers = conditional_response(request, "analytics.dashboard", *version)
+        if not_modified:
+            return not_modified
+        response.headers.update(headers)
     return await analytics_service.get_dashboard_stats(db)
+
+
+@router.post("/dashboard/stream-ticket", response_model=StreamTicket)
+async def create_dashboard_stream_ticket(
+    current_user: User = Depends(dependencies.get_current_active_user),
+) -> Any:
+    """
+    Short-lived ticket for opening ``/dashboard/stream?ticket=``. It is only
+    valid for the stream, never as a bearer token.
+    """
+    lifetime = settings.DASHBOARD_STREAM_TICKET_SECONDS
+    ticket = security.create_access_token(
+        current_user.id, expires_delta=timedelta(seconds=lifetime), scope=security.DASHBOARD_STREAM_SCOPE
+    )
+    return {"ticket": ticket, "expires_in": lifetime}
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard_stats(
+    request: Request,
+    current_user: User = Depends(dependencies.get_stream_user),
+) -> Any:
+    """
+    Server-Sent Events: a ``snapshot`` of the dashboard stats, then ``delta``
+    events with only the fields that changed. Authenticated with the bearer
+    header or a ``?ticket=`` from ``/dashboard/stream-ticket``.
+    """
+    subscription = event_bus.subscribe(DASHBOARD_UPDATED, max_queue=settings.DASHBOARD_STREAM_QUEUE_SIZE)
+    return StreamingResponse(
+        dashboard_broadcaster.stream(subscription, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
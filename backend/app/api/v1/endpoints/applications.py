@@ -1,23 +1,51 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api import dependencies
-from app.schemas.application import Application, ApplicationCreate, ApplicationUpdate
-from app.services import application_service
+from app.core.config import settings
+from app.core.http_cache import conditional_response
+from app.core.responses import FastJSONResponse, dump_rows
+from app.schemas.application import (
+    Application, ApplicationBulkDecision, ApplicationBulkDecisionResult, ApplicationCreate,
+)
+from app.schemas.scoring_job import ScoringJobStatus
+from app.services import application_service, scoring_queue
+from app.services.idempotency import IdempotencyKeyReused, idempotency_store, request_fingerprint, to_response
 from app.models.user import User
 
 router = APIRouter()
 
+APPLICATION_LIST = TypeAdapter(List[Application])
+
 @router.get("/", response_model=List[Application])
 async def read_applications(
-    db: AsyncSession = Depends(dependencies.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(dependencies.get_read_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(dependencies.get_current_active_user),
 ) -> Any:
-    if current_user.is_superuser:
-        return await application_service.get_applications(db, skip=skip, limit=limit)
-    return await application_service.get_applications(db, skip=skip, limit=limit, user_id=current_user.id)
+    user_id = None if current_user.is_superuser else current_user.id
+    headers = {}
+    if settings.HTTP_ETAGS_ENABLED:
+        # Cheap aggregate first; an unchanged page is answered without loading rows
+        count, id_sum, version_sum, last_modified = await application_service.get_applications_fingerprint(
+            db, skip=skip, limit=limit, user_id=user_id
+        )
+        not_modified, headers = conditional_response(
+            request, "applications.list", user_id, skip, limit, count, id_sum, version_sum,
+            last_modified=last_modified,
+        )
+        if not_modified:
+            return not_modified
+
+    applications = await application_service.get_applications(db, skip=skip, limit=limit, user_id=user_id)
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse(dump_rows(APPLICATION_LIST, applications), headers=headers)
+    response.headers.update(headers)
+    return applications
 
 @router.post("/", response_model=Application)
 async def create_application(
@@ -25,13 +53,42 @@ async def create_application(
     db: AsyncSession = Depends(dependencies.get_db),
     application_in: ApplicationCreate,
     current_user: User = Depends(dependencies.get_current_active_user),
+    idempotency_key: Optional[str] = Depends(dependencies.get_idempotency_key),
 ) -> Any:
-    return await application_service.create_application(db, application_in, user_id=current_user.id)
+    if idempotency_key is None:
+        return await application_service.create_application(db, application_in, user_id=current_user.id)
+
+    async def create():
+        application = await application_service.create_application(db, application_in, user_id=current_user.id)
+        return 200, Application.model_validate(application).model_dump_json().encode()
+
+    try:
+        stored, replayed = await idempotency_store.execute(
+            current_user.id, "POST /applications", idempotency_key, request_fingerprint(application_in), create
+        )
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+    return to_response(stored, replayed)
+
+@router.post("/decisions", response_model=ApplicationBulkDecisionResult)
+async def decide_applications(
+    *,
+    db: AsyncSession = Depends(dependencies.get_db),
+    decision_in: ApplicationBulkDecision,
+    current_user: User = Depends(dependencies.get_current_active_superuser),
+) -> Any:
+    """
+    Approve or reject many pending applications at once, with a per-id outcome.
+    Underwriters (superusers) only; applicants cannot decide applications.
+    """
+    return await application_service.apply_bulk_decision(db, decision_in, actor_id=current_user.id)
 
 @router.get("/{id}", response_model=Application)
 async def read_application(
     *,
-    db: AsyncSession = Depends(dependencies.get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(dependencies.get_read_db),
     id: int,
     current_user: User = Depends(dependencies.get_current_active_user),
 ) -> Any:
@@ -40,4 +97,31 @@ async def read_application(
         raise HTTPException(status_code=404, detail="Application not found")
     if not current_user.is_superuser and application.user_id != current_user.id:
         raise HTTPException(status_code=400, detail="Not enough permissions")
+    not_modified, headers = conditional_response(
+        request, "applications.read", application.id, application.version_id,
+        last_modified=application.updated_at or application.created_at,
+    )
+    if not_modified:
+        return not_modified
+    response.headers.update(headers)
     return application
+
+@router.get("/{id}/scoring", response_model=ScoringJobStatus)
+async def read_scoring_status(
+    *,
+    db: AsyncSession = Depends(dependencies.get_db),
+    id: int,
+    current_user: User = Depends(dependencies.get_current_active_user),
+) -> Any:
+    """
+    Status of the latest scoring job for an application.
+    """
+    application = await application_service.get_application(db, id)
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if not current_user.is_superuser and application.user_id != current_user.id:
+        raise HTTPException(status_code=400, detail="Not enough permissions")
+    job = await scoring_queue.get_latest_job(db, id)
+    if not job:
+        raise HTTPException(status_code=404, detail="No scoring job for this application")
+    return ScoringJobStatus.model_validate(job).model_copy(update={"credit_score": application.credit_score})
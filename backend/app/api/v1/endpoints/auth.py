@@ -1,6 +1,6 @@
 from datetime import timedelta
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,16 +9,18 @@ from app.core import security
 from app.core.config import settings
 from app.services import auth_service
 from app.schemas.token import Token
-from app.schemas.user import User, UserCreate
+from app.schemas.user import User, UserCreate, UserLogin
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     user_in: UserLogin,
     db: AsyncSession = Depends(dependencies.get_db),
 ) -> Any:
-    user = await auth_service.authenticate_user(db, user_in)
+    client_ip = request.client.host if request.client else None
+    user = await auth_service.authenticate_user(db, user_in, ip_address=client_ip)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,17 +1,37 @@
-from typing import Any
-from fastapi import APIRouter, Depends
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic_core import to_json
 from app.api import dependencies
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
 from app.models.user import User
 from app.schemas.application import ApplicationCreate
 from app.services import credit_scoring_service
+from app.services.idempotency import IdempotencyKeyReused, idempotency_store, request_fingerprint, to_response
 
 router = APIRouter()
 
 @router.post("/calculate")
 async def calculate_score(
     application_data: ApplicationCreate,
-    current_user: User = Depends(dependencies.get_current_active_user),
+    current_user: User = Depends(dependencies.admit_scoring),
+    idempotency_key: Optional[str] = Depends(dependencies.get_idempotency_key),
 ) -> Any:
-    # Logic is CPU bound, keep it simple for now or await if it was async
-    score = credit_scoring_service.calculate_credit_score(application_data)
+    if idempotency_key is not None:
+        async def calculate():
+            score = await credit_scoring_service.calculate_credit_score(application_data)
+            return 200, to_json({"score": score})
+
+        try:
+            stored, replayed = await idempotency_store.execute(
+                current_user.id, "POST /scoring/calculate", idempotency_key,
+                request_fingerprint(application_data), calculate,
+            )
+        except IdempotencyKeyReused:
+            raise HTTPException(status_code=422, detail="Idempotency-Key was already used with a different request")
+        return to_response(stored, replayed)
+
+    score = await credit_scoring_service.calculate_credit_score(application_data)
+    if settings.FAST_JSON_RESPONSES:
+        return FastJSONResponse({"score": score})
     return {"score": score}
@@ -0,0 +1,135 @@
+"""
+Latency-aware circuit breaker.
+
+Calls are recorded in a sliding time window. The breaker opens when, over at
+least ``min_calls`` calls, the share of failures (errors and deadline
+overruns) or of slow calls reaches its threshold. While open, callers are
+told to use their fallback. After ``open_seconds`` the breaker goes
+half-open and lets ``half_open_probes`` calls through; if they all succeed
+it closes, any failure reopens it.
+"""
+import enum
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+from app.core.metrics import registry
+
+BREAKER_STATE = registry.gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 open, 2 half-open)",
+    ["breaker"],
+)
+BREAKER_TRANSITIONS = registry.counter(
+    "circuit_breaker_transitions_total",
+    "Circuit breaker state changes",
+    ["breaker", "state"],
+)
+BREAKER_CALLS = registry.counter(
+    "circuit_breaker_calls_total",
+    "Calls seen by a circuit breaker, by outcome",
+    ["breaker", "outcome"],
+)
+
+
+class BreakerState(str, enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+_STATE_VALUES = {BreakerState.CLOSED: 0, BreakerState.OPEN: 1, BreakerState.HALF_OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float,
+        slow_call_seconds: float,
+        slow_call_rate: float,
+        window_seconds: float,
+        min_calls: int,
+        open_seconds: float,
+        half_open_probes: int,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        # (timestamp, failed, slow)
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        BREAKER_STATE.set(0, breaker=name)
+
+    @property
+    def state(self) -> BreakerState:
+        if self._state is BreakerState.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(BreakerState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: BreakerState) -> None:
+        self._state = state
+        if state is BreakerState.OPEN:
+            self._opened_at = time.monotonic()
+        if state is not BreakerState.CLOSED:
+            self._probes_started = self._probes_succeeded = 0
+        else:
+            self._calls.clear()
+        BREAKER_STATE.set(_STATE_VALUES[state], breaker=self.name)
+        BREAKER_TRANSITIONS.inc(breaker=self.name, state=state.value)
+
+    def allow(self) -> bool:
+        """Whether the protected call may run; otherwise use the fallback."""
+        state = self.state
+        if state is BreakerState.CLOSED:
+            return True
+        if state is BreakerState.HALF_OPEN and self._probes_started < self.half_open_probes:
+            self._probes_started += 1
+            return True
+        BREAKER_CALLS.inc(breaker=self.name, outcome="rejected")
+        return False
+
+    def record_success(self, duration: float) -> None:
+        slow = duration >= self.slow_call_seconds
+        BREAKER_CALLS.inc(breaker=self.name, outcome="slow" if slow else "success")
+        if self._state is BreakerState.HALF_OPEN:
+            if slow:
+                self._transition(BreakerState.OPEN)
+                return
+            self._probes_succeeded += 1
+            if self._probes_succeeded >= self.half_open_probes:
+                self._transition(BreakerState.CLOSED)
+            return
+        self._record(failed=False, slow=slow)
+
+    def record_failure(self, timeout: bool = False) -> None:
+        BREAKER_CALLS.inc(breaker=self.name, outcome="timeout" if timeout else "failure")
+        if self._state is BreakerState.HALF_OPEN:
+            self._transition(BreakerState.OPEN)
+            return
+        self._record(failed=True, slow=timeout)
+
+    def _record(self, failed: bool, slow: bool) -> None:
+        if self._state is not BreakerState.CLOSED:
+            return
+        now = time.monotonic()
+        self._calls.append((now, failed, slow))
+        horizon = now - self.window_seconds
+        while self._calls and self._calls[0][0] < horizon:
+            self._calls.popleft()
+
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+        failures = sum(1 for _, f, _ in self._calls if f)
+        slow_calls = sum(1 for _, _, s in self._calls if s)
+        if failures / total >= self.failure_rate or slow_calls / total >= self.slow_call_rate:
+            self._transition(BreakerState.OPEN)
@@ -1,4 +1,4 @@
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +10,59 @@ class Settings(BaseSettings):
     ENVIRONMENT: str = "development"
     DEBUG: bool = True
     
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False  # one JSON object per line
+    LOG_FILE: str = "logs/app.log"  # empty disables the file sink
+    LOG_ENQUEUE: bool = True  # format and write on a background thread
+    LOG_HOT_PATH_PER_SECOND: int = 5  # per call site; 0 disables the limit
+    LOG_HOT_PATH_SAMPLE_RATE: float = 1.0
+    SERVER_TIMING_ENABLED: bool = True  # Server-Timing header and per-request query stats
+    SLOW_REQUEST_MS: int = 1000  # 0 disables the slow request log
+    SLOW_REQUEST_MAX_STATEMENTS: int = 50  # SQL statements kept per request for that log
+
+    # Serialize list/scoring responses with pydantic-core instead of the stdlib encoder
+    FAST_JSON_RESPONSES: bool = False
+
+    # Conditional GET and compression
+    HTTP_ETAGS_ENABLED: bool = True
+    GZIP_ENABLED: bool = True
+    GZIP_MINIMUM_SIZE: int = 1024  # bytes; smaller bodies are sent uncompressed
+    GZIP_COMPRESS_LEVEL: int = 5
+
+    # Idempotency-Key support for POST /applications and /scoring/calculate
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_CACHE_SIZE: int = 10000
+    IDEMPOTENCY_DB_ENABLED: bool = False  # persist keys so they survive restarts and span processes
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
+
+    # Admission control for /scoring/calculate
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_PER_MINUTE: Dict[str, int] = {"user": 60, "superuser": 600}  # per role
+    RATE_LIMIT_BURST: Dict[str, int] = {"user": 10, "superuser": 100}
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" or "redis" (shared between processes)
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    SCORING_SHED_QUEUE_DEPTH: int = 1000  # 0 disables; queued scoring jobs before shedding
+    SCORING_MAX_INFLIGHT: int = 32  # 0 disables; concurrent synchronous scoring requests
+    SCORING_SHED_RETRY_AFTER_SECONDS: int = 5
+
+    # Inference deadline and circuit breaker for /scoring/calculate
+    SCORING_DEADLINE_MS: int = 250
+    SCORING_BREAKER_FAILURE_RATE: float = 0.5  # errors + timeouts share that opens the breaker
+    SCORING_BREAKER_SLOW_CALL_MS: int = 150
+    SCORING_BREAKER_SLOW_CALL_RATE: float = 0.5
+    SCORING_BREAKER_WINDOW_SECONDS: int = 30
+    SCORING_BREAKER_MIN_CALLS: int = 20
+    SCORING_BREAKER_OPEN_SECONDS: int = 15
+    SCORING_BREAKER_HALF_OPEN_PROBES: int = 3
+
+    # Live dashboard (SSE)
+    DASHBOARD_STREAM_MAX_PUSHES_PER_SECOND: float = 1.0  # updates are coalesced to this rate
+    DASHBOARD_STREAM_HEARTBEAT_SECONDS: int = 15
+    DASHBOARD_STREAM_QUEUE_SIZE: int = 16  # per stream; a stream that falls behind gets a fresh snapshot
+    DASHBOARD_STREAM_TICKET_SECONDS: int = 60  # lifetime of the ?ticket= used to open a stream
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -25,6 +78,33 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///./credit_scoring.db"
 
+    # Connection pool / PostgreSQL (asyncpg) profile
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds, -1 disables
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 500  # asyncpg prepared statements per connection, 0 disables
+    DB_STATEMENT_TIMEOUT_MS: int = 30000  # 0 disables
+    DB_APPLICATION_NAME: str = "credit-scoring-api"
+
+    # Optional read replica for read-only endpoints (falls back to the primary)
+    READ_DATABASE_URL: Optional[str] = None
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    READ_REPLICA_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Audit logging (buffered in memory, flushed in batches)
+    AUDIT_ENABLED: bool = True
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_MAX_BUFFER: int = 10000
+    AUDIT_FLUSH_ON_SHUTDOWN: bool = True
+    # Audit storage is partitioned by calendar month
+    AUDIT_RETENTION_MONTHS: int = 24
+    AUDIT_ARCHIVE_DIR: Optional[str] = None  # archive partitions here before dropping them
+    AUDIT_RETENTION_INTERVAL_SECONDS: float = 86400.0
+    AUDIT_HISTORY_DEFAULT_DAYS: int = 90
+
     # JWT
     SECRET_KEY: str = "dev_secret"
     ALGORITHM: str = "HS256"
@@ -33,6 +113,16 @@ class Settings(BaseSettings):
     # ML Model
     MODEL_PATH: Optional[str] = "../ml-pipeline/models/saved_models"
 
+    # Asynchronous scoring queue (jobs are enqueued when an application is created)
+    SCORING_QUEUE_ENABLED: bool = True
+    SCORING_WORKERS: int = 2
+    SCORING_BATCH_SIZE: int = 32
+    SCORING_POLL_INTERVAL_SECONDS: float = 1.0
+    SCORING_MAX_ATTEMPTS: int = 5
+    SCORING_RETRY_BASE_SECONDS: float = 2.0
+    SCORING_RETRY_MAX_SECONDS: float = 300.0
+    SCORING_LOCK_TIMEOUT_SECONDS: float = 300.0  # running jobs older than this are reclaimed
+
     model_config = SettingsConfigDict(
         case_sensitive=True,
         env_file=".env",
@@ -0,0 +1,100 @@
+"""
+Conditional GET support.
+
+Read endpoints derive a weak ETag from row versions (``version_id`` is bumped
+by every write) or from a cheap aggregate fingerprint, and compare it with the
+request's ``If-None-Match``/``If-Modified-Since`` before loading or serializing
+the full payload. A match short-circuits to an empty 304.
+"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+NOT_MODIFIED = registry.counter(
+    "http_not_modified_total",
+    "Conditional GETs answered with 304 Not Modified",
+    ["endpoint"],
+)
+
+# Clients may cache but must revalidate; responses are per-user
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag over the given version parts."""
+    digest = hashlib.blake2b("|".join(str(p) for p in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = _strip_weak(etag)
+    return any(_strip_weak(candidate) == wanted for candidate in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: Optional[str], last_modified: Optional[datetime]) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have second precision
+    return last_modified.replace(microsecond=0) <= since
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def conditional_response(
+    request: Request,
+    endpoint: str,
+    *parts: Any,
+    last_modified: Optional[datetime] = None,
+) -> Tuple[Optional[Response], Dict[str, str]]:
+    """
+    Validate the request against the ETag built from ``parts``.
+
+    Returns ``(response, headers)``: ``response`` is a ready 304 when the
+    client's copy is still current, otherwise ``None`` and the caller attaches
+    ``headers`` (ETag, Cache-Control, Last-Modified) to the full response.
+    If-None-Match takes precedence over If-Modified-Since when both are sent.
+    """
+    if not settings.HTTP_ETAGS_ENABLED:
+        return None, {}
+    headers = cache_headers(make_etag(endpoint, *parts), last_modified)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, headers["ETag"])
+    else:
+        fresh = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+    if fresh:
+        NOT_MODIFIED.inc(endpoint=endpoint)
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
@@ -1,19 +1,107 @@
+"""
+Logging setup.
+
+Sinks are enqueued (``LOG_ENQUEUE``): callers only put the record on a queue
+and a background thread does the formatting and file I/O, so logging never
+blocks the event loop. ``LOG_JSON`` switches to one JSON object per line.
+
+Use loguru's own argument formatting (``logger.info("x {}", value)``) rather
+than f-strings: arguments are only formatted when the level is enabled, and
+``logger.opt(lazy=True)`` defers expensive values entirely. For lines on the
+request hot path use ``hot_log``, which rate limits each call site.
+"""
+import random
 import sys
+import threading
+import time
+from typing import Any, Dict, Tuple
+
 from loguru import logger
 from app.core.config import settings
 
+CONSOLE_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+)
+
 def setup_logging():
     logger.remove()
-    logger.add(
-        sys.stderr,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO",
-    )
-    logger.add(
-        "logs/app.log",
-        rotation="500 MB",
-        retention="10 days",
-        level="INFO"
-    )
-
-setup_logging()
+    if settings.LOG_JSON:
+        logger.add(sys.stderr, serialize=True, level=settings.LOG_LEVEL, enqueue=settings.LOG_ENQUEUE)
+    else:
+        logger.add(sys.stderr, format=CONSOLE_FORMAT, level=settings.LOG_LEVEL, enqueue=settings.LOG_ENQUEUE)
+    if settings.LOG_FILE:
+        logger.add(
+            settings.LOG_FILE,
+            rotation="500 MB",
+            retention="10 days",
+            level=settings.LOG_LEVEL,
+            serialize=settings.LOG_JSON,
+            enqueue=settings.LOG_ENQUEUE,
+        )
+
+
+class HotPathLogger:
+    """
+    Per-call-site sampling and rate limiting for high-volume log lines.
+
+    Calls below every sink's level return before any call-site bookkeeping.
+    Each call site (file and line) logs at most ``per_second`` lines per
+    second, after keeping a ``sample_rate`` fraction of calls. The number of
+    lines dropped since the last one is attached as ``extra["suppressed"]``.
+    """
+
+    def __init__(self, per_second: int = settings.LOG_HOT_PATH_PER_SECOND, sample_rate: float = settings.LOG_HOT_PATH_SAMPLE_RATE):
+        self.per_second = per_second
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        # call site -> [window start, lines in window, suppressed since last line]
+        self._sites: Dict[Tuple[str, int], list] = {}
+        # level name -> severity number, looked up once per level
+        self._levels: Dict[str, int] = {}
+
+    def _enabled(self, level: str) -> bool:
+        no = self._levels.get(level)
+        if no is None:
+            no = self._levels[level] = logger.level(level).no
+        # loguru keeps the lowest level of any sink here; it has no public accessor
+        return no >= logger._core.min_level
+
+    def _allow(self, site: Tuple[str, int]) -> Tuple[bool, int]:
+        with self._lock:
+            state = self._sites.setdefault(site, [0.0, 0, 0])
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                state[2] += 1
+                return False, 0
+            if self.per_second > 0:
+                now = time.monotonic()
+                if now - state[0] >= 1.0:
+                    state[0], state[1] = now, 0
+                if state[1] >= self.per_second:
+                    state[2] += 1
+                    return False, 0
+                state[1] += 1
+            suppressed, state[2] = state[2], 0
+            return True, suppressed
+
+    def log(self, level: str, message: str, *args: Any, **kwargs: Any) -> None:
+        if not self._enabled(level):
+            return
+        frame = sys._getframe(2)
+        allowed, suppressed = self._allow((frame.f_code.co_filename, frame.f_lineno))
+        if not allowed:
+            return
+        target = logger.bind(suppressed=suppressed) if suppressed else logger
+        target.opt(depth=2).log(level, message, *args, **kwargs)
+
+    def debug(self, message: str, *args: Any, **kwargs: Any) -> None:
+        self.log("DEBUG", message, *args, **kwargs)
+
+    def info(self, message: str, *args: Any, **kwargs: Any) -> None:
+        self.log("INFO", message, *args, **kwargs)
+
+    def warning(self, message: str, *args: Any, **kwargs: Any) -> None:
+        self.log("WARNING", message, *args, **kwargs)
+
+
+hot_log = HotPathLogger()
@@ -0,0 +1,165 @@
+"""
+Admission control for expensive endpoints.
+
+* Per-user token buckets, with a quota per role (``RATE_LIMIT_PER_MINUTE`` and
+  ``RATE_LIMIT_BURST``). Buckets live in process memory by default; set
+  ``RATE_LIMIT_BACKEND=redis`` to share them between API processes.
+* Load shedding: when the scoring backlog (queued jobs plus requests
+  currently running inference) is past its threshold, new work is refused
+  immediately instead of queueing behind it.
+
+Rejections carry ``Retry-After`` so well-behaved clients back off.
+"""
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+RATE_LIMITED = registry.counter("rate_limit_rejections_total", "Requests rejected by the per-user rate limit", ["role"])
+LOAD_SHED = registry.counter("load_shed_total", "Requests rejected because the scoring backlog was too deep", ["reason"])
+SCORING_INFLIGHT = registry.gauge("scoring_inflight_requests", "Synchronous scoring requests currently running")
+
+
+def role_for(user) -> str:
+    return "superuser" if user.is_superuser else "user"
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+
+
+class Overloaded(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(f"Scoring is overloaded ({reason})")
+
+
+def retry_after_header(seconds: float) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class InMemoryRateLimitBackend:
+    """Token buckets in a bounded LRU; idle buckets are the first evicted."""
+
+    def __init__(self, max_buckets: int = 100_000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        """Take ``cost`` tokens. Returns (allowed, seconds until enough tokens)."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (float(burst), now))
+        tokens = min(float(burst), tokens + (now - updated) * rate)
+        if tokens >= cost:
+            allowed, wait = True, 0.0
+            tokens -= cost
+        else:
+            allowed, wait = False, (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        return allowed, wait
+
+
+# Atomic refill-and-take; KEYS[1] bucket, ARGV: rate/s, burst, cost, now (s)
+_REDIS_TOKEN_BUCKET = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local rate, burst, cost, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local allowed, wait = 0, 0
+if tokens >= cost then
+  allowed = 1
+  tokens = tokens - cost
+else
+  wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(wait)}
+"""
+
+
+class RedisRateLimitBackend:
+    """Token buckets shared by every process through Redis (needs ``redis``)."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis.asyncio as redis  # optional dependency
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+
+    async def acquire(self, key: str, rate: float, burst: int, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, wait = await self._script(keys=[self.prefix + key], args=[rate, burst, cost, time.time()])
+        return bool(allowed), float(wait)
+
+
+def _build_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            return RedisRateLimitBackend(settings.RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            logger.error("RATE_LIMIT_BACKEND=redis but the redis package is not installed; using in-memory buckets")
+    return InMemoryRateLimitBackend()
+
+
+class AdmissionController:
+    def __init__(self, backend=None):
+        self.backend = backend or _build_backend()
+        self.inflight = 0
+
+    def quota(self, role: str) -> Tuple[float, int]:
+        """(tokens per second, burst) for a role; unknown roles get the "user" quota."""
+        per_minute = settings.RATE_LIMIT_PER_MINUTE.get(role, settings.RATE_LIMIT_PER_MINUTE.get("user", 60))
+        burst = settings.RATE_LIMIT_BURST.get(role, settings.RATE_LIMIT_BURST.get("user", 10))
+        return per_minute / 60.0, burst
+
+    async def check_rate(self, user, scope: str) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        role = role_for(user)
+        rate, burst = self.quota(role)
+        if rate <= 0:
+            return
+        try:
+            allowed, wait = await self.backend.acquire(f"{scope}:{user.id}", rate, burst)
+        except Exception as e:
+            # Fail open: an unavailable shared backend must not take scoring down
+            logger.warning(f"Rate limit backend error, admitting request: {e}")
+            return
+        if not allowed:
+            RATE_LIMITED.inc(role=role)
+            raise RateLimitExceeded(wait)
+
+    def check_load(self, queue_depth: float) -> None:
+        if settings.SCORING_SHED_QUEUE_DEPTH > 0 and queue_depth >= settings.SCORING_SHED_QUEUE_DEPTH:
+            LOAD_SHED.inc(reason="queue_depth")
+            raise Overloaded("queue_depth", settings.SCORING_SHED_RETRY_AFTER_SECONDS)
+        if settings.SCORING_MAX_INFLIGHT > 0 and self.inflight >= settings.SCORING_MAX_INFLIGHT:
+            LOAD_SHED.inc(reason="inflight")
+            raise Overloaded("inflight", settings.SCORING_SHED_RETRY_AFTER_SECONDS)
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.inflight += 1
+        SCORING_INFLIGHT.set(self.inflight)
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            SCORING_INFLIGHT.set(self.inflight)
+
+
+scoring_admission = AdmissionController()
@@ -0,0 +1,179 @@
+"""
+Per-request timing.
+
+``RequestTimingMiddleware`` opens a ``RequestTimings`` for every HTTP request
+and stores it in a context variable. SQLAlchemy cursor events (see
+``instrument_queries``) add each statement and its duration to it, and code
+wraps interesting stages in ``timed("name")``. The totals are returned in a
+``Server-Timing`` header, and requests slower than ``SLOW_REQUEST_MS`` are
+logged with the SQL they ran.
+
+Tests can catch N+1 regressions with ``assert_query_count(response, n)``, or
+``capture_queries()`` around direct service calls.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+REQUEST_DB_QUERIES = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+SLOW_REQUESTS = registry.counter("http_slow_requests_total", "Requests slower than SLOW_REQUEST_MS")
+
+
+class RequestTimings:
+    def __init__(self, max_statements: int = settings.SLOW_REQUEST_MAX_STATEMENTS):
+        self.max_statements = max_statements
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []
+        self.spans: List[Tuple[str, float]] = []
+
+    def add_query(self, statement: str, duration: float) -> None:
+        self.query_count += 1
+        self.db_seconds += duration
+        if len(self.statements) < self.max_statements:
+            self.statements.append((statement, duration))
+
+    def add_span(self, name: str, duration: float) -> None:
+        self.spans.append((name, duration))
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"']
+        metrics.extend(f"{name};dur={duration * 1000:.1f}" for name, duration in self.spans)
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record a named stage in the current request's Server-Timing (no-op outside requests)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_span(name, time.perf_counter() - started)
+
+
+def instrument_queries(async_engine: AsyncEngine) -> None:
+    """Count and time every statement run on ``async_engine`` against the current request."""
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        timings = _current.get()
+        started = getattr(context, "_query_started", None)
+        if timings is not None and started is not None:
+            timings.add_query(statement, time.perf_counter() - started)
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware; pure ASGI so the context variable reaches the endpoint."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                header = timings.server_timing(time.perf_counter() - started).encode()
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", header)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            REQUEST_DB_QUERIES.observe(timings.query_count)
+            if settings.SLOW_REQUEST_MS > 0 and elapsed * 1000 >= settings.SLOW_REQUEST_MS:
+                SLOW_REQUESTS.inc()
+                _log_slow_request(scope, status_code, elapsed, timings)
+
+
+def _log_slow_request(scope, status_code: int, elapsed: float, timings: RequestTimings) -> None:
+    statements = [
+        {"ms": round(duration * 1000, 2), "sql": " ".join(statement.split())[:500]}
+        for statement, duration in timings.statements
+    ]
+    logger.bind(
+        path=scope.get("path"),
+        method=scope.get("method"),
+        status=status_code,
+        queries=timings.query_count,
+        db_ms=round(timings.db_seconds * 1000, 2),
+        spans={name: round(duration * 1000, 2) for name, duration in timings.spans},
+        statements=statements,
+    ).warning(
+        "Slow request {} {} took {:.0f}ms ({} queries, {:.0f}ms DB){}",
+        scope.get("method"), scope.get("path"), elapsed * 1000, timings.query_count, timings.db_seconds * 1000,
+        "".join(f"\n  {s['ms']:>8.2f}ms  {s['sql']}" for s in statements),
+    )
+
+
+@contextmanager
+def capture_queries() -> Iterator[RequestTimings]:
+    """Collect the queries run inside the block (for tests calling services directly)."""
+    timings = RequestTimings(max_statements=1000)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+_QUERY_COUNT = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def query_count(response) -> int:
+    """Number of SQL statements a response's request ran, from its Server-Timing header."""
+    match = _QUERY_COUNT.search(response.headers.get("server-timing", ""))
+    if match is None:
+        raise AssertionError("Response has no Server-Timing db entry; is RequestTimingMiddleware installed?")
+    return int(match.group(1))
+
+
+def assert_query_count(response, expected: int, at_most: bool = False) -> None:
+    """Fail if an endpoint ran a different (or, with ``at_most``, larger) number of queries."""
+    actual = query_count(response)
+    if actual > expected or (not at_most and actual != expected):
+        bound = "at most " if at_most else ""
+        raise AssertionError(f"Expected {bound}{expected} queries, got {actual}")
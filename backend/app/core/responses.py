@@ -0,0 +1,25 @@
+"""
+Fast JSON responses.
+
+``FastJSONResponse`` renders with pydantic-core's Rust serializer instead of
+``json.dumps`` and passes pre-serialized bytes straight through. Combined with
+``dump_rows`` it turns ORM rows into JSON in a single validate+dump pass,
+skipping FastAPI's response_model validation and ``jsonable_encoder`` walk.
+"""
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return to_json(content)
+
+
+def dump_rows(adapter: TypeAdapter, rows: Iterable[Any]) -> bytes:
+    """Serialize ORM rows through a pre-built TypeAdapter (e.g. ``List[Schema]``)."""
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
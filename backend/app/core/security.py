@@ -8,13 +8,24 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: Optional[timedelta] = None) -> str:
+# Scope of the short-lived ticket that opens a dashboard stream
+DASHBOARD_STREAM_SCOPE = "dashboard_stream"
+
+def create_access_token(
+    subject: Union[str, Any], expires_delta: Optional[timedelta] = None, scope: Optional[str] = None
+) -> str:
+    """
+    Signed JWT for ``subject``. Tokens with a ``scope`` are only accepted where
+    that scope is expected, never as a regular bearer token.
+    """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode = {"exp": expire, "sub": str(subject)}
+    if scope is not None:
+        to_encode["scope"] = scope
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -1,19 +1,150 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.request_timing import instrument_queries
+
+
+def _async_url(url: str) -> str:
+    # Ensure URL is async compatible
+    # If sqlite:/// -> sqlite+aiosqlite:///
+    if url.startswith("sqlite://") and "aiosqlite" not in url:
+        return url.replace("sqlite://", "sqlite+aiosqlite://")
+    return url
 
-# Ensure URL is async compatible
-# If sqlite:/// -> sqlite+aiosqlite:///
-SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
-if SQLALCHEMY_DATABASE_URL.startswith("sqlite://") and "aiosqlite" not in SQLALCHEMY_DATABASE_URL:
-    SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://")
-
-engine = create_async_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {},
-    future=True,
-    echo=False,
+
+SQLALCHEMY_DATABASE_URL = _async_url(settings.DATABASE_URL)
+SQLALCHEMY_READ_DATABASE_URL = _async_url(settings.READ_DATABASE_URL) if settings.READ_DATABASE_URL else None
+
+# Pool metrics, labelled by engine name so pools can be sized against measured load
+POOL_CHECKOUT_WAIT = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+)
+POOL_CHECKOUT_TIMEOUTS = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Connection checkouts that timed out waiting for the pool",
+    ["pool"],
 )
+POOL_CONNECTION_HOLD = registry.histogram(
+    "db_pool_connection_hold_seconds",
+    "Time a connection stays checked out before being returned",
+    ["pool"],
+)
+POOL_CHECKED_OUT = registry.gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the pool",
+    ["pool"],
+)
+POOL_CONNECTIONS_OPENED = registry.counter(
+    "db_pool_connections_opened_total",
+    "New DBAPI connections opened by the pool",
+    ["pool"],
+)
+READ_SESSIONS = registry.counter(
+    "db_read_sessions_total",
+    "Read-only sessions opened, by the engine that served them",
+    ["target"],
+)
+REPLICA_LAG = registry.gauge("db_replica_lag_seconds", "Last measured read replica lag")
+REPLICA_AVAILABLE = registry.gauge("db_replica_available", "1 if reads are routed to the replica")
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long callers wait for a connection."""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            POOL_CHECKOUT_TIMEOUTS.inc(pool=self.metrics_name)
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start, pool=self.metrics_name)
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def build_engine_options(url: URL) -> Dict[str, Any]:
+    """Engine keyword arguments for the given URL, driven by ``Settings``."""
+    options: Dict[str, Any] = {"future": True, "echo": False}
+
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if _is_memory_sqlite(url):
+            # In-memory databases live in a single connection, pooling does not apply
+            return options
+
+    options.update(
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+    if url.get_driver_name() == "asyncpg":
+        server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        options["connect_args"] = {
+            # SQLAlchemy's prepared statement LRU (per connection)
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            # asyncpg's own statement cache, used for un-prepared executes
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        }
+
+    return options
+
+
+def instrument_pool(async_engine: AsyncEngine, name: str) -> None:
+    """Attach checkout/checkin listeners that feed the pool metrics."""
+    pool = async_engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return
+    pool.metrics_name = name
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        POOL_CONNECTIONS_OPENED.inc(pool=name)
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        POOL_CHECKED_OUT.inc(pool=name)
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            POOL_CONNECTION_HOLD.observe(time.perf_counter() - started, pool=name)
+            POOL_CHECKED_OUT.dec(pool=name)
+
+
+def create_engine_for(url: str, name: str) -> AsyncEngine:
+    parsed = make_url(url)
+    async_engine = create_async_engine(parsed, **build_engine_options(parsed))
+    instrument_pool(async_engine, name)
+    instrument_queries(async_engine)
+    return async_engine
+
+
+engine = create_engine_for(SQLALCHEMY_DATABASE_URL, "primary")
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -23,4 +154,72 @@ AsyncSessionLocal = sessionmaker(
     autoflush=False,
 )
 
+
+
+class ReplicaHealth:
+    """
+    Decides whether reads may go to the replica.
+
+    Replication lag is measured at most once per check interval; a replica that
+    lags beyond the tolerance or fails the check is skipped until the next one.
+    """
+
+    def __init__(self, read_engine: AsyncEngine, max_lag: float, check_interval: float):
+        self.read_engine = read_engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._available = False
+        self._next_check = 0.0
+
+    async def measure_lag(self) -> float:
+        async with self.read_engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                lag = await conn.scalar(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                ))
+                return float(lag or 0.0)
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+    async def is_available(self) -> bool:
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._available
+        # Claim the check window first so concurrent requests don't all probe
+        self._next_check = now + self.check_interval
+        try:
+            lag = await asyncio.wait_for(self.measure_lag(), timeout=self.check_interval)
+            REPLICA_LAG.set(lag)
+            self._available = lag <= self.max_lag
+        except Exception:
+            self._available = False
+        REPLICA_AVAILABLE.set(1 if self._available else 0)
+        return self._available
+
+    def mark_unavailable(self) -> None:
+        self._available = False
+        self._next_check = time.monotonic() + self.check_interval
+        REPLICA_AVAILABLE.set(0)
+
+
+read_engine: Optional[AsyncEngine] = None
+AsyncReadSessionLocal = None
+replica_health: Optional[ReplicaHealth] = None
+
+if SQLALCHEMY_READ_DATABASE_URL:
+    read_engine = create_engine_for(SQLALCHEMY_READ_DATABASE_URL, "replica")
+    AsyncReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+    replica_health = ReplicaHealth(
+        read_engine,
+        max_lag=settings.READ_REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.READ_REPLICA_CHECK_INTERVAL_SECONDS,
+    )
+
 Base = declarative_base()
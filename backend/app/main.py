@@ -1,12 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
+from loguru import logger
 from app.api.v1.router import api_router
 from app.core.config import settings
+from app.core.logging import setup_logging
+from app.core.metrics import registry
+from app.core.request_timing import RequestTimingMiddleware
+from app.services.audit_service import audit_buffer
+from app.services.audit_storage import audit_retention_job
+from app.services.dashboard_stream import dashboard_broadcaster
+from app.services.scoring_queue import scoring_workers
+
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    audit_buffer.start()
+    audit_retention_job.start()
+    scoring_workers.start()
+    dashboard_broadcaster.start()
+    yield
+    await dashboard_broadcaster.stop()
+    await scoring_workers.stop()
+    await audit_retention_job.stop()
+    await audit_buffer.stop(flush=settings.AUDIT_FLUSH_ON_SHUTDOWN)
+    # Drain enqueued log records before the process exits
+    await logger.complete()
 
 app = FastAPI(
     title=settings.APP_NAME,
     version="1.0.0",
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -17,10 +45,27 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["ETag", "Server-Timing"],
     )
 
+# Compress large payloads (application lists) for clients that accept gzip
+if settings.GZIP_ENABLED:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=settings.GZIP_MINIMUM_SIZE,
+        compresslevel=settings.GZIP_COMPRESS_LEVEL,
+    )
+
+# Outermost, so Server-Timing covers the whole request
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(RequestTimingMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 def root():
     return {"message": "Credit Scoring API is running", "status": "healthy"}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -2,3 +2,5 @@ from .user import User
 from .application import Application
 from .risk_assessment import RiskAssessment
 from .audit_log import AuditLog
+from .scoring_job import ScoringJob
+from .idempotency_key import IdempotencyKey
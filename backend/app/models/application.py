@@ -23,5 +23,7 @@ class Application(Base):
     loan_purpose = Column(String)
     credit_score = Column(Integer, nullable=True)
     status = Column(String, default="pending")
+    # Incremented on every update, used for optimistic concurrency
+    version_id = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
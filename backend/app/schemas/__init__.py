@@ -1,3 +1,8 @@
-from .token import Token, TokenPayload
+from .token import StreamTicket, Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate, UserLogin
-from .application import Application, ApplicationCreate, ApplicationUpdate
+from .application import (
+    Application, ApplicationCreate, ApplicationUpdate,
+    ApplicationBulkDecision, ApplicationBulkDecisionResult, ApplicationDecisionOutcome,
+)
+from .audit_log import AuditLog
+from .scoring_job import ScoringJob, ScoringJobStatus
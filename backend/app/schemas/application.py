@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel, ConfigDict
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
 from datetime import datetime
 
 class ApplicationBase(BaseModel):
@@ -18,14 +18,35 @@ class ApplicationCreate(ApplicationBase):
 
 class ApplicationUpdate(ApplicationBase):
     status: Optional[str] = None
+    # Version the client last read; the update is rejected if it has changed
+    version_id: Optional[int] = None
 
 class ApplicationInDBBase(ApplicationBase):
     id: int
     user_id: int
     status: str
+    version_id: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     model_config = ConfigDict(from_attributes=True)
 
 class Application(ApplicationInDBBase):
     pass
+
+# Upper bound on ids per bulk decision request
+BULK_DECISION_MAX_IDS = 1000
+
+class ApplicationBulkDecision(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=BULK_DECISION_MAX_IDS)
+    status: Literal["approved", "rejected"]
+
+class ApplicationDecisionOutcome(BaseModel):
+    id: int
+    # updated | unchanged | invalid_transition | conflict | not_found
+    outcome: str
+    status: Optional[str] = None
+    version_id: Optional[int] = None
+
+class ApplicationBulkDecisionResult(BaseModel):
+    updated: int
+    results: List[ApplicationDecisionOutcome]
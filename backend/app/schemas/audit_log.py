@@ -0,0 +1,15 @@
+from typing import Any, Optional
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+class AuditLog(BaseModel):
+    id: int
+    user_id: Optional[int] = None
+    action: str
+    entity_type: Optional[str] = None
+    entity_id: Optional[int] = None
+    old_value: Optional[Any] = None
+    new_value: Optional[Any] = None
+    ip_address: Optional[str] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,18 @@
+from typing import Optional
+from pydantic import BaseModel, ConfigDict
+from datetime import datetime
+
+class ScoringJob(BaseModel):
+    id: int
+    application_id: int
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class ScoringJobStatus(ScoringJob):
+    credit_score: Optional[int] = None
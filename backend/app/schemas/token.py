@@ -7,3 +7,8 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    scope: Optional[str] = None
+
+class StreamTicket(BaseModel):
+    ticket: str
+    expires_in: int
@@ -2,6 +2,15 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func, select
 from app.models.application import Application, ApplicationStatus
 
+async def get_dashboard_version(db: AsyncSession):
+    # One aggregate that changes whenever any application is created, updated or deleted
+    result = await db.execute(select(
+        func.count(Application.id),
+        func.coalesce(func.sum(Application.id), 0),
+        func.coalesce(func.sum(Application.version_id), 0),
+    ))
+    return tuple(result.one())
+
 async def get_dashboard_stats(db: AsyncSession):
     # Async scalar queries
     total_result = await db.execute(select(func.count(Application.id)))
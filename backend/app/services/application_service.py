@@ -1,42 +1,282 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import case, func, insert, select, update
 from app.models.application import Application, ApplicationStatus
-from app.schemas.application import ApplicationCreate, ApplicationUpdate
+from app.schemas.application import (
+    ApplicationBulkDecision, ApplicationBulkDecisionResult, ApplicationCreate,
+    ApplicationDecisionOutcome, ApplicationUpdate,
+)
+from app.services.audit_service import audit_buffer, snapshot
+from app.services import scoring_queue
+from app.services.event_bus import APPLICATIONS_CHANGED, event_bus
+from app.core.config import settings
 
-async def get_applications(db: AsyncSession, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[Application]:
-    query = select(Application)
+# Underwriting decisions: target status -> statuses it may be applied to
+DECISION_TRANSITIONS = {
+    ApplicationStatus.APPROVED.value: {ApplicationStatus.PENDING.value},
+    ApplicationStatus.REJECTED.value: {ApplicationStatus.PENDING.value},
+}
+
+# SQLite reads old values before updating; re-reads allowed when another writer gets in between
+MAX_UPDATE_ATTEMPTS = 3
+
+class ApplicationVersionConflict(Exception):
+    """The application changed since the version the caller last read."""
+
+    def __init__(self, application_id: int, expected_version: int):
+        self.application_id = application_id
+        self.expected_version = expected_version
+        super().__init__(f"Application {application_id} is no longer at version {expected_version}")
+
+def _applications_page(columns, skip: int, limit: int, user_id: Optional[int]):
+    query = select(*columns)
     if user_id:
         query = query.where(Application.user_id == user_id)
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
+    # Stable order so a page and its fingerprint cover the same rows
+    return query.order_by(Application.id).offset(skip).limit(limit)
+
+async def get_applications(db: AsyncSession, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[Application]:
+    result = await db.execute(_applications_page([Application], skip, limit, user_id))
     return result.scalars().all()
 
+async def get_applications_fingerprint(
+    db: AsyncSession, skip: int = 0, limit: int = 100, user_id: Optional[int] = None
+) -> Tuple[int, int, int, Optional[datetime]]:
+    """
+    (row count, sum of ids, sum of versions, last change) for a page, from one
+    aggregate over narrow columns. Any insert, delete or update in the page
+    changes it, because every write bumps ``version_id``.
+    """
+    page = _applications_page(
+        [Application.id, Application.version_id, Application.created_at, Application.updated_at],
+        skip, limit, user_id,
+    ).subquery()
+    result = await db.execute(select(
+        func.count(page.c.id),
+        func.coalesce(func.sum(page.c.id), 0),
+        func.coalesce(func.sum(page.c.version_id), 0),
+        func.max(func.coalesce(page.c.updated_at, page.c.created_at)),
+    ))
+    return tuple(result.one())
+
 async def get_application(db: AsyncSession, application_id: int) -> Optional[Application]:
     result = await db.execute(select(Application).where(Application.id == application_id))
     return result.scalars().first()
 
 async def create_application(db: AsyncSession, application: ApplicationCreate, user_id: int) -> Application:
-    db_application = Application(
-        **application.dict(),
-        user_id=user_id,
-        status=ApplicationStatus.PENDING.value
+    # INSERT ... RETURNING hands back server defaults (id, created_at) without a refresh SELECT
+    result = await db.execute(
+        insert(Application)
+        .values(
+            **application.dict(),
+            user_id=user_id,
+            status=ApplicationStatus.PENDING.value,
+        )
+        .returning(Application)
     )
-    db.add(db_application)
+    db_application = result.scalar_one()
+    if settings.SCORING_QUEUE_ENABLED:
+        # Scoring happens asynchronously; the job commits with the application
+        await scoring_queue.enqueue_scoring_job(db, db_application.id)
     await db.commit()
-    await db.refresh(db_application)
+    if settings.SCORING_QUEUE_ENABLED:
+        scoring_queue.scoring_workers.notify()
+    event_bus.publish(APPLICATIONS_CHANGED, {"action": "create", "ids": [db_application.id]})
+    audit_buffer.record(
+        "CREATE", "Application", db_application.id,
+        user_id=user_id, new_value=snapshot(db_application),
+    )
     return db_application
 
-async def update_application(db: AsyncSession, application_id: int, application_update: ApplicationUpdate) -> Optional[Application]:
-    db_application = await get_application(db, application_id)
-    if not db_application:
-        return None
-    
+async def update_application(
+    db: AsyncSession,
+    application_id: int,
+    application_update: ApplicationUpdate,
+    actor_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+) -> Optional[Application]:
+    """
+    Apply a partial update with a single UPDATE ... RETURNING.
+
+    If ``application_update.version_id`` is set the row is only updated while it
+    is still at that version, otherwise ``ApplicationVersionConflict`` is raised.
+    ``owner_id`` restricts the update to that user's applications. The audit
+    entry records the old and new values of the fields that changed. On
+    Postgres the old row comes from a CTE in the same statement; SQLite, whose
+    RETURNING cannot see it, reads it first and updates only the version it
+    read, re-reading up to ``MAX_UPDATE_ATTEMPTS`` times if another writer got
+    in between. If it keeps changing, ``ApplicationVersionConflict`` is raised
+    even without an expected version.
+
+    There is no HTTP endpoint for this any more; service callers must handle
+    ``ApplicationVersionConflict``.
+    """
     update_data = application_update.dict(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_application, key, value)
-        
-    db.add(db_application)
+    expected_version = update_data.pop("version_id", None)
+    fields = [*update_data.keys(), "version_id"]
+
+    scope = [Application.id == application_id]
+    if owner_id is not None:
+        scope.append(Application.user_id == owner_id)
+    if expected_version is not None:
+        scope.append(Application.version_id == expected_version)
+
+    stmt = (
+        update(Application)
+        .where(*scope)
+        .values(**update_data, version_id=Application.version_id + 1)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        # FOR UPDATE makes the CTE wait for concurrent writers and read the
+        # row this UPDATE then changes, not the statement's starting snapshot
+        old = (
+            select(Application.id, *[getattr(Application, name) for name in fields])
+            .where(*scope)
+            .with_for_update()
+            .cte("old_application")
+        )
+        stmt = stmt.where(Application.id == old.c.id).returning(
+            Application, *[old.c[name].label(f"old_{name}") for name in fields]
+        )
+        row = (await db.execute(stmt)).one_or_none()
+        db_application = row.Application if row is not None else None
+        previous = {name: row._mapping[f"old_{name}"] for name in fields} if row is not None else None
+    else:
+        db_application = None
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            row = (await db.execute(
+                select(*[getattr(Application, name) for name in fields]).where(*scope)
+            )).one_or_none()
+            if row is None:
+                break
+            previous = dict(row._mapping)
+            # The read is not locked; only update the version it saw, else re-read
+            db_application = (await db.execute(
+                stmt.where(Application.version_id == previous["version_id"]).returning(Application)
+            )).scalar_one_or_none()
+            if db_application is not None:
+                break
+        else:
+            await db.rollback()
+            raise ApplicationVersionConflict(application_id, previous["version_id"])
+
+    if db_application is None:
+        await db.rollback()
+        if expected_version is not None:
+            # Only the failure path pays for a second query to tell stale from missing
+            exists = await db.execute(select(Application.id).where(Application.id == application_id))
+            if exists.first() is not None:
+                raise ApplicationVersionConflict(application_id, expected_version)
+        return None
+
     await db.commit()
-    await db.refresh(db_application)
+    event_bus.publish(APPLICATIONS_CHANGED, {"action": "update", "ids": [db_application.id]})
+    changed = [name for name in fields if previous[name] != getattr(db_application, name)]
+    audit_buffer.record(
+        "UPDATE", "Application", db_application.id,
+        user_id=actor_id,
+        old_value=snapshot(previous, changed),
+        new_value=snapshot(db_application, changed),
+    )
     return db_application
+
+async def apply_bulk_decision(
+    db: AsyncSession,
+    decision: ApplicationBulkDecision,
+    actor_id: Optional[int] = None,
+) -> ApplicationBulkDecisionResult:
+    """
+    Move many applications to ``decision.status`` with one set-based
+    UPDATE ... RETURNING. Only rows in an allowed source status are touched;
+    a single follow-up SELECT explains why the remaining ids were skipped.
+    Audit entries and the dashboard notification are emitted once for the
+    whole batch, with each row's previous status.
+
+    The previous status comes from a locking CTE on Postgres. SQLite reads it
+    first and only updates the versions it read, re-reading changed rows up
+    to ``MAX_UPDATE_ATTEMPTS`` times; rows that keep changing are reported
+    as ``conflict``.
+    """
+    ids = list(dict.fromkeys(decision.ids))
+    target = decision.status
+    allowed_from = DECISION_TRANSITIONS[target]
+
+    stmt = (
+        update(Application)
+        .where(Application.status.in_(allowed_from))
+        .values(status=target, version_id=Application.version_id + 1)
+        .execution_options(synchronize_session=False)
+    )
+    returned = (Application.id, Application.status, Application.version_id)
+    updated, old_status = {}, {}
+    if db.get_bind().dialect.name == "postgresql":
+        old = (
+            select(Application.id, Application.status)
+            .where(Application.id.in_(ids), Application.status.in_(allowed_from))
+            .with_for_update()
+            .cte("old_application")
+        )
+        result = await db.execute(
+            stmt.where(Application.id == old.c.id).returning(*returned, old.c.status.label("old_status"))
+        )
+        for row in result.all():
+            updated[row.id], old_status[row.id] = row, row.old_status
+    else:
+        candidates = ids
+        for _ in range(MAX_UPDATE_ATTEMPTS):
+            previous = {row.id: row for row in (await db.execute(
+                select(*returned).where(Application.id.in_(candidates), Application.status.in_(allowed_from))
+            )).all()}
+            if not previous:
+                break
+            # Only rows still at the version read; the others are read again
+            read_version = case({i: row.version_id for i, row in previous.items()}, value=Application.id)
+            result = await db.execute(
+                stmt.where(Application.id.in_(previous), Application.version_id == read_version).returning(*returned)
+            )
+            for row in result.all():
+                updated[row.id], old_status[row.id] = row, previous[row.id].status
+            candidates = [i for i in previous if i not in updated]
+            if not candidates:
+                break
+
+    skipped = {}
+    remaining = [i for i in ids if i not in updated]
+    if remaining:
+        rows = await db.execute(
+            select(Application.id, Application.status, Application.version_id)
+            .where(Application.id.in_(remaining))
+        )
+        skipped = {row.id: row for row in rows.all()}
+    await db.commit()
+
+    outcomes = []
+    for application_id in ids:
+        row = updated.get(application_id) or skipped.get(application_id)
+        if row is None:
+            outcomes.append(ApplicationDecisionOutcome(id=application_id, outcome="not_found"))
+            continue
+        if application_id in updated:
+            outcome = "updated"
+        elif row.status == target:
+            outcome = "unchanged"
+        elif row.status in allowed_from:
+            outcome = "conflict"
+        else:
+            outcome = "invalid_transition"
+        outcomes.append(ApplicationDecisionOutcome(
+            id=application_id, outcome=outcome, status=row.status, version_id=row.version_id,
+        ))
+
+    if updated:
+        event_bus.publish(APPLICATIONS_CHANGED, {"action": "decision", "ids": list(updated)})
+        for row in updated.values():
+            audit_buffer.record(
+                "UPDATE", "Application", row.id,
+                user_id=actor_id,
+                old_value={"status": old_status[row.id], "version_id": row.version_id - 1},
+                new_value={"status": row.status, "version_id": row.version_id},
+            )
+    return ApplicationBulkDecisionResult(updated=len(updated), results=outcomes)
@@ -0,0 +1,202 @@
+"""
+Buffered audit logging.
+
+Services call ``audit_buffer.record(...)``, which only appends to an in-memory
+buffer. A background task started with the application flushes the buffer
+to the monthly audit partitions (see ``audit_storage``) in batched INSERTs,
+so auditing does not add a commit to every request.
+"""
+import asyncio
+import enum
+from collections import deque
+from datetime import date, datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Mapping, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database.session import AsyncSessionLocal
+from app.services.audit_storage import audit_store
+
+AUDIT_ENQUEUED = registry.counter("audit_entries_enqueued_total", "Audit entries accepted into the buffer")
+AUDIT_WRITTEN = registry.counter("audit_entries_written_total", "Audit entries persisted to the database")
+AUDIT_DROPPED = registry.counter(
+    "audit_entries_dropped_total",
+    "Audit entries dropped before being persisted",
+    ["reason"],
+)
+AUDIT_OVERFLOWS = registry.counter(
+    "audit_buffer_overflow_total",
+    "Times a record was rejected because the buffer was full",
+)
+AUDIT_FLUSH_FAILURES = registry.counter("audit_flush_failures_total", "Failed audit batch inserts")
+AUDIT_BUFFER_DEPTH = registry.gauge("audit_buffer_depth", "Audit entries waiting to be flushed")
+AUDIT_BATCH_ROWS = registry.histogram(
+    "audit_flush_batch_rows",
+    "Rows written per audit batch insert",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 5000),
+)
+
+SENSITIVE_FIELDS = {"hashed_password", "password"}
+
+
+def _json_safe(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def snapshot(instance: Any, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """JSON-safe dict of an ORM row's (or a mapping's) column values, without secrets."""
+    if isinstance(instance, Mapping):
+        return {name: _json_safe(instance.get(name)) for name in fields or instance if name not in SENSITIVE_FIELDS}
+    names = fields if fields is not None else [c.key for c in instance.__table__.columns]
+    return {
+        name: _json_safe(getattr(instance, name, None))
+        for name in names
+        if name not in SENSITIVE_FIELDS
+    }
+
+
+class AuditBuffer:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        flush_interval: float = settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+        batch_size: int = settings.AUDIT_BATCH_SIZE,
+        max_buffer: int = settings.AUDIT_MAX_BUFFER,
+        enabled: bool = settings.AUDIT_ENABLED,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.enabled = enabled
+        self._entries: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def record(
+        self,
+        action: str,
+        entity_type: Optional[str] = None,
+        entity_id: Optional[int] = None,
+        user_id: Optional[int] = None,
+        old_value: Optional[Dict[str, Any]] = None,
+        new_value: Optional[Dict[str, Any]] = None,
+        ip_address: Optional[str] = None,
+    ) -> bool:
+        """Queue an audit entry. Never blocks or touches the database."""
+        if not self.enabled:
+            return False
+        if len(self._entries) >= self.max_buffer:
+            AUDIT_OVERFLOWS.inc()
+            AUDIT_DROPPED.inc(reason="overflow")
+            logger.warning(f"Audit buffer full ({self.max_buffer}), dropping {action} {entity_type}:{entity_id}")
+            return False
+
+        self._entries.append({
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_value": old_value,
+            "new_value": new_value,
+            "ip_address": ip_address,
+            # Stamped at capture time so batching does not skew the audit trail
+            "created_at": datetime.now(timezone.utc),
+        })
+        AUDIT_ENQUEUED.inc()
+        AUDIT_BUFFER_DEPTH.set(len(self._entries))
+        if len(self._entries) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        count = min(self.batch_size, len(self._entries))
+        return [self._entries.popleft() for _ in range(count)]
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        # Failed batches go back to the front; anything that no longer fits is lost
+        room = max(self.max_buffer - len(self._entries), 0)
+        kept = batch[:room]
+        self._entries.extendleft(reversed(kept))
+        if len(batch) > len(kept):
+            AUDIT_DROPPED.inc(len(batch) - len(kept), reason="flush_error")
+
+    async def write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        async with self.session_factory() as session:
+            await audit_store.write(session, batch)
+            await session.commit()
+
+    async def flush(self) -> int:
+        """Write everything currently buffered. Returns the number of rows written."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        written = 0
+        async with self._flush_lock:
+            while self._entries:
+                batch = self._take_batch()
+                try:
+                    await self.write_batch(batch)
+                except asyncio.CancelledError:
+                    # The batch is already off the buffer; put it back so a
+                    # later flush (or the shutdown accounting) still sees it
+                    self._requeue(batch)
+                    AUDIT_BUFFER_DEPTH.set(len(self._entries))
+                    raise
+                except Exception as e:
+                    AUDIT_FLUSH_FAILURES.inc()
+                    logger.error(f"Audit flush failed for {len(batch)} entries: {e}")
+                    self._requeue(batch)
+                    break
+                written += len(batch)
+                AUDIT_WRITTEN.inc(len(batch))
+                AUDIT_BATCH_ROWS.observe(len(batch))
+        AUDIT_BUFFER_DEPTH.set(len(self._entries))
+        return written
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is not None or not self.enabled:
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Audit buffer flusher started")
+
+    async def stop(self, flush: bool = settings.AUDIT_FLUSH_ON_SHUTDOWN) -> None:
+        if self._task is not None:
+            # Let the flusher finish its current batch and exit instead of
+            # cancelling it in the middle of a write
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if flush and self._entries:
+            written = await self.flush()
+            logger.info(f"Audit buffer flushed {written} entries on shutdown")
+        if self._entries:
+            AUDIT_DROPPED.inc(len(self._entries), reason="shutdown")
+            self._entries.clear()
+            AUDIT_BUFFER_DEPTH.set(0)
+
+
+audit_buffer = AuditBuffer()
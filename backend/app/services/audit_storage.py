@@ -0,0 +1,363 @@
+"""
+Time-partitioned audit log storage.
+
+Audit rows are partitioned by calendar month on ``created_at``:
+
+* PostgreSQL: ``audit_logs`` is a native ``PARTITION BY RANGE`` table (see the
+  ``partition_audit_logs`` migration) with one ``audit_logs_YYYY_MM`` partition
+  per month. Inserts go through the parent and queries filtered on
+  ``created_at`` are pruned by the planner.
+* SQLite: rotating ``audit_logs_YYYY_MM`` tables. Inserts are routed to the
+  table for their month and history queries only read the tables that
+  overlap the requested range. Rows written to the plain ``audit_logs``
+  table before partitioning are moved into their month tables by the
+  retention job.
+
+Retention drops whole partitions (optionally archiving them first), which is
+far cheaper than deleting rows.
+"""
+import asyncio
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+from sqlalchemy import (
+    JSON, Column, DateTime, Index, Integer, MetaData, String, Table,
+    delete, func, insert, select, text, union_all,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database.session import AsyncSessionLocal
+from app.models.audit_log import AuditLog
+
+PARENT_TABLE = AuditLog.__tablename__
+PARTITION_PATTERN = re.compile(rf"^{PARENT_TABLE}_(\d{{4}})_(\d{{2}})$")
+
+AUDIT_PARTITIONS = registry.gauge("audit_partitions", "Audit log partitions currently stored")
+AUDIT_PARTITIONS_DROPPED = registry.counter(
+    "audit_partitions_dropped_total",
+    "Audit log partitions removed by retention",
+)
+
+
+def month_start(moment: datetime) -> datetime:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    index = start.year * 12 + (start.month - 1) + months
+    return start.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_{start.year:04d}_{start.month:02d}"
+
+
+def partition_start(name: str) -> Optional[datetime]:
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+def months_in_range(since: datetime, until: datetime) -> List[datetime]:
+    """Month starts of every partition overlapping ``[since, until)``."""
+    current, last = month_start(since), month_start(until)
+    months = []
+    while current <= last:
+        months.append(current)
+        current = add_months(current, 1)
+    return months
+
+
+def _partition_table(name: str) -> Table:
+    # Same columns as AuditLog. Used as DDL for SQLite partitions and to read any
+    # partition directly; no FK so audit rows outlive the users they reference
+    return Table(
+        name,
+        MetaData(),
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, nullable=True),
+        Column("action", String, nullable=False),
+        Column("entity_type", String, nullable=True),
+        Column("entity_id", Integer, nullable=True),
+        Column("old_value", JSON, nullable=True),
+        Column("new_value", JSON, nullable=True),
+        Column("ip_address", String, nullable=True),
+        Column("created_at", DateTime(timezone=True), nullable=False),
+        Index(f"ix_{name}_entity_created", "entity_type", "entity_id", "created_at"),
+        Index(f"ix_{name}_user_created", "user_id", "created_at"),
+        sqlite_autoincrement=True,
+    )
+
+
+class AuditPartitionStore:
+    def __init__(self):
+        self._known: Set[str] = set()
+        self._pg_partitioned: Optional[bool] = None
+
+    async def _is_partitioned(self, conn: AsyncConnection) -> bool:
+        if conn.dialect.name == "sqlite":
+            return True
+        if conn.dialect.name != "postgresql":
+            return False
+        if self._pg_partitioned is None:
+            relkind = await conn.scalar(
+                text("SELECT relkind FROM pg_class WHERE relname = :name"), {"name": PARENT_TABLE}
+            )
+            self._pg_partitioned = relkind == "p"
+            if not self._pg_partitioned:
+                logger.warning("audit_logs is not partitioned; run the partition_audit_logs migration")
+        return self._pg_partitioned
+
+    async def list_partitions(self, conn: AsyncConnection) -> List[str]:
+        if conn.dialect.name == "postgresql":
+            result = await conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :parent"
+            ), {"parent": PARENT_TABLE})
+        else:
+            result = await conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE :prefix"
+            ), {"prefix": f"{PARENT_TABLE}_%"})
+        names = sorted(name for (name,) in result if PARTITION_PATTERN.match(name))
+        self._known = set(names)
+        AUDIT_PARTITIONS.set(len(names))
+        return names
+
+    async def ensure_partition(self, conn: AsyncConnection, start: datetime) -> str:
+        name = partition_name(start)
+        if name in self._known:
+            return name
+
+        if conn.dialect.name == "postgresql":
+            end = add_months(start, 1)
+            await conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT_TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+        else:
+            await conn.run_sync(lambda sync_conn: _partition_table(name).create(sync_conn, checkfirst=True))
+            # Continue ids from the newest partition so they stay unique across tables
+            await conn.execute(text(
+                "INSERT INTO sqlite_sequence (name, seq) "
+                "SELECT :name, COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name LIKE :prefix "
+                "AND NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = :name)"
+            ), {"name": name, "prefix": f"{PARENT_TABLE}_%"})
+
+        self._known.add(name)
+        AUDIT_PARTITIONS.set(len(self._known))
+        return name
+
+    async def migrate_parent_rows(self, conn: AsyncConnection) -> int:
+        """
+        Move rows from the SQLite ``audit_logs`` table into their monthly
+        partitions, so history and retention see them. They get new ids after
+        the highest partition id, and every partition's sequence continues
+        past them. Returns the number of rows moved.
+        """
+        parent = AuditLog.__table__
+        result = await conn.execute(select(func.substr(parent.c.created_at, 1, 7)).distinct())
+        months = [
+            datetime(int(month[:4]), int(month[5:7]), 1, tzinfo=timezone.utc)
+            for (month,) in result.all() if month is not None
+        ]
+        if not months:
+            return 0
+
+        names = [await self.ensure_partition(conn, start) for start in months]
+        prefix = {"prefix": f"{PARENT_TABLE}_%"}
+        last_id = await conn.scalar(text(
+            "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence WHERE name LIKE :prefix"
+        ), prefix)
+        columns = [c.name for c in parent.columns if c.name != "id"]
+        moved = 0
+        for start, name in zip(months, names):
+            in_month = (parent.c.created_at >= start, parent.c.created_at < add_months(start, 1))
+            rows = select(
+                (last_id + moved + func.row_number().over(order_by=parent.c.id)).label("id"),
+                *[parent.c[column] for column in columns],
+            ).where(*in_month)
+            await conn.execute(insert(_partition_table(name)).from_select(["id", *columns], rows))
+            moved += (await conn.execute(delete(parent).where(*in_month))).rowcount
+
+        # A partition only advances its own sequence; keep new ids unique across all of them
+        await conn.execute(text(
+            "UPDATE sqlite_sequence SET seq = :seq WHERE name LIKE :prefix AND seq < :seq"
+        ), {**prefix, "seq": last_id + moved})
+        logger.info(f"Moved {moved} audit rows from {PARENT_TABLE} into monthly partitions")
+        return moved
+
+    async def write(self, session: AsyncSession, entries: List[Dict[str, Any]]) -> None:
+        """Insert a batch of audit entries into their monthly partitions."""
+        conn = await session.connection()
+        if not await self._is_partitioned(conn):
+            await session.execute(insert(AuditLog), entries)
+            return
+
+        by_month: Dict[datetime, List[Dict[str, Any]]] = {}
+        for entry in entries:
+            by_month.setdefault(month_start(entry["created_at"]), []).append(entry)
+
+        for start, rows in by_month.items():
+            name = await self.ensure_partition(conn, start)
+            if conn.dialect.name == "sqlite":
+                await conn.execute(insert(_partition_table(name)), rows)
+
+        if conn.dialect.name == "postgresql":
+            # The partitioned parent routes each row to its month
+            await session.execute(insert(AuditLog), entries)
+
+    async def entity_history(
+        self,
+        session: AsyncSession,
+        entity_type: str,
+        entity_id: int,
+        since: datetime,
+        until: datetime,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Audit entries for one entity in ``[since, until)``, newest first."""
+        conn = await session.connection()
+        if conn.dialect.name != "sqlite":
+            # Postgres prunes partitions from the created_at bounds
+            query = (
+                select(AuditLog.__table__)
+                .where(
+                    AuditLog.entity_type == entity_type,
+                    AuditLog.entity_id == entity_id,
+                    AuditLog.created_at >= since,
+                    AuditLog.created_at < until,
+                )
+                .order_by(AuditLog.created_at.desc())
+                .limit(limit)
+            )
+            result = await conn.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+        existing = set(await self.list_partitions(conn))
+        wanted = [partition_name(m) for m in months_in_range(since, until)]
+        tables = [_partition_table(name) for name in wanted if name in existing]
+        if not tables:
+            return []
+
+        selects = [
+            select(table).where(
+                table.c.entity_type == entity_type,
+                table.c.entity_id == entity_id,
+                table.c.created_at >= since,
+                table.c.created_at < until,
+            )
+            for table in tables
+        ]
+        combined = union_all(*selects).subquery()
+        query = select(combined).order_by(combined.c.created_at.desc()).limit(limit)
+        result = await conn.execute(query)
+        return [dict(row) for row in result.mappings()]
+
+    async def _archive(self, conn: AsyncConnection, name: str, archive_dir: str) -> str:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.jsonl.gz")
+        result = await conn.stream(select(_partition_table(name)))
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            async for row in result.mappings():
+                f.write(json.dumps(dict(row), default=str) + "\n")
+        return path
+
+    async def apply_retention(
+        self,
+        conn: AsyncConnection,
+        retention_months: int = settings.AUDIT_RETENTION_MONTHS,
+        archive_dir: Optional[str] = settings.AUDIT_ARCHIVE_DIR,
+        now: Optional[datetime] = None,
+    ) -> List[str]:
+        """
+        Drop partitions entirely older than the retention window and make sure
+        the current and next month's partitions exist. On SQLite, rows left in
+        the parent table are first moved into partitions. Returns dropped names.
+        """
+        current = month_start(now or datetime.now(timezone.utc))
+        if await self._is_partitioned(conn):
+            if conn.dialect.name == "sqlite":
+                await self.migrate_parent_rows(conn)
+            await self.ensure_partition(conn, current)
+            await self.ensure_partition(conn, add_months(current, 1))
+        else:
+            return []
+
+        cutoff = add_months(current, -retention_months)
+        dropped = []
+        for name in await self.list_partitions(conn):
+            start = partition_start(name)
+            if start is None or add_months(start, 1) > cutoff:
+                continue
+            if archive_dir:
+                path = await self._archive(conn, name, archive_dir)
+                logger.info(f"Archived audit partition {name} to {path}")
+            if conn.dialect.name == "postgresql":
+                await conn.execute(text(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"'))
+            await conn.execute(text(f'DROP TABLE "{name}"'))
+            self._known.discard(name)
+            dropped.append(name)
+            AUDIT_PARTITIONS_DROPPED.inc()
+            logger.info(f"Dropped audit partition {name}")
+
+        AUDIT_PARTITIONS.set(len(self._known))
+        return dropped
+
+
+class AuditRetentionJob:
+    """Runs ``apply_retention`` periodically in the background."""
+
+    def __init__(
+        self,
+        store: AuditPartitionStore,
+        session_factory=AsyncSessionLocal,
+        interval: float = settings.AUDIT_RETENTION_INTERVAL_SECONDS,
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> List[str]:
+        async with self.session_factory() as session:
+            conn = await session.connection()
+            dropped = await self.store.apply_retention(conn)
+            await session.commit()
+        return dropped
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Audit retention job failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+audit_store = AuditPartitionStore()
+audit_retention_job = AuditRetentionJob(audit_store)
@@ -1,9 +1,10 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin
 from app.core import security
+from app.services.audit_service import audit_buffer, snapshot
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     result = await db.execute(select(User).where(User.email == email))
@@ -11,22 +12,31 @@ async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
 
 async def create_user(db: AsyncSession, user: UserCreate) -> User:
     hashed_password = security.get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        hashed_password=hashed_password,
-        full_name=user.full_name,
-        is_active=True,
-        is_superuser=False
+    result = await db.execute(
+        insert(User)
+        .values(
+            email=user.email,
+            hashed_password=hashed_password,
+            full_name=user.full_name,
+            is_active=True,
+            is_superuser=False
+        )
+        .returning(User)
     )
-    db.add(db_user)
+    db_user = result.scalar_one()
     await db.commit()
-    await db.refresh(db_user)
+    audit_buffer.record("CREATE", "User", db_user.id, user_id=db_user.id, new_value=snapshot(db_user))
     return db_user
 
-async def authenticate_user(db: AsyncSession, user_login: UserLogin) -> Optional[User]:
+async def authenticate_user(
+    db: AsyncSession, user_login: UserLogin, ip_address: Optional[str] = None
+) -> Optional[User]:
     user = await get_user_by_email(db, user_login.email)
-    if not user:
-        return None
-    if not security.verify_password(user_login.password, user.hashed_password):
+    if not user or not security.verify_password(user_login.password, user.hashed_password):
+        audit_buffer.record(
+            "LOGIN_FAILED", "User", user.id if user else None,
+            new_value={"email": user_login.email}, ip_address=ip_address,
+        )
         return None
+    audit_buffer.record("LOGIN", "User", user.id, user_id=user.id, ip_address=ip_address)
     return user
@@ -1,21 +1,43 @@
+import asyncio
 import os
+import sys
+from typing import List
 import joblib
 import pandas as pd
 import numpy as np
 from datetime import datetime
 from loguru import logger
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.config import settings
+from app.core.logging import hot_log
+from app.core.request_timing import timed
 from app.models.risk_assessment import RiskAssessment
 from app.models.application import Application
 from app.schemas.application import ApplicationCreate
 
 # Path to models (relative to backend execution)
 # Assuming backend is run from 'backend/' dir, and models are in '../ml-pipeline/models/saved_models/'
-MODEL_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../ml-pipeline/models/saved_models"))
+ML_PIPELINE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../ml-pipeline"))
+MODEL_DIR = os.path.join(ML_PIPELINE_DIR, "models", "saved_models")
+
+# Saved model name -> label reported as ``model_used``
+MODEL_LABELS = {'xgboost': 'XGBoost', 'lightgbm': 'LightGBM', 'catboost': 'CatBoost'}
+
+def load_feature_transformer(path):
+    """The ML pipeline's FeatureTransformer, so serving computes features with the training code"""
+    if ML_PIPELINE_DIR not in sys.path:
+        sys.path.append(ML_PIPELINE_DIR)
+    from pipelines.feature_engineering.transformer import FeatureTransformer
+    return FeatureTransformer.load(path)
 
 class MLScoringEngine:
     def __init__(self):
         self.model = None
+        self.model_label = None
+        # Feature names the model was fitted with (None if fitted on plain arrays)
+        self.model_features = None
         self.scaler = None
+        self.transformer = None
         self.features = None
         self.model_info = None
         self.load_model()
@@ -51,6 +73,13 @@ class MLScoringEngine:
             # Load model and scaler
             self.model = joblib.load(os.path.join(MODEL_DIR, f"{best_model_name}_{latest_ts}.pkl"))
             self.scaler = joblib.load(os.path.join(MODEL_DIR, f"scaler_{latest_ts}.pkl"))
+            self.model_label = f"{MODEL_LABELS.get(best_model_name, best_model_name)} (ML)"
+            names = getattr(self.model, 'feature_names_in_', None)
+            self.model_features = list(names) if names is not None else None
+            
+            # Feature transformer fitted with the model; older versions have none
+            transformer_path = os.path.join(MODEL_DIR, f"transformer_{latest_ts}.json")
+            self.transformer = load_feature_transformer(transformer_path) if os.path.exists(transformer_path) else None
             
             # Load feature names
             with open(os.path.join(MODEL_DIR, f"features_{latest_ts}.json"), 'r') as f:
@@ -63,14 +92,17 @@ class MLScoringEngine:
             logger.error(f"Failed to load ML model: {e}")
             self.model = None
 
-    def prepare_features(self, application_data: ApplicationCreate):
-        """Transform application data into model features"""
-        # Dictionary to hold raw features
-        data = {
+    def _transformer_record(self, application_data) -> dict:
+        """Raw fields for the feature transformer; missing ones take the training defaults"""
+        return {field: getattr(application_data, field, None) for field in self.transformer.input_fields}
+
+    def _raw_features(self, application_data) -> dict:
+        """Raw model inputs for one application (schema or ORM row), for models saved without a transformer"""
+        return {
             'age': 35, # Default if missing (should be in input)
             'annual_income': application_data.annual_income,
             'years_employed': 5, # Default
-            'monthly_debt': application_data.monthly_debt,
+            'monthly_debt': getattr(application_data, 'monthly_debt', None) or 0.0,
             'loan_amount': application_data.loan_amount,
             
             # Categorical placeholders (would come from enriched data)
@@ -84,75 +116,124 @@ class MLScoringEngine:
             'credit_history_length': 5,
             'dependents': 0
         }
+
+    def build_feature_frame(self, applications: List) -> pd.DataFrame:
+        """Transform many applications into one model-ready feature frame"""
+        df = pd.DataFrame([self._raw_features(a) for a in applications])
         
-        # Calculate derived features
-        data['debt_to_income_ratio'] = (data['monthly_debt'] * 12) / data['annual_income'] if data['annual_income'] > 0 else 0
-        data['credit_to_income_ratio'] = data['loan_amount'] / data['annual_income'] if data['annual_income'] > 0 else 0
-        data['monthly_income'] = data['annual_income'] / 12
-        data['debt_burden'] = (data['monthly_debt'] / data['monthly_income']) * 100 if data['monthly_income'] > 0 else 0
-        data['credit_quality_score'] = data['credit_history_length'] * 10
-        
-        # Feature DataFrame
-        df = pd.DataFrame([data])
+        # Calculate derived features (vectorized, 0 where income is missing)
+        income = df['annual_income'].where(df['annual_income'] > 0)
+        df['debt_to_income_ratio'] = ((df['monthly_debt'] * 12) / income).fillna(0)
+        df['credit_to_income_ratio'] = (df['loan_amount'] / income).fillna(0)
+        df['monthly_income'] = df['annual_income'] / 12
+        df['debt_burden'] = ((df['monthly_debt'] / (income / 12)) * 100).fillna(0)
+        df['credit_quality_score'] = df['credit_history_length'] * 10
         
         # Ensure all required features exist (fill 0 for missing ones like one-hot encoded)
         if self.features:
-            for feat in self.features:
-                if feat not in df.columns:
-                    df[feat] = 0
-            
-            # Reorder columns
-            df = df[self.features]
+            df = df.reindex(columns=self.features, fill_value=0)
             
         return df
 
-    def predict(self, application_data: ApplicationCreate):
-        """Predict credit score and risk"""
+    def model_inputs(self, applications: List) -> np.ndarray:
+        """Scaled model inputs, one row per application"""
+        if self.transformer is None:
+            return self.scaler.transform(self.build_feature_frame(applications))
+        if len(applications) == 1:
+            # Single-record fast path, no DataFrame
+            return self.transformer.transform_record(self._transformer_record(applications[0]))[None, :]
+        return self.transformer.transform(pd.DataFrame([self._transformer_record(a) for a in applications]))
+
+    def _named_inputs(self, X: np.ndarray):
+        """``X`` labelled with the model's feature names when it was fitted on a DataFrame"""
+        if self.model_features is None:
+            return X
+        return pd.DataFrame(X, columns=self.model_features)
+
+    def prepare_features(self, application_data: ApplicationCreate):
+        """Transform application data into model features"""
+        return self.model_inputs([application_data])
+
+    def _score_result(self, prob_default: float) -> dict:
+        # Convert probability to credit score (300-850)
+        # Default prob 0 -> 850, default prob 1 -> 300
+        credit_score = int(850 - (prob_default * 550))
+        
+        # Determine risk
+        if credit_score >= 700:
+            risk_level = "Low"
+        elif credit_score >= 600:
+            risk_level = "Medium"
+        else:
+            risk_level = "High"
+            
+        return {
+            "credit_score": credit_score,
+            "risk_level": risk_level,
+            "default_probability": float(prob_default),
+            "model_used": self.model_label
+        }
+
+    def _model_predict(self, applications: List) -> List[dict]:
+        with timed("features"):
+            X = self._named_inputs(self.model_inputs(applications))
+        with timed("model"):
+            probs = self.model.predict_proba(X)[:, 1]
+        return [self._score_result(p) for p in probs]
+
+    def predict_batch(self, applications: List) -> List[dict]:
+        """Score many applications with one vectorized model call"""
         if not self.model:
-            return self.mock_predict(application_data)
+            return [self.mock_predict(a) for a in applications]
         
         try:
-            # Prepare features
-            X = self.prepare_features(application_data)
-            
-            # Scale
-            X_scaled = self.scaler.transform(X)
-            
-            # Predict
-            prob_default = self.model.predict_proba(X_scaled)[0][1]
-            
-            # Convert probability to credit score (300-850)
-            # Default prob 0 -> 850, default prob 1 -> 300
-            credit_score = int(850 - (prob_default * 550))
-            
-            # Determine risk
-            if credit_score >= 700:
-                risk_level = "Low"
-            elif credit_score >= 600:
-                risk_level = "Medium"
-            else:
-                risk_level = "High"
-                
-            return {
-                "credit_score": credit_score,
-                "risk_level": risk_level,
-                "default_probability": float(prob_default),
-                "model_used": "XGBoost (ML)"
-            }
+            return self._model_predict(applications)
             
         except Exception as e:
             logger.error(f"Prediction error: {e}")
+            return [self.mock_predict(a) for a in applications]
+
+    def predict(self, application_data: ApplicationCreate):
+        """Predict credit score and risk"""
+        return self.predict_batch([application_data])[0]
+
+    async def predict_within_deadline(self, application_data: ApplicationCreate, deadline: float) -> dict:
+        """
+        Predict under the inference circuit breaker: the model call runs in a
+        worker thread and is abandoned after ``deadline`` seconds. Timeouts,
+        errors and an open breaker are answered by the rule-based fallback.
+        """
+        if not self.model:
             return self.mock_predict(application_data)
+        if not inference_breaker.allow():
+            return self.fallback_predict(application_data, "circuit open")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            result = await asyncio.wait_for(
+                asyncio.to_thread(self._model_predict, [application_data]), timeout=deadline
+            )
+        except asyncio.TimeoutError:
+            inference_breaker.record_failure(timeout=True)
+            hot_log.warning("Model inference exceeded {:.0f}ms deadline", deadline * 1000)
+            return self.fallback_predict(application_data, "timeout")
+        except Exception as e:
+            inference_breaker.record_failure()
+            logger.error("Prediction error: {}", e)
+            return self.fallback_predict(application_data, "error")
+        inference_breaker.record_success(loop.time() - started)
+        return result[0]
 
     def mock_predict(self, application_data: ApplicationCreate):
         """Fallback mock prediction"""
-        logger.info("Using mock scoring logic")
+        hot_log.info("Using mock scoring logic")
         score = 650  # Base
         
         # Simple logic
         if application_data.annual_income > 50000:
             score += 50
-        if application_data.monthly_debt < 1000:
+        if (getattr(application_data, 'monthly_debt', None) or 0.0) < 1000:
             score += 50
             
         return {
@@ -162,17 +243,37 @@ class MLScoringEngine:
             "model_used": "Rule-based (Mock)"
         }
 
+    def fallback_predict(self, application_data: ApplicationCreate, reason: str):
+        """Rule-based result served while the model is unavailable or too slow"""
+        result = self.mock_predict(application_data)
+        result["model_used"] = f"Rule-based (Fallback: {reason})"
+        return result
+
 # Global engine instance
 scoring_engine = MLScoringEngine()
 
+inference_breaker = CircuitBreaker(
+    "model_inference",
+    failure_rate=settings.SCORING_BREAKER_FAILURE_RATE,
+    slow_call_seconds=settings.SCORING_BREAKER_SLOW_CALL_MS / 1000,
+    slow_call_rate=settings.SCORING_BREAKER_SLOW_CALL_RATE,
+    window_seconds=settings.SCORING_BREAKER_WINDOW_SECONDS,
+    min_calls=settings.SCORING_BREAKER_MIN_CALLS,
+    open_seconds=settings.SCORING_BREAKER_OPEN_SECONDS,
+    half_open_probes=settings.SCORING_BREAKER_HALF_OPEN_PROBES,
+)
+
 async def calculate_credit_score(application_data: ApplicationCreate) -> dict:
     """
     Calculate credit score using ML model
     """
-    logger.info(f"Calculating credit score for {application_data.full_name}")
+    hot_log.info("Calculating credit score for {}", application_data.full_name)
     
-    # Use engine to predict
-    result = scoring_engine.predict(application_data)
+    # Use engine to predict, within the request's inference budget
+    with timed("scoring"):
+        result = await scoring_engine.predict_within_deadline(
+            application_data, deadline=settings.SCORING_DEADLINE_MS / 1000
+        )
     
     return {
         "credit_score": result['credit_score'],
@@ -0,0 +1,144 @@
+"""
+Live dashboard updates.
+
+Writers publish ``applications.changed`` on the event bus. A single
+``DashboardBroadcaster`` task coalesces those events, recomputes the dashboard
+aggregates at most ``DASHBOARD_STREAM_MAX_PUSHES_PER_SECOND`` times a second
+(and only while someone is listening), and publishes the fields that changed
+as ``dashboard.updated``. Every open SSE stream forwards those deltas, so any
+number of dashboards costs one aggregate computation per update.
+"""
+import asyncio
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database.session import AsyncSessionLocal
+from app.services import analytics_service
+from app.services.event_bus import APPLICATIONS_CHANGED, DASHBOARD_UPDATED, Subscription, event_bus
+
+DASHBOARD_RECOMPUTES = registry.counter("dashboard_recomputes_total", "Dashboard aggregate recomputations for live streams")
+DASHBOARD_PUSHES = registry.counter("dashboard_pushes_total", "Dashboard deltas published to live streams")
+DASHBOARD_STREAMS = registry.gauge("dashboard_streams_open", "Open dashboard SSE streams")
+
+
+def format_sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class DashboardBroadcaster:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_per_second: float = settings.DASHBOARD_STREAM_MAX_PUSHES_PER_SECOND,
+    ):
+        self.session_factory = session_factory
+        self.max_per_second = max_per_second
+        self.version = 0
+        self.stats: Optional[Dict[str, Any]] = None
+        self._changes: Optional[Subscription] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self) -> Optional[Dict[str, Any]]:
+        """Recompute the aggregates; returns the changed fields, if any."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            async with self.session_factory() as db:
+                stats = await analytics_service.get_dashboard_stats(db)
+            DASHBOARD_RECOMPUTES.inc()
+            previous = self.stats or {}
+            changes = {key: value for key, value in stats.items() if previous.get(key) != value}
+            if self.stats is not None and not changes:
+                return None
+            self.stats = stats
+            self.version += 1
+            return changes
+
+    async def snapshot(self) -> Tuple[int, Dict[str, Any]]:
+        if self.stats is None:
+            await self.refresh()
+        return self.version, self.stats
+
+    async def _run(self) -> None:
+        interval = 1.0 / self.max_per_second if self.max_per_second > 0 else 0.0
+        while True:
+            await self._changes.get()
+            # Everything published since the last push is covered by one recompute
+            while not self._changes.queue.empty():
+                self._changes.queue.get_nowait()
+            if event_bus.subscriber_count(DASHBOARD_UPDATED) == 0:
+                # Nobody is watching; recompute lazily for the next stream
+                self.stats = None
+                continue
+            try:
+                changes = await self.refresh()
+            except Exception as e:
+                logger.error(f"Dashboard refresh failed: {e}")
+                changes = None
+            if changes:
+                event_bus.publish(DASHBOARD_UPDATED, {"version": self.version, "changes": changes})
+                DASHBOARD_PUSHES.inc()
+            await asyncio.sleep(interval)
+
+    async def stream(
+        self,
+        subscription: Subscription,
+        is_disconnected: Callable[[], Awaitable[bool]],
+        heartbeat: float = settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS,
+    ) -> AsyncIterator[str]:
+        """SSE body: a ``snapshot`` event, then ``delta`` events as stats change."""
+        DASHBOARD_STREAMS.inc()
+        try:
+            version, stats = await self.snapshot()
+            yield format_sse("snapshot", {"version": version, "stats": stats}, version)
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if event["version"] <= version:
+                    continue
+                if subscription.overflowed or event["version"] != version + 1:
+                    # Missed deltas; resend the whole state
+                    subscription.overflowed = False
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    version, stats = await self.snapshot()
+                    yield format_sse("snapshot", {"version": version, "stats": stats}, version)
+                    continue
+                version = event["version"]
+                yield format_sse("delta", event, version)
+        finally:
+            event_bus.unsubscribe(subscription)
+            DASHBOARD_STREAMS.dec()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._changes = event_bus.subscribe(APPLICATIONS_CHANGED, max_queue=1024)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            event_bus.unsubscribe(self._changes)
+
+
+dashboard_broadcaster = DashboardBroadcaster()
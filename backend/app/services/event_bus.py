@@ -0,0 +1,60 @@
+"""
+In-process publish/subscribe.
+
+Services publish small events (e.g. ``applications.changed``) after their
+transaction commits; subscribers each get a bounded asyncio queue. Publishing
+never blocks: a subscriber that falls behind loses its oldest events and is
+flagged as ``overflowed`` so it can resynchronise. Events only reach
+subscribers in the same process.
+"""
+import asyncio
+from typing import Any, Dict, Set
+
+from app.core.metrics import registry
+
+EVENTS_PUBLISHED = registry.counter("event_bus_published_total", "Events published", ["topic"])
+EVENTS_DROPPED = registry.counter("event_bus_dropped_total", "Events dropped for slow subscribers", ["topic"])
+
+APPLICATIONS_CHANGED = "applications.changed"
+DASHBOARD_UPDATED = "dashboard.updated"
+
+
+class Subscription:
+    def __init__(self, topic: str, max_queue: int):
+        self.topic = topic
+        self.queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def put(self, event: Any) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.overflowed = True
+            EVENTS_DROPPED.inc(topic=self.topic)
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Any:
+        return await self.queue.get()
+
+
+class EventBus:
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, topic: str, max_queue: int = 16) -> Subscription:
+        subscription = Subscription(topic, max_queue)
+        self._subscribers.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.get(subscription.topic, set()).discard(subscription)
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._subscribers.get(topic, ()))
+
+    def publish(self, topic: str, event: Any = None) -> None:
+        EVENTS_PUBLISHED.inc(topic=topic)
+        for subscription in list(self._subscribers.get(topic, ())):
+            subscription.put(event)
+
+
+event_bus = EventBus()
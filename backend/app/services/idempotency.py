@@ -0,0 +1,234 @@
+"""
+Idempotency keys for retried POSTs.
+
+A client that sends ``Idempotency-Key`` gets the response of the first request
+made with that key (per user and endpoint) for ``IDEMPOTENCY_TTL_SECONDS``,
+instead of a second application or scoring run. Completed responses live in a
+bounded in-memory LRU and, with ``IDEMPOTENCY_DB_ENABLED``, in the
+``idempotency_keys`` table so they survive restarts and are shared between
+processes. Duplicates that arrive while the first request is still running
+wait for it and receive its result.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from fastapi.responses import Response
+from loguru import logger
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database.session import AsyncSessionLocal
+from app.models.idempotency_key import IdempotencyKey
+
+IDEMPOTENT_REQUESTS = registry.counter(
+    "idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],
+)
+IDEMPOTENCY_CACHE_SIZE = registry.gauge("idempotency_cache_entries", "Responses held in the in-memory idempotency LRU")
+
+# How often expired rows are deleted from idempotency_keys
+_PURGE_INTERVAL_SECONDS = 3600.0
+
+CacheKey = Tuple[int, str, str]
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: bytes
+    request_hash: str
+
+
+class IdempotencyKeyReused(Exception):
+    """The key was already used with a different request payload."""
+
+
+def request_fingerprint(payload: BaseModel) -> str:
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def to_response(stored: StoredResponse, replayed: bool) -> Response:
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true" if replayed else "false"},
+    )
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_entries: int = settings.IDEMPOTENCY_CACHE_SIZE,
+        ttl: float = settings.IDEMPOTENCY_TTL_SECONDS,
+        persist: bool = settings.IDEMPOTENCY_DB_ENABLED,
+    ):
+        self.session_factory = session_factory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist = persist
+        self._entries: "OrderedDict[CacheKey, Tuple[float, StoredResponse]]" = OrderedDict()
+        self._inflight: Dict[CacheKey, Tuple[str, asyncio.Future]] = {}
+        self._next_purge = 0.0
+
+    def _remember(self, cache_key: CacheKey, stored: StoredResponse, expires_at: float) -> None:
+        self._entries[cache_key] = (expires_at, stored)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        IDEMPOTENCY_CACHE_SIZE.set(len(self._entries))
+
+    def _cached(self, cache_key: CacheKey) -> Optional[StoredResponse]:
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+        expires_at, stored = entry
+        if expires_at <= time.time():
+            del self._entries[cache_key]
+            IDEMPOTENCY_CACHE_SIZE.set(len(self._entries))
+            return None
+        self._entries.move_to_end(cache_key)
+        return stored
+
+    async def _load(self, cache_key: CacheKey) -> Optional[StoredResponse]:
+        user_id, scope, key = cache_key
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.expires_at > datetime.now(timezone.utc),
+                )
+            )
+            row = result.scalars().first()
+        if row is None:
+            return None
+        stored = StoredResponse(row.status_code, row.response_body.encode(), row.request_hash)
+        expires_at = row.expires_at
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        self._remember(cache_key, stored, expires_at.timestamp())
+        return stored
+
+    async def _save(self, cache_key: CacheKey, stored: StoredResponse) -> None:
+        user_id, scope, key = cache_key
+        now = datetime.now(timezone.utc)
+        expired = IdempotencyKey.expires_at <= now
+        async with self.session_factory() as db:
+            if time.monotonic() >= self._next_purge:
+                self._next_purge = time.monotonic() + _PURGE_INTERVAL_SECONDS
+                await db.execute(delete(IdempotencyKey).where(expired))
+            else:
+                # An expired record for the same key would violate the unique constraint
+                await db.execute(delete(IdempotencyKey).where(and_(
+                    IdempotencyKey.user_id == user_id,
+                    IdempotencyKey.scope == scope,
+                    IdempotencyKey.key == key,
+                    expired,
+                )))
+            await db.execute(insert(IdempotencyKey).values(
+                user_id=user_id,
+                scope=scope,
+                key=key,
+                request_hash=stored.request_hash,
+                status_code=stored.status_code,
+                response_body=stored.body.decode(),
+                expires_at=now + timedelta(seconds=self.ttl),
+            ))
+            try:
+                await db.commit()
+            except IntegrityError:
+                # Another process completed the same key first; its record stands
+                await db.rollback()
+
+    async def _lookup(self, cache_key: CacheKey) -> Optional[StoredResponse]:
+        stored = self._cached(cache_key)
+        if stored is None and self.persist:
+            try:
+                stored = await self._load(cache_key)
+            except Exception as e:
+                logger.warning(f"Idempotency lookup failed, executing request: {e}")
+        return stored
+
+    @staticmethod
+    def _check(stored_hash: str, request_hash: str) -> None:
+        if stored_hash != request_hash:
+            IDEMPOTENT_REQUESTS.inc(outcome="mismatch")
+            raise IdempotencyKeyReused()
+
+    async def execute(
+        self,
+        user_id: int,
+        scope: str,
+        key: str,
+        request_hash: str,
+        handler: Callable[[], Awaitable[Tuple[int, bytes]]],
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Run ``handler`` once per (user, scope, key). Returns the response and
+        whether it was replayed. Raises ``IdempotencyKeyReused`` if the key
+        was used with a different payload. Exceptions from ``handler`` are
+        raised to every coalesced caller and nothing is stored, so the client
+        can retry with the same key.
+        """
+        cache_key = (user_id, scope, key)
+        while True:
+            stored = await self._lookup(cache_key)
+            if stored is not None:
+                self._check(stored.request_hash, request_hash)
+                IDEMPOTENT_REQUESTS.inc(outcome="replayed")
+                return stored, True
+
+            inflight = self._inflight.get(cache_key)
+            if inflight is None:
+                break
+            inflight_hash, future = inflight
+            self._check(inflight_hash, request_hash)
+            try:
+                stored = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The original request was abandoned; take over from it
+                    continue
+                raise
+            IDEMPOTENT_REQUESTS.inc(outcome="coalesced")
+            return stored, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[cache_key] = (request_hash, future)
+        try:
+            status_code, body = await handler()
+            stored = StoredResponse(status_code, body, request_hash)
+            if 200 <= status_code < 300:
+                self._remember(cache_key, stored, time.time() + self.ttl)
+                if self.persist:
+                    try:
+                        await self._save(cache_key, stored)
+                    except Exception as e:
+                        logger.warning(f"Could not persist idempotency key for {scope}: {e}")
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved; there may be no waiters
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(cache_key, None)
+
+        future.set_result(stored)
+        IDEMPOTENT_REQUESTS.inc(outcome="executed")
+        return stored, False
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,281 @@
+"""
+Persisted scoring job queue.
+
+Creating an application enqueues a ``ScoringJob`` in the same transaction.
+An in-process pool of async workers claims queued jobs in batches, scores
+each batch with one vectorized model call and writes the credit score and
+RiskAssessment rows back. Failed batches are retried with exponential
+backoff until ``max_attempts`` is reached.
+"""
+import asyncio
+import os
+import random
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from loguru import logger
+from sqlalchemy import Row, and_, bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import registry
+from app.database.session import AsyncSessionLocal
+from app.models.application import Application
+from app.models.risk_assessment import RiskAssessment
+from app.models.scoring_job import ScoringJob, ScoringJobStatus
+from app.services.audit_service import audit_buffer
+from app.services.credit_scoring_service import scoring_engine
+from app.services.event_bus import APPLICATIONS_CHANGED, event_bus
+
+JOBS_ENQUEUED = registry.counter("scoring_jobs_enqueued_total", "Scoring jobs enqueued")
+JOBS_COMPLETED = registry.counter("scoring_jobs_completed_total", "Scoring jobs finished", ["status"])
+JOBS_RETRIED = registry.counter("scoring_jobs_retried_total", "Scoring jobs rescheduled after a failure")
+QUEUE_DEPTH = registry.gauge("scoring_queue_depth", "Scoring jobs waiting to be claimed (approximate)")
+BATCH_ROWS = registry.histogram(
+    "scoring_batch_rows",
+    "Jobs scored per vectorized model call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+)
+BATCH_SECONDS = registry.histogram("scoring_batch_seconds", "Time to score and persist one batch")
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at SCORING_RETRY_MAX_SECONDS."""
+    ceiling = min(settings.SCORING_RETRY_MAX_SECONDS, settings.SCORING_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+async def enqueue_scoring_job(db: AsyncSession, application_id: int) -> None:
+    """Add a scoring job to the caller's transaction; the caller commits."""
+    await db.execute(
+        insert(ScoringJob).values(
+            application_id=application_id,
+            status=ScoringJobStatus.QUEUED.value,
+            max_attempts=settings.SCORING_MAX_ATTEMPTS,
+        )
+    )
+    JOBS_ENQUEUED.inc()
+    QUEUE_DEPTH.inc()
+
+
+async def get_latest_job(db: AsyncSession, application_id: int) -> Optional[ScoringJob]:
+    result = await db.execute(
+        select(ScoringJob)
+        .where(ScoringJob.application_id == application_id)
+        .order_by(ScoringJob.id.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def count_queued(db: AsyncSession) -> int:
+    result = await db.execute(
+        select(func.count(ScoringJob.id)).where(ScoringJob.status == ScoringJobStatus.QUEUED.value)
+    )
+    return result.scalar() or 0
+
+
+async def claim_jobs(db: AsyncSession, worker_id: str, limit: int) -> List[Row]:
+    """
+    Atomically move up to ``limit`` due jobs to RUNNING for this worker.
+
+    Uses FOR UPDATE SKIP LOCKED on PostgreSQL so concurrent workers never
+    claim the same job; SQLite serializes writers, which gives the same result.
+    Jobs stuck in RUNNING past the lock timeout are reclaimed.
+    """
+    now = datetime.now(timezone.utc)
+    stale = now - timedelta(seconds=settings.SCORING_LOCK_TIMEOUT_SECONDS)
+    due = (
+        select(ScoringJob.id)
+        .where(or_(
+            and_(ScoringJob.status == ScoringJobStatus.QUEUED.value, ScoringJob.run_after <= now),
+            and_(ScoringJob.status == ScoringJobStatus.RUNNING.value, ScoringJob.locked_at < stale),
+        ))
+        .order_by(ScoringJob.run_after, ScoringJob.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(ScoringJob)
+        .where(ScoringJob.id.in_(due.scalar_subquery()))
+        .values(
+            status=ScoringJobStatus.RUNNING.value,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=ScoringJob.attempts + 1,
+        )
+        # Plain rows rather than ORM objects, so a rollback can't expire them
+        .returning(ScoringJob.id, ScoringJob.application_id, ScoringJob.attempts, ScoringJob.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    jobs = list(result.all())
+    await db.commit()
+    if jobs:
+        QUEUE_DEPTH.set(max(QUEUE_DEPTH.value() - len(jobs), 0))
+    return jobs
+
+
+async def _fail_jobs(db: AsyncSession, jobs: List[Row], error: str) -> None:
+    now = datetime.now(timezone.utc)
+    for job in jobs:
+        if job.attempts >= job.max_attempts:
+            values = {"status": ScoringJobStatus.FAILED.value}
+            JOBS_COMPLETED.inc(status=ScoringJobStatus.FAILED.value)
+        else:
+            values = {
+                "status": ScoringJobStatus.QUEUED.value,
+                "run_after": now + timedelta(seconds=retry_delay(job.attempts)),
+            }
+            JOBS_RETRIED.inc()
+            QUEUE_DEPTH.inc()
+        await db.execute(
+            update(ScoringJob)
+            .where(ScoringJob.id == job.id)
+            .values(locked_by=None, locked_at=None, last_error=error[:2000], **values)
+        )
+    await db.commit()
+
+
+async def process_jobs(db: AsyncSession, jobs: List[Row]) -> None:
+    """Score a claimed batch and persist results in one transaction."""
+    application_ids = [job.application_id for job in jobs]
+    result = await db.execute(select(Application).where(Application.id.in_(application_ids)))
+    applications: Dict[int, Application] = {a.id: a for a in result.scalars().all()}
+
+    missing = [job for job in jobs if job.application_id not in applications]
+    if missing:
+        await db.execute(
+            update(ScoringJob)
+            .where(ScoringJob.id.in_([job.id for job in missing]))
+            .values(status=ScoringJobStatus.FAILED.value, last_error="Application not found", locked_by=None)
+        )
+        JOBS_COMPLETED.inc(len(missing), status=ScoringJobStatus.FAILED.value)
+    jobs = [job for job in jobs if job.application_id in applications]
+    if not jobs:
+        await db.commit()
+        return
+
+    batch = [applications[job.application_id] for job in jobs]
+    # Model inference is CPU bound; keep it off the event loop
+    results = await asyncio.to_thread(scoring_engine.predict_batch, batch)
+    scored = list(zip(batch, results))
+
+    applications_table = Application.__table__
+    await db.execute(
+        update(applications_table)
+        .where(applications_table.c.id == bindparam("app_id"))
+        .values(credit_score=bindparam("score"), version_id=applications_table.c.version_id + 1),
+        [{"app_id": a.id, "score": r["credit_score"]} for a, r in scored],
+    )
+    # One assessment per application; re-scoring replaces it
+    await db.execute(delete(RiskAssessment).where(RiskAssessment.application_id.in_([a.id for a in batch])))
+    await db.execute(insert(RiskAssessment), [
+        {
+            "application_id": a.id,
+            "default_risk_score": r["default_probability"],
+            "fraud_risk_score": 0.0,
+            "risk_factors": ["High Debt"] if r["risk_level"] == "High" else [],
+            "model_version": r["model_used"],
+        }
+        for a, r in scored
+    ])
+    await db.execute(
+        update(ScoringJob)
+        .where(ScoringJob.id.in_([job.id for job in jobs]))
+        .values(status=ScoringJobStatus.SUCCEEDED.value, locked_by=None, last_error=None)
+    )
+    await db.commit()
+    event_bus.publish(APPLICATIONS_CHANGED, {"action": "score", "ids": [a.id for a in batch]})
+
+    JOBS_COMPLETED.inc(len(jobs), status=ScoringJobStatus.SUCCEEDED.value)
+    for a, r in scored:
+        audit_buffer.record(
+            "SCORE", "Application", a.id,
+            new_value={"credit_score": r["credit_score"], "risk_level": r["risk_level"], "model_version": r["model_used"]},
+        )
+
+
+class ScoringWorkerPool:
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        workers: int = settings.SCORING_WORKERS,
+        batch_size: int = settings.SCORING_BATCH_SIZE,
+        poll_interval: float = settings.SCORING_POLL_INTERVAL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def notify(self) -> None:
+        """Wake idle workers after new jobs were committed."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run_once(self, worker_id: str) -> int:
+        """Claim and process one batch. Returns the number of jobs claimed."""
+        async with self.session_factory() as db:
+            jobs = await claim_jobs(db, worker_id, self.batch_size)
+            if not jobs:
+                return 0
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                await process_jobs(db, jobs)
+            except Exception as e:
+                logger.error(f"Scoring batch of {len(jobs)} failed: {e}")
+                await db.rollback()
+                await _fail_jobs(db, jobs, str(e))
+            BATCH_ROWS.observe(len(jobs))
+            BATCH_SECONDS.observe(loop.time() - started)
+            return len(jobs)
+
+    async def _worker(self, index: int) -> None:
+        worker_id = f"{self._prefix}:{index}"
+        while True:
+            try:
+                claimed = await self.run_once(worker_id)
+            except Exception as e:
+                logger.error(f"Scoring worker {worker_id} error: {e}")
+                claimed = 0
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _sync_depth(self) -> None:
+        try:
+            async with self.session_factory() as db:
+                QUEUE_DEPTH.set(await count_queued(db))
+        except Exception as e:
+            logger.warning(f"Could not read scoring queue depth: {e}")
+
+    def start(self) -> None:
+        if self._tasks or not settings.SCORING_QUEUE_ENABLED:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks.append(asyncio.create_task(self._sync_depth()))
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(i)))
+        logger.info(f"Started {self.workers} scoring workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+
+
+scoring_workers = ScoringWorkerPool()
@@ -0,0 +1,68 @@
+"""
+Serialization benchmark: cost per 1k application rows.
+
+Compares the default FastAPI response path (response_model validation,
+jsonable_encoder, json.dumps) with FastJSONResponse + dump_rows, which
+validates from ORM attributes and dumps to bytes in one pydantic-core pass.
+
+    python benchmarks/bench_serialization.py
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.responses import FastJSONResponse, dump_rows
+from app.models import Application as ApplicationModel
+from app.schemas.application import Application
+
+APPLICATION_LIST = TypeAdapter(List[Application])
+
+
+def make_rows(n):
+    now = datetime.now(timezone.utc)
+    return [
+        ApplicationModel(
+            id=i, user_id=1, full_name=f"Applicant {i}", email=f"applicant{i}@example.com",
+            phone_number="555-0100", address=f"{i} Main Street", annual_income=50000.0 + i,
+            employment_status="Employed", loan_amount=10000.0 + i, loan_purpose="Car",
+            credit_score=700, status="pending", version_id=1, created_at=now, updated_at=now,
+        )
+        for i in range(n)
+    ]
+
+
+def stdlib_path(rows):
+    # What FastAPI does for response_model=List[Application] with JSONResponse
+    validated = [Application.model_validate(row) for row in rows]
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def fast_path(rows):
+    return FastJSONResponse(dump_rows(APPLICATION_LIST, rows)).body
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(stdlib_path(rows)) == json.loads(fast_path(rows))
+
+    results = {}
+    for label, fn in (("stdlib (response_model)", stdlib_path), ("FastJSONResponse", fast_path)):
+        best = min(timeit.repeat(lambda: fn(rows), number=1, repeat=args.repeat))
+        results[label] = best * 1000 * 1000 / args.rows
+        print(f"  {label:<26} {results[label]:8.2f} ms per 1k rows")
+    print(f"  speedup: {results['stdlib (response_model)'] / results['FastJSONResponse']:.1f}x")
@@ -122,18 +122,21 @@ const Dashboard = () => {
   });
 
   useEffect(() => {
+    const applyStats = (data) => {
+      setStats({
+        totalApplications: data.total_applications,
+        approvalRate: data.approval_rate,
+        avgCreditScore: data.average_credit_score,
+        pendingReviews: data.pending_reviews,
+        riskDistribution: data.risk_distribution || [],
+        applicationTrends: data.application_trends || [],
+      });
+    };
+
     const fetchStats = async () => {
       setLoading(true);
       try {
-        const data = await analyticsService.getDashboardStats();
-        setStats({
-          totalApplications: data.total_applications,
-          approvalRate: data.approval_rate,
-          avgCreditScore: data.average_credit_score,
-          pendingReviews: data.pending_reviews,
-          riskDistribution: data.risk_distribution || [],
-          applicationTrends: data.application_trends || [],
-        });
+        applyStats(await analyticsService.getDashboardStats());
       } catch (error) {
         console.error('Failed to fetch dashboard stats:', error);
       } finally {
@@ -142,6 +145,9 @@ const Dashboard = () => {
     };
 
     fetchStats();
+    // Server pushes changes as they happen instead of the page polling
+    const unsubscribe = analyticsService.subscribeDashboard(applyStats);
+    return unsubscribe;
   }, []);
 
   if (loading) {
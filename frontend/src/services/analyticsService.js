@@ -1,10 +1,59 @@
 import api from './api';
 
+const API_URL = import.meta.env.VITE_API_URL ? `${import.meta.env.VITE_API_URL}/api/v1` : 'http://localhost:8001/api/v1';
+
 export const analyticsService = {
   getDashboardStats: async () => {
     const response = await api.get('/analytics/dashboard');
     return response.data;
   },
+
+  // Live dashboard stats over Server-Sent Events. Calls onStats with the full
+  // stats object on every snapshot or delta; returns an unsubscribe function.
+  // EventSource cannot send the Authorization header, so each connection uses
+  // a short-lived stream ticket in the URL instead of the access token.
+  subscribeDashboard: (onStats) => {
+    let source = null;
+    let closed = false;
+    let retryTimer = null;
+    let stats = {};
+
+    const connect = async () => {
+      let ticket;
+      try {
+        const response = await api.post('/analytics/dashboard/stream-ticket');
+        ticket = response.data.ticket;
+      } catch (error) {
+        if (!closed) retryTimer = setTimeout(connect, 5000);
+        return;
+      }
+      if (closed) return;
+
+      source = new EventSource(`${API_URL}/analytics/dashboard/stream?ticket=${encodeURIComponent(ticket)}`);
+      source.addEventListener('snapshot', (event) => {
+        stats = JSON.parse(event.data).stats;
+        onStats(stats);
+      });
+      source.addEventListener('delta', (event) => {
+        stats = { ...stats, ...JSON.parse(event.data).changes };
+        onStats(stats);
+      });
+      source.addEventListener('error', () => {
+        // The browser retries with the same URL; once the ticket has expired
+        // that fails for good, so reconnect with a fresh one
+        if (!closed && source.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, 1000);
+        }
+      });
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(retryTimer);
+      if (source) source.close();
+    };
+  },
 };
 
 export default analyticsService;
@@ -0,0 +1,52 @@
+"""
+Cross-validation wall-clock as the number of folds grows.
+
+Cleans a synthetic raw file, prepares the training split once and times
+CreditScoringTrainer.cross_validate for each fold count, with one core per
+(candidate, fold) fit up to --cores. While the cores last, the time should
+stay roughly flat in k.
+
+    python benchmarks/bench_cv.py --rows 200000 --folds 2 3 5 10
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic_data import write_raw_csv
+from pipelines.feature_engineering.data_cleaner import DataCleaner
+from pipelines.training.train_model import CreditScoringTrainer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--folds", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = write_raw_csv(os.path.join(tmp, "raw.csv"), args.rows)
+        output = os.path.join(tmp, "out", "clean.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DataCleaner(raw_path, output).run_pipeline()
+            trainer = CreditScoringTrainer(output.replace('.csv', '_ml_ready.csv'), os.path.join(tmp, "models"))
+            X, y = trainer.prepare_features(trainer.load_data())
+            X_train, X_test, y_train, y_test = trainer.split_and_scale(X, y)
+        print(f"  {len(X_train)} training rows, {X.shape[1]} features, up to {args.cores} cores")
+
+        for folds in args.folds:
+            trainer.cv_folds = folds
+            # One core per (candidate, fold) fit, as far as the budget allows
+            trainer.cores = min(args.cores, folds * len(trainer.candidates))
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                cv_metrics = trainer.cross_validate(X_train, y_train)
+            elapsed = time.perf_counter() - started
+            auc = {name: round(cv['mean']['roc_auc'], 4) for name, cv in cv_metrics.items()}
+            print(f"  k={folds:<3} {trainer.cores:>3} cores  {elapsed:7.2f} s  mean ROC-AUC {auc}")
@@ -0,0 +1,80 @@
+"""
+Processed-data formats: bytes on disk, write time and trainer load time.
+
+Cleans a synthetic raw file once, then saves the processed dataset the way
+DataCleaner does for each format (CSV: full file plus the ML-ready copy;
+Parquet/Feather: one file with compact dtypes) and loads it the way
+CreditScoringTrainer does (only the ML columns).
+
+    python benchmarks/bench_formats.py --rows 500000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic_data import write_raw_csv
+from pipelines.feature_engineering.data_cleaner import ML_FEATURES, DataCleaner
+from pipelines.feature_engineering.storage import FORMATS, read_table, table_columns
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = write_raw_csv(os.path.join(tmp, "raw.csv"), args.rows)
+        cleaner = DataCleaner(raw_path, os.path.join(tmp, "clean.csv"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            cleaner.load_raw_data()
+            cleaner.clean_data()
+            cleaner.engineer_features()
+            cleaner.encode_categorical()
+            cleaner.create_risk_labels()
+        df = cleaner.df
+        print(f"  {len(df)} processed rows x {len(df.columns)} columns")
+        print(f"  {'format':<8} {'on disk':>10} {'write':>9} {'load ML cols':>13} {'in memory':>10}")
+
+        results = {}
+        for fmt in FORMATS:
+            out = DataCleaner(raw_path, os.path.join(tmp, fmt, "clean.csv"), output_format=fmt)
+            out.df = df
+            os.makedirs(os.path.dirname(out.processed_data_path), exist_ok=True)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    write_time, _ = best_of(out.save_processed_data, args.repeat)
+            except ImportError as e:
+                print(f"  {fmt:<8} skipped: {e}")
+                continue
+            paths = [path for path, _ in out.output_tables()]
+            size = sum(os.path.getsize(path) for path in paths)
+            # The trainer reads the ML-ready copy for CSV and the full table otherwise
+            load_path = paths[-1]
+            columns = [c for c in table_columns(load_path) if c in ML_FEATURES or c.startswith('loan_purpose_')]
+            load_time, loaded = best_of(lambda: read_table(load_path, columns), args.repeat)
+            memory = loaded.memory_usage(deep=True).sum()
+            results[fmt] = (size, write_time, load_time)
+            print(f"  {fmt:<8} {size / 1e6:8.1f}MB {write_time:8.2f}s {load_time:12.3f}s {memory / 1e6:8.1f}MB")
+
+        if 'csv' in results:
+            csv_size, csv_write, csv_load = results['csv']
+            for fmt, (size, write_time, load_time) in results.items():
+                if fmt != 'csv':
+                    print(f"  {fmt} vs csv: {csv_size / size:.1f}x smaller, "
+                          f"{csv_write / write_time:.1f}x faster write, {csv_load / load_time:.1f}x faster load")
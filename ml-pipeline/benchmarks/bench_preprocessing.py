@@ -0,0 +1,60 @@
+"""
+Preprocessing throughput: DataCleaner in memory, streaming and in parallel.
+
+Runs the cleaning pipeline over a synthetic raw file and reports rows per
+second for the in-memory mode, the single-process streaming mode and the
+parallel mode at 1, 2, 4, ... worker processes (up to the machine's cores).
+
+    python benchmarks/bench_preprocessing.py --rows 1000000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic_data import write_raw_csv
+from pipelines.feature_engineering.data_cleaner import DataCleaner
+
+
+def timed_run(cleaner):
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaner.run_pipeline()
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--partition-mb", type=int, default=8)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = write_raw_csv(os.path.join(tmp, "raw.csv"), args.rows)
+        output = os.path.join(tmp, "out", "clean.csv")
+        print(f"  {args.rows} rows, {os.path.getsize(raw_path) / 1e6:.0f} MB raw CSV, {os.cpu_count()} cores")
+
+        runs = [
+            ("in-memory", DataCleaner(raw_path, output)),
+            ("streaming", DataCleaner(raw_path, output, chunksize=args.chunksize)),
+        ]
+        workers = 1
+        while workers <= args.max_workers:
+            runs.append((
+                f"parallel x{workers}",
+                DataCleaner(raw_path, output, workers=workers, partition_bytes=args.partition_mb * 1024 * 1024),
+            ))
+            workers *= 2
+
+        baseline = None
+        for label, cleaner in runs:
+            elapsed = timed_run(cleaner)
+            baseline = baseline or elapsed
+            print(f"  {label:<14} {elapsed:7.2f} s  {args.rows / elapsed:>10,.0f} rows/s  {baseline / elapsed:5.2f}x")
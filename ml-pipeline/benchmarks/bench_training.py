@@ -0,0 +1,50 @@
+"""
+Training wall-clock: candidate models one after another vs concurrently.
+
+Cleans a synthetic raw file, prepares the train/test split once and times
+CreditScoringTrainer.train_candidates sequentially (every model using all
+cores) and concurrently (the cores split between the models).
+
+    python benchmarks/bench_training.py --rows 500000
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.synthetic_data import write_raw_csv
+from pipelines.feature_engineering.data_cleaner import DataCleaner
+from pipelines.training.train_model import CreditScoringTrainer
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--cores", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = write_raw_csv(os.path.join(tmp, "raw.csv"), args.rows)
+        output = os.path.join(tmp, "out", "clean.csv")
+        with contextlib.redirect_stdout(io.StringIO()):
+            DataCleaner(raw_path, output).run_pipeline()
+            trainer = CreditScoringTrainer(output.replace('.csv', '_ml_ready.csv'), os.path.join(tmp, "models"))
+            X, y = trainer.prepare_features(trainer.load_data())
+            X_train, X_test, y_train, y_test = trainer.split_and_scale(X, y)
+        print(f"  {len(X_train)} training rows, {X.shape[1]} features, {args.cores} cores")
+
+        baseline = None
+        for label, concurrent in [("sequential", False), ("concurrent", True)]:
+            trainer.concurrent = concurrent
+            trainer.cores = args.cores
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                trainer.train_candidates(X_train, y_train, X_test, y_test)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"  {label:<11} {elapsed:7.2f} s  {baseline / elapsed:5.2f}x")
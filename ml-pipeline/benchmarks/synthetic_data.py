@@ -0,0 +1,40 @@
+"""
+Synthetic raw credit applications for benchmarks, in the raw CSV schema
+(with a few missing values and duplicate rows, like the real extracts).
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_raw_data(n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'applicant_id': [f'APP{i:08d}' for i in range(n_rows)],
+        'full_name': rng.choice(['John Smith', 'Maria Garcia', 'Wei Chen', 'Aisha Khan', 'Liam Brown'], n_rows),
+        'age': rng.integers(18, 75, n_rows),
+        'gender': rng.choice(['M', 'F'], n_rows),
+        'annual_income': rng.integers(15000, 200000, n_rows),
+        'employment_status': rng.choice(['Employed', 'Self-Employed', 'Unemployed'], n_rows, p=[0.7, 0.2, 0.1]),
+        'years_employed': rng.integers(0, 35, n_rows),
+        'monthly_debt': rng.integers(0, 5000, n_rows).astype(float),
+        'loan_amount': rng.integers(1000, 100000, n_rows),
+        'loan_purpose': rng.choice(['Home', 'Car', 'Business', 'Education', 'Personal'], n_rows),
+        'existing_credits': rng.integers(0, 6, n_rows),
+        'credit_history_length': rng.integers(0, 30, n_rows),
+        'payment_history': rng.choice(['Excellent', 'Good', 'Fair', 'Poor'], n_rows),
+        'marital_status': rng.choice(['Married', 'Single', 'Divorced'], n_rows),
+        'dependents': rng.integers(0, 5, n_rows),
+        'education': rng.choice(['PhD', 'Master', 'Bachelor', 'High School'], n_rows),
+        'home_ownership': rng.choice(['Own', 'Rent', 'Mortgage'], n_rows),
+    })
+    risk = (df['monthly_debt'] * 12 / df['annual_income']) + (df['payment_history'] == 'Poor') * 0.3
+    df['default'] = (rng.random(n_rows) < 0.1 + risk.clip(0, 0.6)).astype(int)
+    for col in ['monthly_debt', 'education']:
+        df.loc[rng.random(n_rows) < 0.01, col] = np.nan
+    duplicates = df.sample(frac=0.01, random_state=seed)
+    return pd.concat([df, duplicates], ignore_index=True)
+
+
+def write_raw_csv(path, n_rows, seed=42):
+    make_raw_data(n_rows, seed).to_csv(path, index=False)
+    return path
@@ -1,19 +1,205 @@
 ﻿"""
 Data Cleaning and Preprocessing Pipeline
 Cleans raw credit data and prepares it for ML training
+
+By default the whole raw file is loaded into memory. With ``chunksize`` set,
+``run_pipeline`` streams the file instead: a first pass over the raw data
+collects the global statistics (duplicate rows, missing-value fill values,
+the set of ``loan_purpose`` categories) and a second pass cleans, engineers,
+encodes, labels and appends each chunk to the outputs. With ``workers`` set,
+the same passes run over byte-range partitions of the raw file in a process
+pool and each partition is written as its own output part. All modes produce
+the same processed rows.
+
+``output_format`` picks CSV (default), Parquet or Feather for the processed
+data; see ``storage``. Every mode profiles the raw data in its first pass
+(``profiler.DataProfile``), reuses the profile for the quality check and the
+fill values, and saves it next to a profile of the processed data.
 """
 
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
+import argparse
+import copy
+import glob
+import io
 import os
+import sys
+
+# Add the ml-pipeline directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pipelines.feature_engineering import profiler, storage, transformer
+from pipelines.feature_engineering.profiler import DataProfile, row_hashes
+from pipelines.feature_engineering.storage import FORMATS, TableWriter, read_table, with_format, write_table
+from pipelines.feature_engineering.transformer import ENCODINGS, derive_features
+from pipelines.stage_cache import DEFAULT_CACHE_DIR, StageCache, source_hash
+
+# Features kept in the ML-ready dataset (plus the loan_purpose_* dummies)
+ML_FEATURES = [
+    'age', 'annual_income', 'years_employed', 'monthly_debt', 'loan_amount',
+    'existing_credits', 'credit_history_length', 'dependents',
+    'debt_to_income_ratio', 'credit_to_income_ratio', 'debt_burden',
+    'credit_quality_score', 'gender_encoded', 'employment_status_encoded',
+    'payment_history_encoded', 'marital_status_encoded', 'education_encoded',
+    'home_ownership_encoded', 'default'
+]
+
+# Row filters applied after imputation: (column, rule, message)
+VALIDATION_RULES = [
+    ('age', lambda s: (s >= 18) & (s <= 100), "Validated age range (18-100)"),
+    ('annual_income', lambda s: s > 0, "Validated annual income (> 0)"),
+    ('loan_amount', lambda s: s > 0, "Validated loan amount (> 0)"),
+    ('years_employed', lambda s: s >= 0, "Validated employment years (>= 0)"),
+]
+
+
+class RawScan:
+    """Profile of the raw chunks plus their loan_purpose validation patterns; mergeable."""
+
+    def __init__(self):
+        self.profile = DataProfile()
+        # (loan_purpose or None, which validation columns were missing) for rows
+        # whose present values pass validation; decided once fill values are known.
+        # Duplicate rows add nothing new, so raw chunks can be scanned as-is
+        self.purpose_patterns = set()
+
+    def add(self, chunk):
+        self.profile.add(chunk)
+        nulls = chunk[[col for col, _, _ in VALIDATION_RULES]].isnull()
+        passes = pd.Series(True, index=chunk.index)
+        for col, rule, _ in VALIDATION_RULES:
+            passes &= rule(chunk[col]) | nulls[col]
+        patterns = pd.concat([chunk.loc[passes, 'loan_purpose'].astype(object), nulls[passes]], axis=1)
+        for row in patterns.drop_duplicates().itertuples(index=False):
+            purpose = None if pd.isnull(row[0]) else row[0]
+            self.purpose_patterns.add((purpose, tuple(row[1:])))
+        return self
+
+    def merge(self, other):
+        self.profile.merge(other.profile)
+        self.purpose_patterns |= other.purpose_patterns
+        return self
+
+
+class FillValueCollector:
+    """Values needed for the median/mode of columns with missing values; mergeable."""
+
+    def __init__(self, numeric_cols, category_cols):
+        self.numeric_values = {col: [] for col in numeric_cols}
+        self.category_counts = {col: None for col in category_cols}
+
+    def add(self, chunk):
+        for col, values in self.numeric_values.items():
+            values.append(chunk[col].dropna().to_numpy(dtype='float64'))
+        for col, counts in self.category_counts.items():
+            chunk_counts = chunk[col].value_counts()
+            self.category_counts[col] = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+        return self
+
+    def merge(self, other):
+        for col, values in other.numeric_values.items():
+            self.numeric_values[col].extend(values)
+        for col, counts in other.category_counts.items():
+            if counts is not None:
+                mine = self.category_counts[col]
+                self.category_counts[col] = counts if mine is None else mine.add(counts, fill_value=0)
+        return self
+
+    def fill_values(self):
+        fill_values = {}
+        for col, values in self.numeric_values.items():
+            values = np.concatenate(values) if values else np.zeros(0)
+            fill_values[col] = float(np.median(values)) if len(values) else np.nan
+        for col, counts in self.category_counts.items():
+            if counts is not None and len(counts):
+                # Same tie-break as Series.mode(): the smallest of the most frequent values
+                fill_values[col] = sorted(counts[counts == counts.max()].index)[0]
+        return fill_values
+
+
+def csv_partitions(path, partition_bytes):
+    """Split a CSV into (start, end) byte ranges on line boundaries, header excluded.
+
+    Assumes no quoted field contains a newline, which holds for the raw extracts.
+    """
+    partitions = []
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        size = os.fstat(f.fileno()).st_size
+        while start < size:
+            f.seek(min(start + partition_bytes, size))
+            f.readline()
+            end = min(f.tell(), size)
+            partitions.append((start, end))
+            start = end
+    return partitions
+
+
+def part_path(path, index):
+    base, ext = os.path.splitext(path)
+    return f"{base}.part-{index:05d}{ext}"
+
+
+def part_paths(path):
+    """Existing output parts of ``path`` written by the parallel mode, in order."""
+    base, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(base)}.part-[0-9][0-9][0-9][0-9][0-9]{ext}"))
+
+
+# Process-pool tasks for the parallel mode. Each reads its own byte range of
+# the raw file, so only hashes, keep masks and small statistics cross processes
+def _scan_partition(cleaner, partition):
+    chunk = cleaner.read_partition(partition)
+    return RawScan().add(chunk), row_hashes(chunk)
+
+
+def _collect_partition(cleaner, partition, keep, collector, usecols, dtypes):
+    return collector.add(cleaner.read_partition(partition, usecols=usecols, dtype=dtypes)[keep])
+
+
+def _process_partition(cleaner, index, partition, keep):
+    df = cleaner.process_chunk(cleaner.read_partition(partition, dtype=cleaner.read_dtypes)[keep])
+    for path, select in cleaner.output_tables():
+        write_table(select(df), part_path(path, index))
+    return len(df), list(df.columns), DataProfile().add(df), df['risk_level'].value_counts()
+
 
 class DataCleaner:
-    def __init__(self, raw_data_path, processed_data_path):
+    def __init__(self, raw_data_path, processed_data_path, chunksize=None, workers=None,
+                 partition_bytes=64 * 1024 * 1024, output_format='csv', cache=None):
+        if output_format not in FORMATS:
+            raise ValueError(f"output_format must be one of {sorted(FORMATS)}")
+        if output_format == 'feather' and chunksize and not workers:
+            raise ValueError("Feather output cannot be streamed; use the parquet format or parallel mode")
         self.raw_data_path = raw_data_path
         self.processed_data_path = processed_data_path
+        self.output_format = output_format
+        self.chunksize = chunksize
+        self.workers = workers
+        self.partition_bytes = partition_bytes
+        # StageCache; a run whose raw data, code and parameters are cached restores its outputs
+        self.cache = cache
         self.df = None
-        
+        self.verbose = True
+        # Fitted on the whole dataset; filled in by clean_data/encode_categorical
+        # in memory, or up front by fit_streaming_stats when streaming
+        self.fill_values = None
+        self.loan_purpose_categories = None
+        self.read_dtypes = {}
+        self.raw_profile = None
+        self.keep_masks = None
+        self.raw_columns = None
+        self.n_records = 0
+    
+    def log(self, message=""):
+        if self.verbose:
+            print(message)
+    
     def load_raw_data(self):
         """Load raw CSV data"""
         print(" Loading raw data...")
@@ -26,102 +212,101 @@ class DataCleaner:
         """Check for data quality issues"""
         print("\n Checking data quality...")
         
-        # Missing values
-        missing = self.df.isnull().sum()
-        if missing.sum() > 0:
-            print(f"  Missing values found:")
-            print(missing[missing > 0])
-        else:
-            print(" No missing values")
+        # One pass for missing values, duplicates, distinct counts and value
+        # statistics; later stages read the profile instead of rescanning
+        self.raw_profile = DataProfile()
+        self.raw_profile.observe_rows(row_hashes(self.df))
+        self.raw_profile.add(self.df)
+        self.raw_profile.print_summary()
+        self.save_raw_profile()
         
-        # Duplicates
-        duplicates = self.df.duplicated().sum()
-        if duplicates > 0:
-            print(f"  {duplicates} duplicate records found")
+        return self.raw_profile.missing(), self.raw_profile.duplicate_rows
+    
+    def save_raw_profile(self):
+        os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
+        path = self.raw_profile.save(self.profile_path('raw_profile'))
+        print(f" Saved data profile to: {path}")
+    
+    def profile_fill_value(self, col):
+        """Fill value straight from the raw profile, or None if it has to be computed.
+        
+        Fill values are taken over unique rows, so the profile's exact
+        median/mode only applies when the raw data has no duplicates.
+        """
+        if self.raw_profile is None or self.raw_profile.duplicate_rows != 0:
+            return None
+        column = self.raw_profile.columns[col]
+        if column.kind in ('int', 'float'):
+            return column.median()
+        if column.kinds == {'object'}:
+            return column.mode()
+        return None
+    
+    def fit_fill_values(self, df):
+        """Median for numeric columns and mode for categorical ones, where values are missing"""
+        if self.raw_profile is not None:
+            missing_cols = [col for col, column in self.raw_profile.columns.items() if column.nulls]
         else:
-            print(" No duplicates")
-        
-        # Data types
-        print(f"\n Data types:")
-        print(self.df.dtypes)
-        
-        return missing, duplicates
+            missing_cols = list(df.columns[df.isnull().any()])
+        fill_values = {}
+        numeric_cols = set(df.select_dtypes(include=[np.number]).columns)
+        for col in missing_cols:
+            fill_value = self.profile_fill_value(col)
+            if fill_value is not None:
+                fill_values[col] = fill_value
+            elif col in numeric_cols:
+                fill_values[col] = df[col].median()
+            elif not df[col].dropna().empty:
+                fill_values[col] = df[col].mode()[0]
+        return fill_values
     
     def clean_data(self):
         """Clean and validate data"""
-        print("\n Cleaning data...")
+        self.log("\n Cleaning data...")
         
         # Remove duplicates
         initial_count = len(self.df)
         self.df = self.df.drop_duplicates()
         removed = initial_count - len(self.df)
         if removed > 0:
-            print(f" Removed {removed} duplicate records")
-        
-        # Handle missing values
-        if self.df.isnull().sum().sum() > 0:
-            # Fill numeric columns with median
-            numeric_cols = self.df.select_dtypes(include=[np.number]).columns
-            for col in numeric_cols:
-                if self.df[col].isnull().sum() > 0:
-                    median_val = self.df[col].median()
-                    self.df[col].fillna(median_val, inplace=True)
-                    print(f" Filled {col} missing values with median: {median_val}")
-            
-            # Fill categorical columns with mode
-            categorical_cols = self.df.select_dtypes(include=['object']).columns
-            for col in categorical_cols:
-                if self.df[col].isnull().sum() > 0:
-                    mode_val = self.df[col].mode()[0]
-                    self.df[col].fillna(mode_val, inplace=True)
-                    print(f" Filled {col} missing values with mode: {mode_val}")
-        
-        # Validate age
-        self.df = self.df[(self.df['age'] >= 18) & (self.df['age'] <= 100)]
-        print(f" Validated age range (18-100)")
-        
-        # Validate income
-        self.df = self.df[self.df['annual_income'] > 0]
-        print(f" Validated annual income (> 0)")
-        
-        # Validate loan amount
-        self.df = self.df[self.df['loan_amount'] > 0]
-        print(f" Validated loan amount (> 0)")
-        
-        # Validate employment years
-        self.df = self.df[self.df['years_employed'] >= 0]
-        print(f" Validated employment years (>= 0)")
-        
-        print(f"\n Clean data: {len(self.df)} records")
+            self.log(f" Removed {removed} duplicate records")
+        
+        # Handle missing values: median for numeric columns, mode for categorical
+        if self.fill_values is None:
+            self.fill_values = self.fit_fill_values(self.df)
+        for col, fill_value in self.fill_values.items():
+            self.df[col] = self.df[col].fillna(fill_value)
+            kind = "median" if isinstance(fill_value, (int, float, np.number)) else "mode"
+            self.log(f" Filled {col} missing values with {kind}: {fill_value}")
+        
+        for col, rule, message in VALIDATION_RULES:
+            self.df = self.df[rule(self.df[col])]
+            self.log(f" {message}")
+        
+        self.log(f"\n Clean data: {len(self.df)} records")
         return self.df
     
     def engineer_features(self):
         """Create derived features"""
-        print("\n Engineering features...")
-        
-        # Debt-to-income ratio
-        self.df['debt_to_income_ratio'] = (self.df['monthly_debt'] * 12) / self.df['annual_income']
-        print(" Created: debt_to_income_ratio")
-        
-        # Credit-to-income ratio
-        self.df['credit_to_income_ratio'] = self.df['loan_amount'] / self.df['annual_income']
-        print(" Created: credit_to_income_ratio")
-        
-        # Monthly income
-        self.df['monthly_income'] = self.df['annual_income'] / 12
-        print(" Created: monthly_income")
+        self.log("\n Engineering features...")
+        self.df = self.df.copy()
         
-        # Debt burden (monthly debt as % of monthly income)
-        self.df['debt_burden'] = (self.df['monthly_debt'] / self.df['monthly_income']) * 100
-        print(" Created: debt_burden")
+        # Ratio features, computed by the same code the served model uses
+        derived = derive_features(
+            self.df['annual_income'], self.df['monthly_debt'],
+            self.df['loan_amount'], self.df['credit_history_length'],
+        )
+        for name in ['debt_to_income_ratio', 'credit_to_income_ratio', 'monthly_income', 'debt_burden']:
+            self.df[name] = derived[name]
+            self.log(f" Created: {name}")
         
         # Age groups
         self.df['age_group'] = pd.cut(
-            self.df['age'], 
-            bins=[0, 25, 35, 45, 55, 100], 
+            self.df['age'],
+            bins=[0, 25, 35, 45, 55, 100],
             labels=['18-25', '26-35', '36-45', '46-55', '56+']
         )
-        print(" Created: age_group")
+        self.log(" Created: age_group")
         
         # Income groups
         self.df['income_group'] = pd.cut(
@@ -129,64 +314,45 @@ class DataCleaner:
             bins=[0, 40000, 60000, 80000, 100000, float('inf')],
             labels=['Low', 'Medium', 'High', 'Very High', 'Ultra High']
         )
-        print(" Created: income_group")
+        self.log(" Created: income_group")
         
         # Employment stability score
         self.df['employment_stability'] = np.where(
             self.df['years_employed'] >= 10, 'Stable',
             np.where(self.df['years_employed'] >= 5, 'Moderate', 'New')
         )
-        print(" Created: employment_stability")
+        self.log(" Created: employment_stability")
         
         # Credit history quality
-        self.df['credit_quality_score'] = self.df['credit_history_length'] * 10
-        print(" Created: credit_quality_score")
+        self.df['credit_quality_score'] = derived['credit_quality_score']
+        self.log(" Created: credit_quality_score")
         
         return self.df
     
     def encode_categorical(self):
         """Encode categorical variables"""
-        print("\n Encoding categorical variables...")
-        
-        # Gender encoding
-        self.df['gender_encoded'] = self.df['gender'].map({'M': 1, 'F': 0})
-        print(" Encoded: gender")
-        
-        # Employment status encoding
-        employment_map = {'Employed': 1, 'Self-Employed': 2, 'Unemployed': 0}
-        self.df['employment_status_encoded'] = self.df['employment_status'].map(employment_map)
-        print(" Encoded: employment_status")
-        
-        # Payment history encoding
-        payment_map = {'Excellent': 3, 'Good': 2, 'Fair': 1, 'Poor': 0}
-        self.df['payment_history_encoded'] = self.df['payment_history'].map(payment_map)
-        print(" Encoded: payment_history")
-        
-        # Marital status encoding
-        marital_map = {'Married': 1, 'Single': 0, 'Divorced': 0}
-        self.df['marital_status_encoded'] = self.df['marital_status'].map(marital_map)
-        print(" Encoded: marital_status")
-        
-        # Education encoding
-        education_map = {'PhD': 4, 'Master': 3, 'Bachelor': 2, 'High School': 1}
-        self.df['education_encoded'] = self.df['education'].map(education_map)
-        print(" Encoded: education")
-        
-        # Home ownership encoding
-        home_map = {'Own': 1, 'Rent': 0, 'Mortgage': 0.5}
-        self.df['home_ownership_encoded'] = self.df['home_ownership'].map(home_map)
-        print(" Encoded: home_ownership")
-        
-        # Loan purpose encoding (one-hot)
-        loan_purpose_dummies = pd.get_dummies(self.df['loan_purpose'], prefix='loan_purpose')
+        self.log("\n Encoding categorical variables...")
+        
+        # Ordinal/binary encodings, shared with the served model
+        for col, mapping in ENCODINGS.items():
+            self.df[f'{col}_encoded'] = self.df[col].map(mapping)
+            self.log(f" Encoded: {col}")
+        
+        # Loan purpose encoding (one-hot); the categories are fixed once so
+        # every chunk gets the same dummy columns
+        if self.loan_purpose_categories is None:
+            self.loan_purpose_categories = sorted(self.df['loan_purpose'].dropna().unique())
+        loan_purpose = pd.Categorical(self.df['loan_purpose'], categories=self.loan_purpose_categories)
+        loan_purpose_dummies = pd.get_dummies(loan_purpose, prefix='loan_purpose')
+        loan_purpose_dummies.index = self.df.index
         self.df = pd.concat([self.df, loan_purpose_dummies], axis=1)
-        print(f" One-hot encoded: loan_purpose ({len(loan_purpose_dummies.columns)} categories)")
+        self.log(f" One-hot encoded: loan_purpose ({len(loan_purpose_dummies.columns)} categories)")
         
         return self.df
     
     def create_risk_labels(self):
         """Create risk level labels based on features"""
-        print("\n Creating risk labels...")
+        self.log("\n Creating risk labels...")
         
         # Risk score calculation
         risk_score = 0
@@ -220,65 +386,381 @@ class DataCleaner:
             labels=['Low', 'Medium', 'High']
         )
         
-        print(f" Created risk labels")
-        print(f"   Risk distribution:")
-        print(self.df['risk_level'].value_counts())
+        self.log(f" Created risk labels")
+        self.log(f"   Risk distribution:")
+        self.log(self.df['risk_level'].value_counts())
         
         return self.df
     
-    def save_processed_data(self):
-        """Save cleaned and processed data"""
-        print("\n Saving processed data...")
-        
-        # Create output directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
-        
-        # Save full processed data
-        self.df.to_csv(self.processed_data_path, index=False)
-        print(f" Saved to: {self.processed_data_path}")
-        
-        # Save feature-only data for ML
-        ml_features = [
-            'age', 'annual_income', 'years_employed', 'monthly_debt', 'loan_amount',
-            'existing_credits', 'credit_history_length', 'dependents',
-            'debt_to_income_ratio', 'credit_to_income_ratio', 'debt_burden',
-            'credit_quality_score', 'gender_encoded', 'employment_status_encoded',
-            'payment_history_encoded', 'marital_status_encoded', 'education_encoded',
-            'home_ownership_encoded', 'default'
-        ]
-        
-        # Add loan purpose dummies
-        loan_purpose_cols = [col for col in self.df.columns if col.startswith('loan_purpose_')]
-        ml_features.extend(loan_purpose_cols)
-        
-        ml_data = self.df[ml_features]
-        ml_data_path = self.processed_data_path.replace('.csv', '_ml_ready.csv')
-        ml_data.to_csv(ml_data_path, index=False)
-        print(f" Saved ML-ready data to: {ml_data_path}")
-        
-        # Save data summary
-        summary_path = self.processed_data_path.replace('.csv', '_summary.txt')
+    def ml_ready(self, df):
+        """Feature-only view of the processed data for ML"""
+        loan_purpose_cols = [col for col in df.columns if col.startswith('loan_purpose_')]
+        return df[ML_FEATURES + loan_purpose_cols]
+    
+    def output_tables(self):
+        """(path, column selection) of each processed output.
+        
+        CSV writes the full dataset and an ML-ready copy; columnar formats
+        write the full dataset once, since readers can load just the ML
+        columns from it.
+        """
+        table_path = with_format(self.processed_data_path, self.output_format)
+        tables = [(table_path, lambda df: df)]
+        if self.output_format == 'csv':
+            tables.append((self.processed_data_path.replace('.csv', '_ml_ready.csv'), self.ml_ready))
+        return tables
+    
+    def summary_path(self):
+        return os.path.splitext(self.processed_data_path)[0] + '_summary.txt'
+    
+    def profile_path(self, name='profile'):
+        return os.path.splitext(self.processed_data_path)[0] + f'_{name}.json'
+    
+    def save_profile(self, profile):
+        """Profile of the processed data, next to the summary"""
+        path = profile.save(self.profile_path())
+        print(f" Saved data profile to: {path}")
+    
+    def write_summary(self, summary_path, n_records, columns, statistics):
         with open(summary_path, 'w') as f:
             f.write("=" * 50 + "\n")
             f.write("DATA PROCESSING SUMMARY\n")
             f.write("=" * 50 + "\n\n")
             f.write(f"Processing Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Total Records: {len(self.df)}\n")
-            f.write(f"Total Features: {len(self.df.columns)}\n\n")
+            f.write(f"Total Records: {n_records}\n")
+            f.write(f"Total Features: {len(columns)}\n\n")
             f.write("Feature List:\n")
-            for col in self.df.columns:
+            for col in columns:
                 f.write(f"  - {col}\n")
             f.write("\n" + "=" * 50 + "\n")
             f.write("BASIC STATISTICS\n")
             f.write("=" * 50 + "\n")
-            f.write(str(self.df.describe()))
+            f.write(str(statistics))
+    
+    def save_processed_data(self):
+        """Save cleaned and processed data"""
+        print("\n Saving processed data...")
         
+        # Create output directory if it doesn't exist
+        os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
+        summary_path = self.summary_path()
+        
+        # Save full processed data, plus feature-only data for ML with CSV
+        for path, select in self.output_tables():
+            write_table(select(self.df), path)
+            print(f" Saved to: {path}")
+        
+        # Save data summary and profile
+        self.write_summary(summary_path, len(self.df), self.df.columns, self.df.describe())
         print(f" Saved summary to: {summary_path}")
+        self.save_profile(DataProfile().add(self.df))
         
         return self.df
     
+    def read_raw_chunks(self, **kwargs):
+        return pd.read_csv(self.raw_data_path, chunksize=self.chunksize, **kwargs)
+    
+    def read_partition(self, partition, **kwargs):
+        """Parse one byte range from ``csv_partitions`` of the raw file"""
+        start, end = partition
+        with open(self.raw_data_path, 'rb') as f:
+            f.seek(start)
+            data = f.read(end - start)
+        return pd.read_csv(io.BytesIO(data), header=None, names=self.raw_columns, **kwargs)
+    
+    def fit_streaming_stats(self):
+        """First pass over the raw file: everything the per-chunk stages need globally.
+        
+        Profiles the raw file (duplicate rows by row hash, column dtypes,
+        missing values, exact medians/modes while they fit) and records
+        which ``loan_purpose`` categories survive validation. Fill values
+        the profile cannot answer are then computed from just those columns,
+        over the de-duplicated rows, so they equal the in-memory median/mode.
+        """
+        print("\n Scanning raw data (pass 1)...")
+        scan = RawScan()
+        keep_masks = []
+        for chunk in self.read_raw_chunks():
+            scan.add(chunk)
+            keep_masks.append(scan.profile.observe_rows(row_hashes(chunk)))
+        
+        def collect(collector, usecols, dtypes):
+            chunks = self.read_raw_chunks(usecols=usecols, dtype=dtypes)
+            for chunk, keep in zip(chunks, self.keep_masks):
+                collector.add(chunk[keep])
+            return collector
+        
+        return self.finish_fit(scan, keep_masks, collect)
+    
+    def finish_fit(self, scan, keep_masks, collect):
+        """Turn a raw scan into dtypes, fill values and categories.
+        
+        ``collect(collector, usecols, dtypes)`` feeds every unique row of
+        ``usecols`` to a FillValueCollector and returns it.
+        """
+        self.keep_masks = keep_masks
+        self.raw_profile = scan.profile
+        # Row hashes are only needed while pass 1 observes rows
+        self.raw_profile.seen = None
+        missing = self.raw_profile.missing()
+        duplicates = self.raw_profile.duplicate_rows
+        print(f" Scanned {self.raw_profile.rows} records")
+        
+        # A column is numeric only if every chunk parsed it as a number; ints
+        # that are missing somewhere become floats, as with a full read
+        numeric_cols = []
+        self.read_dtypes = {}
+        for col, column in self.raw_profile.columns.items():
+            if column.kind in ('int', 'float'):
+                numeric_cols.append(col)
+                if column.kind == 'float':
+                    self.read_dtypes[col] = 'float64'
+            elif column.kind == 'object':
+                self.read_dtypes[col] = object
+        
+        self.raw_profile.print_summary()
+        self.save_raw_profile()
+        
+        self.fill_values = {}
+        unresolved = []
+        for col in missing[missing > 0].index:
+            fill_value = self.profile_fill_value(col)
+            if fill_value is None:
+                unresolved.append(col)
+            else:
+                self.fill_values[col] = fill_value
+        if unresolved:
+            print(f" Computing fill values for {len(unresolved)} columns (pass 2)...")
+            collector = FillValueCollector(
+                [col for col in unresolved if col in numeric_cols],
+                [col for col in unresolved if col not in numeric_cols],
+            )
+            dtypes = {col: self.read_dtypes[col] for col in unresolved if col in self.read_dtypes}
+            self.fill_values.update(collect(collector, unresolved, dtypes).fill_values())
+        
+        categories = set()
+        for purpose, pattern in scan.purpose_patterns:
+            filled = all(
+                col in self.fill_values and bool(rule(self.fill_values[col]))
+                for (col, rule, _), was_missing in zip(VALIDATION_RULES, pattern) if was_missing
+            )
+            if purpose is None:
+                purpose = self.fill_values.get('loan_purpose')
+            if filled and purpose is not None:
+                categories.add(purpose)
+        self.loan_purpose_categories = sorted(categories)
+        
+        for col, fill_value in self.fill_values.items():
+            print(f" Fill value for {col}: {fill_value}")
+        print(f" Loan purpose categories: {self.loan_purpose_categories}")
+        
+        return missing, duplicates
+    
+    def process_chunk(self, chunk):
+        """Steps 3-6 on one chunk of unique rows, with the fitted statistics"""
+        self.verbose = False
+        try:
+            self.df = chunk
+            self.clean_data()
+            self.engineer_features()
+            self.encode_categorical()
+            self.create_risk_labels()
+            return self.df
+        finally:
+            self.verbose = True
+            self.df = None
+    
+    def report_streamed_output(self, n_records, columns, profile, risk_counts, outputs):
+        summary_path = self.summary_path()
+        self.n_records = n_records
+        print(f" Clean data: {n_records} records")
+        print(f"   Risk distribution:")
+        print(risk_counts)
+        for output in outputs:
+            print(f" Saved to: {output}")
+        self.write_summary(summary_path, n_records, columns, profile.describe_frame())
+        print(f" Saved summary to: {summary_path}")
+        self.save_profile(profile)
+        
+        print("\n" + "=" * 60)
+        print(" PIPELINE COMPLETE!")
+        print("=" * 60)
+        print(f"\n Final dataset shape: ({n_records}, {len(columns)})")
+        print(f" Output location: {outputs[0]}")
+    
+    def run_streaming_pipeline(self):
+        """Run the pipeline chunk by chunk without loading the whole raw file.
+        
+        Returns None: the processed dataset only ever exists on disk.
+        """
+        print("=" * 60)
+        print(f" DATA CLEANING & PREPROCESSING PIPELINE (streaming, {self.chunksize} rows/chunk)")
+        print("=" * 60)
+        
+        # Steps 1-2: global statistics and quality check
+        self.fit_streaming_stats()
+        
+        # Steps 3-7 per chunk, appending to the outputs
+        print("\n Processing chunks (pass 3)...")
+        os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
+        writers = [(TableWriter(path), select) for path, select in self.output_tables()]
+        profile = DataProfile()
+        risk_counts = None
+        columns = []
+        n_records = 0
+        try:
+            chunks = self.read_raw_chunks(dtype=self.read_dtypes)
+            for chunk, keep in zip(chunks, self.keep_masks):
+                df = self.process_chunk(chunk[keep])
+                for writer, select in writers:
+                    writer.write(select(df))
+                columns = list(df.columns)
+                
+                n_records += len(df)
+                profile.add(df)
+                chunk_risk = df['risk_level'].value_counts()
+                risk_counts = chunk_risk if risk_counts is None else risk_counts + chunk_risk
+        finally:
+            for writer, _ in writers:
+                writer.close()
+        
+        self.report_streamed_output(
+            n_records, columns, profile, risk_counts, [writer.path for writer, _ in writers],
+        )
+        return None
+    
+    def run_parallel_pipeline(self):
+        """Run the streaming passes over byte-range partitions in a process pool.
+        
+        Duplicate detection is resolved in the parent, in file order; every
+        other step runs in the workers with the shared fitted statistics.
+        Outputs are written as one part per partition
+        (``credit_applications_clean.part-00000.csv``, ...). Returns None.
+        """
+        partitions = csv_partitions(self.raw_data_path, self.partition_bytes)
+        print("=" * 60)
+        print(f" DATA CLEANING & PREPROCESSING PIPELINE (parallel, {self.workers} workers, "
+              f"{len(partitions)} partitions)")
+        print("=" * 60)
+        
+        self.raw_columns = list(pd.read_csv(self.raw_data_path, nrows=0).columns)
+        os.makedirs(os.path.dirname(self.processed_data_path), exist_ok=True)
+        for path, _ in self.output_tables():
+            for stale in part_paths(path):
+                os.remove(stale)
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            # Steps 1-2: global statistics and quality check
+            print("\n Scanning raw data (pass 1)...")
+            worker = self.worker_copy()
+            scan = RawScan()
+            keep_masks = []
+            for partition_scan, hashes in pool.map(_scan_partition, repeat(worker), partitions):
+                scan.merge(partition_scan)
+                keep_masks.append(scan.profile.observe_rows(hashes))
+            
+            def collect(collector, usecols, dtypes):
+                empty = copy.deepcopy(collector)
+                results = pool.map(
+                    _collect_partition, repeat(worker), partitions, keep_masks,
+                    repeat(empty), repeat(usecols), repeat(dtypes),
+                )
+                for result in results:
+                    collector.merge(result)
+                return collector
+            
+            self.finish_fit(scan, keep_masks, collect)
+            
+            # Steps 3-7 per partition, each writing its own part
+            print("\n Processing partitions (pass 3)...")
+            worker = self.worker_copy()
+            profile = DataProfile()
+            risk_counts = None
+            columns = []
+            n_records = 0
+            results = pool.map(_process_partition, repeat(worker), range(len(partitions)), partitions, keep_masks)
+            for part_records, part_columns, part_profile, part_risk in results:
+                n_records += part_records
+                columns = part_columns
+                profile.merge(part_profile)
+                risk_counts = part_risk if risk_counts is None else risk_counts + part_risk
+        
+        self.report_streamed_output(
+            n_records, columns, profile, risk_counts,
+            [f"{part_path(path, 0)} ... ({len(partitions)} parts)" for path, _ in self.output_tables()],
+        )
+        return None
+    
+    def worker_copy(self):
+        """Picklable copy for pool tasks, without the per-partition keep masks"""
+        worker = copy.copy(self)
+        worker.keep_masks = None
+        worker.df = None
+        return worker
+    
+    def cache_key(self):
+        """Stage cache key: raw data, cleaner code, output layout and library versions.
+        
+        Chunk size does not change the outputs, so streaming and in-memory
+        runs share entries; partition size does (one part per partition).
+        """
+        params = {
+            'output': os.path.basename(self.processed_data_path),
+            'format': self.output_format,
+            'partition_bytes': self.partition_bytes if self.workers else None,
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+        }
+        code = source_hash(sys.modules[__name__], profiler, storage, transformer)
+        return self.cache.key('clean', [self.raw_data_path], code, params), params
+    
+    def output_files(self):
+        """Every file the last run wrote"""
+        files = []
+        for path, _ in self.output_tables():
+            files.extend([path] if not self.workers else part_paths(path))
+        files.append(self.summary_path())
+        files.append(self.profile_path())
+        files.append(self.profile_path('raw_profile'))
+        return files
+    
     def run_pipeline(self):
+        """Run the pipeline, or restore its outputs from the stage cache.
+        
+        On a cache hit the in-memory mode returns the restored processed
+        table; the streaming and parallel modes return None as usual.
+        """
+        if self.cache is None:
+            return self.run_stages()
+        
+        key, params = self.cache_key()
+        if self.cache.lookup(key) is not None:
+            print("=" * 60)
+            print(f" DATA CLEANING: cached outputs found ({key[:16]})")
+            print("=" * 60)
+            output_dir = os.path.dirname(self.processed_data_path)
+            for path, _ in self.output_tables():
+                for stale in part_paths(path):
+                    os.remove(stale)
+            for path in self.cache.restore(key, output_dir):
+                print(f" Restored: {path}")
+            if self.workers or self.chunksize:
+                return None
+            self.df = read_table(self.output_tables()[0][0])
+            return self.df
+        
+        result = self.run_stages()
+        self.cache.store(key, 'clean', self.output_files(), params)
+        print(f" Cached outputs as {key[:16]}")
+        return result
+    
+    def run_stages(self):
         """Run complete data cleaning pipeline"""
+        if self.workers:
+            return self.run_parallel_pipeline()
+        if self.chunksize:
+            return self.run_streaming_pipeline()
+        
         print("=" * 60)
         print(" DATA CLEANING & PREPROCESSING PIPELINE")
         print("=" * 60)
@@ -308,7 +790,7 @@ class DataCleaner:
         print(" PIPELINE COMPLETE!")
         print("=" * 60)
         print(f"\n Final dataset shape: {self.df.shape}")
-        print(f" Output location: {self.processed_data_path}")
+        print(f" Output location: {self.output_tables()[0][0]}")
         
         return self.df
 
@@ -318,9 +800,30 @@ if __name__ == "__main__":
     RAW_DATA_PATH = "../data/raw/credit_applications_raw.csv"
     PROCESSED_DATA_PATH = "../data/processed/credit_applications_clean.csv"
     
+    parser = argparse.ArgumentParser(description="Clean raw credit data")
+    parser.add_argument("--raw", default=RAW_DATA_PATH)
+    parser.add_argument("--output", default=PROCESSED_DATA_PATH)
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream the raw file in chunks of this many rows instead of loading it whole")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Process partitions of the raw file in parallel on this many processes")
+    parser.add_argument("--partition-mb", type=int, default=64,
+                        help="Partition size for --workers")
+    parser.add_argument("--format", choices=sorted(FORMATS), default='csv',
+                        help="Processed data format; parquet/feather need pyarrow")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Stage cache directory")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always recompute, without reading or writing the stage cache")
+    args = parser.parse_args()
+    
     # Run pipeline
-    cleaner = DataCleaner(RAW_DATA_PATH, PROCESSED_DATA_PATH)
+    cleaner = DataCleaner(
+        args.raw, args.output, chunksize=args.chunksize,
+        workers=args.workers, partition_bytes=args.partition_mb * 1024 * 1024,
+        output_format=args.format,
+        cache=None if args.no_cache else StageCache(args.cache_dir),
+    )
     cleaned_data = cleaner.run_pipeline()
     
     print("\n Data is ready for ML training!")
-
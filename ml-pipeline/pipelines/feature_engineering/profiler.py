@@ -0,0 +1,396 @@
+"""
+Single-pass, mergeable data profiling.
+
+``DataProfile.add`` folds a chunk into per-column statistics (missing
+values, distinct counts, min/max/mean/std, quantiles and category
+frequencies) and ``merge`` combines profiles of different chunks or
+partitions, so a dataset is profiled in one pass however it is read.
+``observe_rows`` counts duplicate rows from row hashes. Profiles are saved
+as JSON so later stages (and later runs) can reuse them instead of
+rescanning the data.
+
+Distinct counts and quantiles are exact while a column has few distinct
+values and become estimates (HyperLogLog, merged centroids) beyond that;
+the JSON records which.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.25, 0.5, 0.75)
+
+
+def column_hashes(values):
+    """64-bit hash of each value; numbers hash as float64, missing values as 0"""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        hashes = pd.util.hash_array(values.to_numpy(dtype='float64', na_value=np.nan))
+    else:
+        hashes = pd.util.hash_array(values.to_numpy(dtype=object))
+    hashes[values.isnull().to_numpy()] = 0
+    return hashes
+
+
+def row_hashes(df):
+    """64-bit hash of every row, stable across chunks.
+
+    Built from ``column_hashes``, so a row hashes identically whichever
+    chunk it falls in, whatever dtype that chunk inferred for a column.
+    """
+    hashed = {col: column_hashes(df[col]) for col in df.columns}
+    return pd.util.hash_pandas_object(pd.DataFrame(hashed), index=False).to_numpy()
+
+
+class SeenRows:
+    """Set of row hashes seen so far, for streaming duplicate detection.
+
+    Hashes are kept in sorted numpy blocks that are merged as they grow
+    (sizes roughly halve from block to block), so memory stays at 8 bytes
+    per distinct row and lookups are a few binary searches.
+    """
+
+    def __init__(self):
+        self.blocks = []
+
+    def __len__(self):
+        return sum(len(block) for block in self.blocks)
+
+    def first_occurrences(self, hashes):
+        """Mask of rows not seen before (in earlier calls or earlier in ``hashes``)."""
+        keep = ~pd.Series(hashes).duplicated().to_numpy()
+        for block in self.blocks:
+            positions = np.searchsorted(block, hashes).clip(max=len(block) - 1)
+            keep &= block[positions] != hashes
+        new = np.sort(hashes[keep])
+        if len(new):
+            self.blocks.append(new)
+            while len(self.blocks) > 1 and len(self.blocks[-1]) >= len(self.blocks[-2]):
+                merged = np.concatenate([self.blocks.pop(), self.blocks.pop()])
+                self.blocks.append(np.sort(merged, kind='mergesort'))
+        return keep
+
+
+class HyperLogLog:
+    """Distinct-count estimate from 64-bit hashes; merge is an element-wise max."""
+
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes):
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rest = (hashes << np.uint64(self.precision)) | np.uint64(1 << (self.precision - 1))
+        # Rank = leading zeros + 1; frexp's exponent is the bit length
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        rank = (65 - bit_length).clip(1, 64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)
+        return raw
+
+
+class QuantileSketch:
+    """Mergeable quantiles: exact (value, count) pairs up to ``max_centroids``
+    distinct values, then weighted centroids of equal rank width."""
+
+    def __init__(self, max_centroids=2048):
+        self.max_centroids = max_centroids
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.exact = True
+
+    @property
+    def count(self):
+        return self.weights.sum()
+
+    def add(self, values):
+        values, counts = np.unique(values, return_counts=True)
+        self._absorb(values, counts.astype(np.float64))
+
+    def merge(self, other):
+        self.exact = self.exact and other.exact
+        self._absorb(other.means, other.weights)
+
+    def _absorb(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        if self.exact:
+            means, inverse = np.unique(means, return_inverse=True)
+            weights = np.bincount(inverse, weights=weights)
+        else:
+            order = np.argsort(means, kind='mergesort')
+            means, weights = means[order], weights[order]
+        if len(means) > self.max_centroids:
+            self.exact = False
+            target = self.max_centroids // 2
+            rank = np.cumsum(weights) - weights / 2
+            bucket = np.minimum((rank / weights.sum() * target).astype(np.int64), target - 1)
+            totals = np.bincount(bucket, weights=weights)
+            sums = np.bincount(bucket, weights=weights * means)
+            present = totals > 0
+            means, weights = sums[present] / totals[present], totals[present]
+        self.means, self.weights = means, weights
+
+    def quantile(self, q):
+        if not len(self.means):
+            return np.nan
+        cumulative = np.cumsum(self.weights)
+        if self.exact:
+            # Linear interpolation between order statistics, as pandas/numpy do
+            position = q * (cumulative[-1] - 1)
+            lower, upper = np.floor(position), np.ceil(position)
+            low = self.means[np.searchsorted(cumulative, lower, side='right')]
+            high = self.means[np.searchsorted(cumulative, upper, side='right')]
+            return low + (high - low) * (position - lower)
+        centers = cumulative - self.weights / 2
+        return float(np.interp(q * cumulative[-1], centers, self.means))
+
+
+def _kind(dtype):
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    return 'object'
+
+
+class ColumnProfile:
+    def __init__(self, max_categories):
+        self.max_categories = max_categories
+        self.kinds = set()
+        self.count = 0
+        self.nulls = 0
+        self.distinct = HyperLogLog()
+        # Numeric columns
+        self.count_numeric = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = None
+        # Other columns; None once there are more than max_categories values
+        self.frequencies = pd.Series(dtype='int64')
+
+    @property
+    def kind(self):
+        """Kind of the whole column: ints missing anywhere become floats, mixtures objects"""
+        if self.kinds <= {'int', 'float'}:
+            return 'float' if 'float' in self.kinds or self.nulls else 'int'
+        if len(self.kinds) == 1:
+            return next(iter(self.kinds))
+        return 'object'
+
+    def add(self, values):
+        kind = _kind(values.dtype)
+        self.kinds.add(kind)
+        nulls = int(values.isnull().sum())
+        self.count += len(values) - nulls
+        self.nulls += nulls
+        present = values.dropna()
+        self.distinct.add(column_hashes(present))
+        if not len(present):
+            return
+        if kind in ('int', 'float'):
+            data = present.to_numpy(dtype='float64')
+            mean = data.mean()
+            self._combine(len(data), mean, ((data - mean) ** 2).sum(), data.min(), data.max())
+            if self.sketch is None:
+                self.sketch = QuantileSketch()
+            self.sketch.add(data)
+        elif self.frequencies is not None:
+            self._add_frequencies(present.value_counts())
+
+    def _combine(self, n, mean, m2, low, high):
+        total = self.count_numeric + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta ** 2 * self.count_numeric * n / total
+        self.mean += delta * n / total
+        self.count_numeric = total
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+
+    def _add_frequencies(self, counts):
+        counts = counts.astype('int64')
+        if self.frequencies.empty:
+            merged = counts
+        else:
+            merged = self.frequencies.add(counts, fill_value=0).astype('int64')
+        self.frequencies = merged if len(merged) <= self.max_categories else None
+
+    def merge(self, other):
+        self.kinds |= other.kinds
+        self.count += other.count
+        self.nulls += other.nulls
+        self.distinct.merge(other.distinct)
+        if other.count_numeric:
+            self._combine(other.count_numeric, other.mean, other.m2, other.min, other.max)
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = QuantileSketch()
+            self.sketch.merge(other.sketch)
+        if other.frequencies is None:
+            self.frequencies = None
+        elif self.frequencies is not None and not other.frequencies.empty:
+            self._add_frequencies(other.frequencies)
+
+    def distinct_count(self):
+        """(count, exact)"""
+        if self.sketch is not None and self.sketch.exact:
+            return len(self.sketch.means), True
+        if self.frequencies is not None and self.sketch is None:
+            return len(self.frequencies), True
+        return int(round(self.distinct.estimate())), False
+
+    def median(self):
+        """Exact median, or None when only an estimate is available"""
+        if self.sketch is not None and self.sketch.exact:
+            return float(self.sketch.quantile(0.5))
+        return None
+
+    def mode(self):
+        """Most frequent value (smallest on ties, like Series.mode), or None when unknown"""
+        if self.frequencies is None or self.frequencies.empty:
+            return None
+        top = self.frequencies[self.frequencies == self.frequencies.max()]
+        return sorted(top.index)[0]
+
+    def to_dict(self):
+        distinct, distinct_exact = self.distinct_count()
+        result = {
+            'kind': self.kind,
+            'count': self.count,
+            'nulls': self.nulls,
+            'distinct': distinct,
+            'distinct_exact': distinct_exact,
+        }
+        if self.count_numeric:
+            result.update({
+                'mean': self.mean,
+                'std': float(np.sqrt(self.m2 / (self.count_numeric - 1))) if self.count_numeric > 1 else None,
+                'min': float(self.min),
+                'max': float(self.max),
+                'quantiles': {str(q): float(self.sketch.quantile(q)) for q in QUANTILES},
+                'quantiles_exact': self.sketch.exact,
+            })
+        elif self.sketch is None:
+            result['frequencies'] = (
+                None if self.frequencies is None
+                else {str(value): int(count) for value, count in self.frequencies.sort_values(ascending=False).items()}
+            )
+        return result
+
+
+class DataProfile:
+    def __init__(self, max_categories=1000):
+        self.max_categories = max_categories
+        self.rows = 0
+        self.duplicate_rows = None
+        self.columns = {}
+        self.seen = None
+
+    def add(self, df):
+        """Fold a chunk into the profile; returns self"""
+        self.rows += len(df)
+        for col in df.columns:
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(self.max_categories)
+            self.columns[col].add(df[col])
+        return self
+
+    def observe_rows(self, hashes):
+        """Count duplicates among ``row_hashes`` of the chunks, in order; returns the first-occurrence mask"""
+        if self.seen is None:
+            self.seen = SeenRows()
+            self.duplicate_rows = 0
+        keep = self.seen.first_occurrences(hashes)
+        self.duplicate_rows += int(len(keep) - keep.sum())
+        return keep
+
+    def merge(self, other):
+        """Combine with the profile of another chunk or partition; returns self"""
+        self.rows += other.rows
+        if other.duplicate_rows is not None:
+            self.duplicate_rows = (self.duplicate_rows or 0) + other.duplicate_rows
+        for col, column in other.columns.items():
+            if col not in self.columns:
+                self.columns[col] = ColumnProfile(self.max_categories)
+            self.columns[col].merge(column)
+        return self
+
+    def __getstate__(self):
+        # Row hashes stay with whoever observes rows; pool tasks only ship statistics
+        state = dict(self.__dict__)
+        state['seen'] = None
+        return state
+
+    def missing(self):
+        return pd.Series({col: column.nulls for col, column in self.columns.items()}, dtype='int64')
+
+    def describe_frame(self):
+        """``DataFrame.describe()``-style table of the numeric columns"""
+        rows = {}
+        for col, column in self.columns.items():
+            if not column.count_numeric or column.kind == 'bool':
+                continue
+            std = np.sqrt(column.m2 / (column.count_numeric - 1)) if column.count_numeric > 1 else np.nan
+            stats = {'count': column.count_numeric, 'mean': column.mean, 'std': std, 'min': column.min}
+            for q in QUANTILES:
+                stats[f"{q:.0%}"] = column.sketch.quantile(q)
+            stats['max'] = column.max
+            rows[col] = stats
+        return pd.DataFrame(rows)
+
+    def to_dict(self):
+        return {
+            'rows': self.rows,
+            'duplicate_rows': self.duplicate_rows,
+            'columns': {col: column.to_dict() for col, column in self.columns.items()},
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @staticmethod
+    def load(path):
+        """The JSON form of a saved profile"""
+        with open(path) as f:
+            return json.load(f)
+
+    def print_summary(self):
+        missing = self.missing()
+        if missing.sum() > 0:
+            print(f"  Missing values found:")
+            print(missing[missing > 0])
+        else:
+            print(" No missing values")
+        if self.duplicate_rows:
+            print(f"  {self.duplicate_rows} duplicate records found")
+        elif self.duplicate_rows == 0:
+            print(" No duplicates")
+        print(f"\n Column profile:")
+        summary = pd.DataFrame({
+            col: {
+                'kind': column.kind,
+                'nulls': column.nulls,
+                'distinct': column.distinct_count()[0],
+            }
+            for col, column in self.columns.items()
+        }).T
+        print(summary)
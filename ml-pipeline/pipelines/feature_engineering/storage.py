@@ -0,0 +1,147 @@
+"""
+Processed-data storage formats.
+
+CSV is the default. Parquet and Feather (Arrow IPC) store the processed
+dataset once, with compact dtypes, and let readers load just the columns
+they need. Both need pyarrow, an optional dependency that is only imported
+when a columnar format is used.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMATS = {'csv': '.csv', 'parquet': '.parquet', 'feather': '.feather'}
+
+# Low-cardinality string columns, stored as categoricals in columnar formats
+CATEGORICAL_COLUMNS = [
+    'gender', 'employment_status', 'loan_purpose', 'payment_history', 'marital_status',
+    'education', 'home_ownership', 'age_group', 'income_group', 'employment_stability',
+    'risk_level',
+]
+
+SMALL_INT_COLUMNS = ['default', 'risk_score']
+
+
+def require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            "Parquet/Feather output needs pyarrow: pip install pyarrow (or use --format csv)"
+        ) from None
+    return pyarrow
+
+
+def format_of(path):
+    ext = os.path.splitext(path)[1].lower()
+    for fmt, fmt_ext in FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    raise ValueError(f"Unknown data format for {path}; expected one of {sorted(FORMATS.values())}")
+
+
+def with_format(path, fmt):
+    """``path`` with the extension of ``fmt``"""
+    return os.path.splitext(path)[0] + FORMATS[fmt]
+
+
+def compact_dtypes(df):
+    """Narrow dtypes for columnar storage.
+
+    The mapping depends only on column names and kinds, never on the values,
+    so every chunk or partition of a dataset gets the same schema:
+    categoricals for the known string columns, bool for the one-hot
+    columns, int8 for the label and risk score, float32 for the encoded and
+    remaining float features and int32 for the remaining integers.
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col in CATEGORICAL_COLUMNS:
+            columns[col] = values.astype('category')
+        elif col.startswith('loan_purpose_'):
+            columns[col] = values.astype(bool)
+        elif col in SMALL_INT_COLUMNS:
+            columns[col] = values.astype(np.int8)
+        elif col.endswith('_encoded') or pd.api.types.is_float_dtype(values):
+            columns[col] = values.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(values):
+            columns[col] = values.astype(np.int32)
+        else:
+            columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def write_table(df, path):
+    """Write a whole frame in the format given by ``path``'s extension"""
+    fmt = format_of(path)
+    if fmt == 'csv':
+        df.to_csv(path, index=False)
+        return
+    require_pyarrow()
+    df = compact_dtypes(df).reset_index(drop=True)
+    if fmt == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+
+class TableWriter:
+    """Append chunks to one output file (CSV or Parquet row groups).
+
+    Feather files are written whole, so they cannot be streamed; use
+    Parquet, or parallel mode, which writes one Feather part per partition.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.format = format_of(path)
+        if self.format == 'feather':
+            raise ValueError("Feather output cannot be streamed; use the parquet format or parallel mode")
+        self.writer = None
+        self.started = False
+
+    def write(self, df):
+        if self.format == 'csv':
+            df.to_csv(self.path, mode='a' if self.started else 'w', header=not self.started, index=False)
+        else:
+            pa = require_pyarrow()
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(compact_dtypes(df), preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = table.cast(self.writer.schema)
+            self.writer.write_table(table)
+        self.started = True
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def table_columns(path):
+    """Column names of a stored table, without reading its data"""
+    fmt = format_of(path)
+    if fmt == 'csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    require_pyarrow()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return list(pq.read_schema(path).names)
+    import pyarrow.feather as feather
+    return list(feather.read_table(path, memory_map=True).schema.names)
+
+
+def read_table(path, columns=None):
+    """Read a stored table, optionally only ``columns``"""
+    fmt = format_of(path)
+    if fmt == 'csv':
+        return pd.read_csv(path, usecols=columns)
+    require_pyarrow()
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
@@ -0,0 +1,176 @@
+"""
+Model features shared by training and serving.
+
+``ENCODINGS`` and ``derive_features`` are the categorical encodings and
+ratio formulas; the cleaner applies them to whole frames. A
+``FeatureTransformer`` is fitted by the trainer on the training split and
+saved with the model artifacts (``transformer_<timestamp>.json``). It turns
+raw application fields into the scaled model inputs, either for a whole
+DataFrame (vectorized) or for a single record (plain Python plus one small
+numpy array, no DataFrame), so the backend scores with the same features the
+model was trained on.
+
+Fields missing from a record, and ordinal categories the encodings do not
+know, take the training defaults (median or most frequent value). An unknown
+``loan_purpose`` sets none of the one-hot columns, as in the cleaner.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+NUMERIC_INPUTS = [
+    'age', 'annual_income', 'years_employed', 'monthly_debt', 'loan_amount',
+    'existing_credits', 'credit_history_length', 'dependents',
+]
+
+ENCODINGS = {
+    'gender': {'M': 1, 'F': 0},
+    'employment_status': {'Employed': 1, 'Self-Employed': 2, 'Unemployed': 0},
+    'payment_history': {'Excellent': 3, 'Good': 2, 'Fair': 1, 'Poor': 0},
+    'marital_status': {'Married': 1, 'Single': 0, 'Divorced': 0},
+    'education': {'PhD': 4, 'Master': 3, 'Bachelor': 2, 'High School': 1},
+    'home_ownership': {'Own': 1, 'Rent': 0, 'Mortgage': 0.5},
+}
+
+# Raw fields a record may carry
+INPUT_FIELDS = NUMERIC_INPUTS + list(ENCODINGS) + ['loan_purpose']
+
+DERIVED_FEATURES = [
+    'debt_to_income_ratio', 'credit_to_income_ratio', 'monthly_income', 'debt_burden', 'credit_quality_score',
+]
+
+LOAN_PURPOSE_PREFIX = 'loan_purpose_'
+
+
+def derive_features(annual_income, monthly_debt, loan_amount, credit_history_length):
+    """Ratio features from arrays, Series or numpy scalars of the raw inputs"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        monthly_income = annual_income / 12
+        return {
+            'debt_to_income_ratio': (monthly_debt * 12) / annual_income,
+            'credit_to_income_ratio': loan_amount / annual_income,
+            'monthly_income': monthly_income,
+            'debt_burden': (monthly_debt / monthly_income) * 100,
+            'credit_quality_score': credit_history_length * 10,
+        }
+
+
+class FeatureTransformer:
+    """Raw application fields -> scaled model inputs, in the trained feature order."""
+
+    input_fields = INPUT_FIELDS
+
+    def __init__(self, features, defaults, loan_purpose_categories, mean=None, scale=None):
+        self.features = list(features)
+        self.defaults = dict(defaults)
+        self.loan_purpose_categories = list(loan_purpose_categories)
+        n_features = len(self.features)
+        self.mean = np.zeros(n_features) if mean is None else np.asarray(mean, dtype='float64')
+        self.scale = np.ones(n_features) if scale is None else np.asarray(scale, dtype='float64')
+
+        known = set(NUMERIC_INPUTS) | {f'{col}_encoded' for col in ENCODINGS} | set(DERIVED_FEATURES)
+        for name in self.features:
+            if name not in known and not name.startswith(LOAN_PURPOSE_PREFIX):
+                raise ValueError(f"FeatureTransformer cannot compute feature {name!r}")
+
+    @classmethod
+    def fit(cls, X, scaler=None):
+        """Defaults from a training frame of model features (the ML-ready columns).
+
+        ``scaler`` is the fitted StandardScaler of those columns, applied as
+        part of the transform.
+        """
+        defaults = {col: float(X[col].median()) for col in NUMERIC_INPUTS}
+        for col in ENCODINGS:
+            encoded = f'{col}_encoded'
+            if encoded in X.columns:
+                defaults[encoded] = float(X[encoded].mode()[0])
+        dummies = [col for col in X.columns if col.startswith(LOAN_PURPOSE_PREFIX)]
+        categories = [col[len(LOAN_PURPOSE_PREFIX):] for col in dummies]
+        if dummies:
+            defaults['loan_purpose'] = categories[int(np.argmax(X[dummies].sum().to_numpy()))]
+        return cls(
+            X.columns, defaults, categories,
+            mean=None if scaler is None else scaler.mean_,
+            scale=None if scaler is None else scaler.scale_,
+        )
+
+    def _assemble(self, values, purpose_flags, n_rows):
+        X = np.empty((n_rows, len(self.features)))
+        for i, name in enumerate(self.features):
+            if name.startswith(LOAN_PURPOSE_PREFIX):
+                X[:, i] = purpose_flags(name[len(LOAN_PURPOSE_PREFIX):])
+            else:
+                X[:, i] = values[name]
+        return (X - self.mean) / self.scale
+
+    def transform(self, df):
+        """Model inputs for a frame of raw records, as an (n_records, n_features) array"""
+        values = {}
+        for col in NUMERIC_INPUTS:
+            raw = pd.to_numeric(df[col], errors='coerce') if col in df.columns else pd.Series(np.nan, index=df.index)
+            values[col] = raw.fillna(self.defaults[col]).to_numpy(dtype='float64')
+        for col, mapping in ENCODINGS.items():
+            encoded = f'{col}_encoded'
+            if encoded not in self.defaults:
+                continue
+            raw = df[col].map(mapping) if col in df.columns else pd.Series(np.nan, index=df.index)
+            values[encoded] = raw.astype('float64').fillna(self.defaults[encoded]).to_numpy()
+        derived = derive_features(
+            values['annual_income'], values['monthly_debt'], values['loan_amount'], values['credit_history_length'],
+        )
+        for name, column in derived.items():
+            values[name] = np.where(np.isfinite(column), column, 0.0)
+
+        if 'loan_purpose' in df.columns:
+            purpose = df['loan_purpose'].fillna(self.defaults.get('loan_purpose')).to_numpy()
+        else:
+            purpose = np.full(len(df), self.defaults.get('loan_purpose'), dtype=object)
+        return self._assemble(values, lambda category: purpose == category, len(df))
+
+    def transform_record(self, record):
+        """Model inputs for one record (a mapping of raw fields), as a 1-d array"""
+        values = {}
+        for col in NUMERIC_INPUTS:
+            value = record.get(col)
+            values[col] = self.defaults[col] if value is None else float(value)
+        for col, mapping in ENCODINGS.items():
+            encoded = f'{col}_encoded'
+            if encoded in self.defaults:
+                value = mapping.get(record.get(col))
+                values[encoded] = self.defaults[encoded] if value is None else value
+        derived = derive_features(
+            np.float64(values['annual_income']), values['monthly_debt'],
+            values['loan_amount'], values['credit_history_length'],
+        )
+        for name, value in derived.items():
+            values[name] = float(value) if np.isfinite(value) else 0.0
+
+        purpose = record.get('loan_purpose') or self.defaults.get('loan_purpose')
+        row = [
+            float(name[len(LOAN_PURPOSE_PREFIX):] == purpose) if name.startswith(LOAN_PURPOSE_PREFIX)
+            else values[name]
+            for name in self.features
+        ]
+        return (np.array(row) - self.mean) / self.scale
+
+    def to_dict(self):
+        return {
+            'features': self.features,
+            'defaults': self.defaults,
+            'loan_purpose_categories': self.loan_purpose_categories,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+        }
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(**json.load(f))
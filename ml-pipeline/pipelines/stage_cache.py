@@ -0,0 +1,249 @@
+"""
+Content-addressed cache of pipeline stage outputs.
+
+A stage's key is the SHA-256 of its name, the digests of its input files,
+the source of the modules that implement it and its parameters (including
+the versions of the libraries that shape its output). A stage whose key is
+already cached copies its stored outputs back instead of running, so e.g.
+changing a training parameter reruns training but not cleaning.
+
+Entries live under ``data/cache/<key>/`` with a ``manifest.json``. File
+digests are remembered by (size, mtime) so unchanged inputs are not re-read
+on every run.
+
+Usage:
+    python pipelines/stage_cache.py list
+    python pipelines/stage_cache.py show <key>
+    python pipelines/stage_cache.py evict [KEY ...] [--stage clean] [--older-than-days 7] [--max-size-mb 500]
+    python pipelines/stage_cache.py clear
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache'
+)
+
+# Bump when the key or entry layout changes
+CACHE_FORMAT = 1
+
+
+def source_hash(*modules):
+    """Digest of the source files of ``modules``"""
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(inspect.getsourcefile(module), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class StageCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR):
+        self.root = root
+        self._digests = None
+
+    def _digest_memo_path(self):
+        return os.path.join(self.root, 'file_digests.json')
+
+    def file_digest(self, path):
+        """SHA-256 of a file's contents, remembered by (size, mtime)"""
+        if self._digests is None:
+            try:
+                with open(self._digest_memo_path()) as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        memo = self._digests.get(path)
+        if memo and memo['size'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['sha256']
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self._digests[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._digest_memo_path(), 'w') as f:
+            json.dump(self._digests, f)
+        return digest.hexdigest()
+
+    def key(self, stage, inputs, code, params):
+        """Cache key of a stage run.
+
+        ``inputs`` are file paths (their contents count, not their names),
+        ``code`` a source digest from ``source_hash`` and ``params`` a
+        JSON-serializable dict.
+        """
+        payload = {
+            'format': CACHE_FORMAT,
+            'stage': stage,
+            'inputs': [self.file_digest(path) for path in inputs],
+            'code': code,
+            'params': params,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.root, key)
+
+    def lookup(self, key):
+        """Manifest of a cached entry, or None"""
+        try:
+            with open(os.path.join(self.entry_dir(key), 'manifest.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, stage, outputs, params=None):
+        """Copy ``outputs`` (file paths) into a new entry; returns its manifest"""
+        os.makedirs(self.root, exist_ok=True)
+        staging = os.path.join(self.root, f".tmp-{key}-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        files = []
+        for path in outputs:
+            name = os.path.basename(path)
+            shutil.copy2(path, os.path.join(staging, name))
+            files.append({'name': name, 'bytes': os.path.getsize(path)})
+        now = time.time()
+        manifest = {
+            'key': key,
+            'stage': stage,
+            'params': params or {},
+            'files': files,
+            'bytes': sum(f['bytes'] for f in files),
+            'created': now,
+            'last_used': now,
+        }
+        with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        try:
+            os.replace(staging, self.entry_dir(key))
+        except OSError:
+            # Stored concurrently by another run; keep that one
+            shutil.rmtree(staging, ignore_errors=True)
+        return manifest
+
+    def restore(self, key, target_dir, rename=None):
+        """Copy a cached entry's files into ``target_dir``; returns their paths.
+
+        ``rename`` maps a stored file name to the name to restore it as.
+        """
+        manifest = self.lookup(key)
+        if manifest is None:
+            raise KeyError(key)
+        os.makedirs(target_dir, exist_ok=True)
+        paths = []
+        for f in manifest['files']:
+            path = os.path.join(target_dir, rename(f['name']) if rename else f['name'])
+            shutil.copy2(os.path.join(self.entry_dir(key), f['name']), path)
+            paths.append(path)
+        manifest['last_used'] = time.time()
+        with open(os.path.join(self.entry_dir(key), 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        return paths
+
+    def entries(self):
+        """Manifests of every entry, most recently used first"""
+        if not os.path.isdir(self.root):
+            return []
+        manifests = [self.lookup(name) for name in os.listdir(self.root) if not name.startswith('.')]
+        return sorted((m for m in manifests if m), key=lambda m: m['last_used'], reverse=True)
+
+    def evict(self, keys=None, stage=None, older_than=None, max_bytes=None):
+        """Remove entries; returns the removed manifests.
+
+        Removes the given ``keys``, entries of ``stage`` and entries unused
+        for ``older_than`` seconds; then, with ``max_bytes``, the least
+        recently used entries until the cache fits.
+        """
+        entries = self.entries()
+        now = time.time()
+        removed = [
+            m for m in entries
+            if (keys and m['key'] in keys)
+            or (stage and m['stage'] == stage)
+            or (older_than is not None and now - m['last_used'] > older_than)
+        ]
+        if max_bytes is not None:
+            kept = [m for m in entries if m not in removed]
+            total = sum(m['bytes'] for m in kept)
+            for m in reversed(kept):
+                if total <= max_bytes:
+                    break
+                removed.append(m)
+                total -= m['bytes']
+        for m in removed:
+            shutil.rmtree(self.entry_dir(m['key']), ignore_errors=True)
+        return removed
+
+    def clear(self):
+        removed = self.entries()
+        shutil.rmtree(self.root, ignore_errors=True)
+        self._digests = None
+        return removed
+
+
+def _describe(manifest):
+    used = datetime.fromtimestamp(manifest['last_used']).strftime('%Y-%m-%d %H:%M:%S')
+    return (f"{manifest['key'][:16]}  {manifest['stage']:<8} {manifest['bytes'] / 1e6:>9.1f} MB  "
+            f"{len(manifest['files']):>4} files  last used {used}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="List cached entries")
+    show = commands.add_parser("show", help="Print an entry's manifest")
+    show.add_argument("key", help="Key or unique key prefix")
+    evict = commands.add_parser("evict", help="Remove entries")
+    evict.add_argument("keys", nargs="*", help="Keys or unique key prefixes")
+    evict.add_argument("--stage", default=None)
+    evict.add_argument("--older-than-days", type=float, default=None)
+    evict.add_argument("--max-size-mb", type=float, default=None)
+    commands.add_parser("clear", help="Remove every entry")
+    args = parser.parse_args(argv)
+
+    cache = StageCache(args.cache_dir)
+    entries = cache.entries()
+
+    def resolve(prefix):
+        matches = [m['key'] for m in entries if m['key'].startswith(prefix)]
+        if len(matches) != 1:
+            parser.error(f"{prefix!r} matches {len(matches)} entries")
+        return matches[0]
+
+    if args.command == "list":
+        for manifest in entries:
+            print(_describe(manifest))
+        print(f"{len(entries)} entries, {sum(m['bytes'] for m in entries) / 1e6:.1f} MB in {cache.root}")
+    elif args.command == "show":
+        print(json.dumps(cache.lookup(resolve(args.key)), indent=2))
+    elif args.command == "evict":
+        removed = cache.evict(
+            keys={resolve(key) for key in args.keys},
+            stage=args.stage,
+            older_than=None if args.older_than_days is None else args.older_than_days * 86400,
+            max_bytes=None if args.max_size_mb is None else args.max_size_mb * 1e6,
+        )
+        for manifest in removed:
+            print(f"Evicted {_describe(manifest)}")
+        print(f"{len(removed)} entries evicted")
+    else:
+        removed = cache.clear()
+        print(f"{len(removed)} entries removed")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
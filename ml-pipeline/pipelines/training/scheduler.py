@@ -0,0 +1,181 @@
+"""
+Concurrent training of candidate models under a CPU budget.
+
+The prepared train/test matrices are copied once into a shared-memory block;
+each candidate is fitted in a worker process that maps that block instead of
+receiving a pickled copy. The core budget is split between the candidates
+that run at the same time and handed to each library's own thread setting
+(``n_jobs``), so concurrent fits do not oversubscribe the machine.
+
+Cross-validation uses the same pool: the rows are stored once, grouped by
+fold, so a worker's validation fold is a slice of the shared block and its
+training rows are the two slices around it.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+
+
+class SharedArrays:
+    """Numpy arrays in one shared-memory block, attachable from other processes by ``spec``"""
+
+    def __init__(self, arrays):
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        self.shm = SharedMemory(create=True, size=max(sum(a.nbytes for a in arrays.values()), 1))
+        self.spec = {'name': self.shm.name, 'arrays': {}}
+        offset = 0
+        for name, values in arrays.items():
+            view = np.ndarray(values.shape, dtype=values.dtype, buffer=self.shm.buf, offset=offset)
+            view[...] = values
+            self.spec['arrays'][name] = (offset, values.shape, values.dtype.str)
+            offset += values.nbytes
+
+    @staticmethod
+    def attach(spec):
+        """(shared memory, {name: read-only view}); close the memory once the views are gone"""
+        # Pool workers share the parent's resource tracker, so attaching
+        # does not make them owners of the block
+        shm = SharedMemory(spec['name'])
+        arrays = {}
+        for name, (offset, shape, dtype) in spec['arrays'].items():
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            view.flags.writeable = False
+            arrays[name] = view
+        return shm, arrays
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def allocate_threads(n_candidates, cores):
+    """(concurrent fits, threads for each candidate) for a budget of ``cores``.
+
+    At most ``cores`` candidates run at once; the cores are split evenly
+    between them, remainder to the first ones.
+    """
+    concurrency = max(1, min(n_candidates, cores))
+    base, extra = divmod(max(cores, concurrency), concurrency)
+    slot_threads = [base + (1 if slot < extra else 0) for slot in range(concurrency)]
+    return concurrency, [slot_threads[i % concurrency] for i in range(n_candidates)]
+
+
+def _fit_candidate(name, factory, n_jobs, spec):
+    shm, arrays = SharedArrays.attach(spec)
+    try:
+        model = factory(n_jobs=n_jobs)
+        started = time.perf_counter()
+        model.fit(arrays['X_train'], arrays['y_train'])
+        elapsed = time.perf_counter() - started
+        y_pred = model.predict(arrays['X_test'])
+        y_pred_proba = model.predict_proba(arrays['X_test'])[:, 1]
+    finally:
+        del arrays
+        shm.close()
+    return name, model, elapsed, y_pred, y_pred_proba
+
+
+def train_concurrently(candidates, X_train, y_train, X_test, cores=None):
+    """Fit ``candidates`` ({name: factory(n_jobs) -> estimator}) at the same time.
+
+    Returns a dict per candidate with the fitted ``model``, its ``threads``,
+    ``fit_seconds`` and test-set ``y_pred``/``y_pred_proba``, plus the
+    wall-clock seconds of the whole run. Models are fitted on plain arrays,
+    in feature order.
+    """
+    cores = cores or os.cpu_count() or 1
+    names = list(candidates)
+    concurrency, threads = allocate_threads(len(names), cores)
+    threads = dict(zip(names, threads))
+
+    started = time.perf_counter()
+    with SharedArrays({
+        'X_train': np.asarray(X_train, dtype='float64'),
+        'y_train': np.asarray(y_train),
+        'X_test': np.asarray(X_test, dtype='float64'),
+    }) as shared:
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(_fit_candidate, name, candidates[name], threads[name], shared.spec)
+                for name in names
+            ]
+            results = [future.result() for future in futures]
+    wall_clock = time.perf_counter() - started
+
+    trained = {
+        name: {
+            'model': model, 'threads': threads[name], 'fit_seconds': elapsed,
+            'y_pred': y_pred, 'y_pred_proba': y_pred_proba,
+        }
+        for name, model, elapsed, y_pred, y_pred_proba in results
+    }
+    return trained, wall_clock
+
+
+def _fit_fold(name, factory, n_jobs, spec, fold, start, stop):
+    shm, arrays = SharedArrays.attach(spec)
+    X, y = arrays['X'], arrays['y']
+    try:
+        # The estimators take one array, so the slices around the fold are
+        # joined once; the validation fold itself is a view
+        X_fit = np.concatenate((X[:start], X[stop:]))
+        y_fit = np.concatenate((y[:start], y[stop:]))
+        model = factory(n_jobs=n_jobs)
+        started = time.perf_counter()
+        model.fit(X_fit, y_fit)
+        elapsed = time.perf_counter() - started
+        y_pred = model.predict(X[start:stop])
+        y_pred_proba = model.predict_proba(X[start:stop])[:, 1]
+        y_valid = y[start:stop].copy()
+    finally:
+        del arrays, X, y
+        shm.close()
+    return name, fold, elapsed, y_valid, y_pred, y_pred_proba
+
+
+def cross_validate(candidates, X, y, n_folds=5, cores=None, seed=42):
+    """Stratified k-fold cross-validation of ``candidates``, every fit in parallel.
+
+    Each (candidate, fold) pair is one job; up to ``cores`` run at once,
+    sharing the cores between them. Returns {name: [fold result, ...]} with
+    each fold's ``fit_seconds``, validation ``y_true`` and
+    ``y_pred``/``y_pred_proba``, plus the wall-clock seconds of the run.
+    """
+    cores = cores or os.cpu_count() or 1
+    X = np.asarray(X, dtype='float64')
+    y = np.asarray(y)
+    folds = [valid for _, valid in StratifiedKFold(n_folds, shuffle=True, random_state=seed).split(X, y)]
+    order = np.concatenate(folds)
+    bounds = np.cumsum([0] + [len(valid) for valid in folds])
+
+    jobs = [(name, fold) for name in candidates for fold in range(n_folds)]
+    concurrency, threads = allocate_threads(len(jobs), cores)
+
+    started = time.perf_counter()
+    with SharedArrays({'X': X[order], 'y': y[order]}) as shared:
+        with ProcessPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(_fit_fold, name, candidates[name], n_jobs, shared.spec,
+                            fold, bounds[fold], bounds[fold + 1])
+                for (name, fold), n_jobs in zip(jobs, threads)
+            ]
+            results = [future.result() for future in futures]
+    wall_clock = time.perf_counter() - started
+
+    scores = {name: [None] * n_folds for name in candidates}
+    for name, fold, elapsed, y_valid, y_pred, y_pred_proba in results:
+        scores[name][fold] = {
+            'fit_seconds': elapsed, 'y_true': y_valid, 'y_pred': y_pred, 'y_pred_proba': y_pred_proba,
+        }
+    return scores, wall_clock
@@ -0,0 +1,249 @@
+"""
+Time-budgeted hyperparameter search with asynchronous successive halving (ASHA).
+
+Each model family gets its own ASHA: trials start with ``min_rounds``
+boosting rounds and the best ``1/eta`` of each rung are promoted to ``eta``
+times more rounds, up to ``max_rounds``. Every run uses early stopping on a
+validation split, so a trial that stops before its budget is final and is
+promoted without retraining. Trials run in a process pool until the
+wall-clock budget is spent; running trials are allowed to finish.
+
+Workers map the fit/validation arrays from shared memory and build the
+``xgb.DMatrix``/``lgb.Dataset`` once per process, then reuse them for every
+trial they run; LightGBM datasets are built with ``feature_pre_filter`` off
+so that trials may change ``min_child_samples``.
+
+Parameter names follow the scikit-learn wrappers (LightGBM and XGBoost also
+accept them as native aliases), so tuned parameters go straight to
+``make_xgboost``/``make_lightgbm``.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from pipelines.training.scheduler import SharedArrays, allocate_threads
+
+# name -> (kind, low, high); 'log' samples log-uniformly, 'int' uniformly over integers
+SEARCH_SPACES = {
+    'xgboost': {
+        'max_depth': ('int', 3, 10),
+        'learning_rate': ('log', 0.01, 0.3),
+        'subsample': ('float', 0.6, 1.0),
+        'colsample_bytree': ('float', 0.5, 1.0),
+        'min_child_weight': ('log', 0.5, 20.0),
+        'reg_lambda': ('log', 1e-3, 10.0),
+    },
+    'lightgbm': {
+        'num_leaves': ('int', 15, 255),
+        'max_depth': ('int', 3, 12),
+        'learning_rate': ('log', 0.01, 0.3),
+        'subsample': ('float', 0.6, 1.0),
+        'colsample_bytree': ('float', 0.5, 1.0),
+        'min_child_samples': ('int', 5, 100),
+        'reg_lambda': ('log', 1e-3, 10.0),
+    },
+}
+
+# Always part of a family's parameters; bagging needs a frequency in LightGBM
+FIXED_PARAMS = {
+    'xgboost': {},
+    'lightgbm': {'subsample_freq': 1},
+}
+
+EARLY_STOPPING_ROUNDS = 25
+
+
+def sample_params(space, rng):
+    params = {}
+    for name, (kind, low, high) in space.items():
+        if kind == 'int':
+            params[name] = int(rng.integers(low, high + 1))
+        elif kind == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+class ASHA:
+    """Asynchronous successive halving over boosting rounds for one model family."""
+
+    def __init__(self, space, min_rounds=25, max_rounds=675, eta=3, max_trials=50, seed=42):
+        self.space = space
+        self.eta = eta
+        self.max_trials = max_trials
+        self.rng = np.random.default_rng(seed)
+        self.rungs = [min_rounds]
+        while self.rungs[-1] * eta <= max_rounds:
+            self.rungs.append(self.rungs[-1] * eta)
+        self.trials = []
+        # Per rung: {trial id: result}, and the trial ids promoted out of it
+        self.results = [{} for _ in self.rungs]
+        self.promoted = [set() for _ in self.rungs]
+
+    def next_job(self):
+        """(trial id, rung) to run next, or None when waiting on running trials"""
+        for rung in reversed(range(len(self.rungs) - 1)):
+            done = self.results[rung]
+            top = sorted(done, key=lambda trial: done[trial]['score'], reverse=True)[:len(done) // self.eta]
+            for trial in top:
+                if trial not in self.promoted[rung]:
+                    self.promoted[rung].add(trial)
+                    return trial, rung + 1
+        if len(self.trials) < self.max_trials:
+            self.trials.append(sample_params(self.space, self.rng))
+            return len(self.trials) - 1, 0
+        return None
+
+    def report(self, trial, rung, result):
+        self.results[rung][trial] = result
+
+    def previous_result(self, trial, rung):
+        """The trial's result one rung down when it already stopped early there"""
+        if rung == 0:
+            return None
+        result = self.results[rung - 1].get(trial)
+        return result if result is not None and result['stopped_early'] else None
+
+    def best(self):
+        """(params, result) of the best trial at the highest rung that has results"""
+        for rung in reversed(range(len(self.rungs))):
+            done = self.results[rung]
+            if done:
+                trial = max(done, key=lambda trial: done[trial]['score'])
+                return self.trials[trial], done[trial]
+        return None, None
+
+
+# Per worker process: shared arrays and the training matrices built from them
+_WORKER = {}
+
+
+def _init_worker(spec):
+    _WORKER['shm'], _WORKER['arrays'] = SharedArrays.attach(spec)
+
+
+def _matrices(family):
+    if family not in _WORKER:
+        arrays = _WORKER['arrays']
+        if family == 'xgboost':
+            import xgboost as xgb
+            _WORKER[family] = (
+                xgb.DMatrix(arrays['X_fit'], label=arrays['y_fit']),
+                xgb.DMatrix(arrays['X_valid'], label=arrays['y_valid']),
+            )
+        else:
+            import lightgbm as lgb
+            dataset_params = {'feature_pre_filter': False, 'verbose': -1}
+            train = lgb.Dataset(arrays['X_fit'], label=arrays['y_fit'], params=dataset_params, free_raw_data=False)
+            valid = lgb.Dataset(arrays['X_valid'], label=arrays['y_valid'], params=dataset_params, reference=train)
+            _WORKER[family] = (train, valid)
+    return _WORKER[family]
+
+
+def _run_trial(family, params, rounds, n_jobs, seed):
+    """Validation AUC of one trial; returns its result dict"""
+    train, valid = _matrices(family)
+    started = time.perf_counter()
+    if family == 'xgboost':
+        import xgboost as xgb
+        booster = xgb.train(
+            {'objective': 'binary:logistic', 'eval_metric': 'auc', 'tree_method': 'hist',
+             'nthread': n_jobs, 'seed': seed, **params},
+            train, num_boost_round=rounds, evals=[(valid, 'valid')],
+            early_stopping_rounds=EARLY_STOPPING_ROUNDS, verbose_eval=False,
+        )
+        score, best_iteration = booster.best_score, booster.best_iteration
+    else:
+        import lightgbm as lgb
+        booster = lgb.train(
+            {'objective': 'binary', 'metric': 'auc', 'verbose': -1, 'num_threads': n_jobs,
+             'seed': seed, **FIXED_PARAMS[family], **params},
+            train, num_boost_round=rounds, valid_sets=[valid], valid_names=['valid'],
+            callbacks=[lgb.early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+        )
+        score, best_iteration = booster.best_score['valid']['auc'], booster.best_iteration - 1
+    return {
+        'score': float(score),
+        'rounds': rounds,
+        'best_iteration': int(best_iteration),
+        'stopped_early': best_iteration + 1 + EARLY_STOPPING_ROUNDS <= rounds,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+def search(families, X_fit, y_fit, X_valid, y_valid, time_budget=300, cores=None, workers=None,
+           min_rounds=25, max_rounds=675, eta=3, max_trials=50, seed=42, log=print):
+    """Run ASHA for each of ``families`` within ``time_budget`` seconds.
+
+    Returns {family: {'params', 'n_estimators', 'score', 'trials', 'jobs'}}
+    where ``n_estimators`` is the best trial's early-stopped round count.
+    """
+    cores = cores or 1
+    workers = workers or cores
+    concurrency, threads = allocate_threads(workers, cores)
+    n_jobs = min(threads)
+    schedulers = {
+        family: ASHA(SEARCH_SPACES[family], min_rounds, max_rounds, eta, max_trials, seed)
+        for family in families
+    }
+    jobs = {family: 0 for family in families}
+    deadline = time.monotonic() + time_budget
+
+    shared = SharedArrays({
+        'X_fit': np.asarray(X_fit, dtype='float32'), 'y_fit': np.asarray(y_fit, dtype='float32'),
+        'X_valid': np.asarray(X_valid, dtype='float32'), 'y_valid': np.asarray(y_valid, dtype='float32'),
+    })
+    try:
+        with ProcessPoolExecutor(max_workers=concurrency, initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            running = {}
+            order = list(families)
+            while True:
+                waiting = set()
+                while len(running) < concurrency and time.monotonic() < deadline and len(waiting) < len(order):
+                    family = order[0]
+                    order.append(order.pop(0))
+                    if family in waiting:
+                        continue
+                    job = schedulers[family].next_job()
+                    if job is None:
+                        waiting.add(family)
+                        continue
+                    trial, rung = job
+                    previous = schedulers[family].previous_result(trial, rung)
+                    if previous is not None:
+                        # Stopped early below this rung: more rounds change nothing
+                        schedulers[family].report(trial, rung, previous)
+                        continue
+                    rounds = schedulers[family].rungs[rung]
+                    params = schedulers[family].trials[trial]
+                    future = pool.submit(_run_trial, family, params, rounds, n_jobs, seed)
+                    running[future] = (family, trial, rung)
+                    jobs[family] += 1
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    family, trial, rung = running.pop(future)
+                    result = future.result()
+                    schedulers[family].report(trial, rung, result)
+                    log(f"  {family:<9} trial {trial:>3} rung {rung} ({result['rounds']:>4} rounds): "
+                        f"AUC {result['score']:.4f} in {result['seconds']:.1f}s")
+    finally:
+        shared.close()
+
+    results = {}
+    for family, scheduler in schedulers.items():
+        params, best = scheduler.best()
+        if params is None:
+            continue
+        results[family] = {
+            'params': {**FIXED_PARAMS[family], **params},
+            'n_estimators': best['best_iteration'] + 1,
+            'score': best['score'],
+            'trials': len(scheduler.trials),
+            'jobs': jobs[family],
+        }
+    return results
@@ -5,40 +5,149 @@ Trains XGBoost, LightGBM, and CatBoost models for credit scoring
 
 import pandas as pd
 import numpy as np
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import (
     roc_auc_score, accuracy_score, precision_score, 
     recall_score, f1_score, classification_report, confusion_matrix
 )
+import sklearn
 import xgboost as xgb
 import lightgbm as lgb
 # from catboost import CatBoostClassifier
 import joblib
 from datetime import datetime
+from functools import partial
+import argparse
 import json
 import os
 import sys
+import time
+
+# Add the ml-pipeline directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from pipelines.feature_engineering.data_cleaner import ML_FEATURES, part_paths
+from pipelines.feature_engineering.storage import read_table, table_columns
+from pipelines.feature_engineering import data_cleaner, storage, transformer
+from pipelines.feature_engineering.transformer import FeatureTransformer
+from pipelines.stage_cache import DEFAULT_CACHE_DIR, StageCache, source_hash
+from pipelines.training import scheduler
+from pipelines.training.scheduler import cross_validate, train_concurrently
+from pipelines.training.search import search
+from pipelines.training.warm_start import (
+    boosted_rounds, continue_training, latest_saved_files, latest_saved_models, update_scaler,
+)
+
+
+XGBOOST_PARAMS = dict(
+    n_estimators=100,
+    max_depth=6,
+    learning_rate=0.1,
+    subsample=0.8,
+    colsample_bytree=0.8,
+    random_state=42,
+    eval_metric='logloss'
+)
+
+LIGHTGBM_PARAMS = dict(
+    n_estimators=100,
+    max_depth=6,
+    learning_rate=0.1,
+    random_state=42,
+    verbose=-1
+)
+
+
+def make_xgboost(n_jobs=None, **params):
+    """XGBoost classifier; ``params`` override the defaults (e.g. tuned ones)"""
+    return xgb.XGBClassifier(**{**XGBOOST_PARAMS, **params}, n_jobs=n_jobs)
+
+
+def make_lightgbm(n_jobs=None, **params):
+    """LightGBM classifier; ``params`` override the defaults (e.g. tuned ones)"""
+    return lgb.LGBMClassifier(**{**LIGHTGBM_PARAMS, **params}, n_jobs=n_jobs)
+
+
+# Candidate models: name -> (display name, factory taking a thread count)
+CANDIDATES = {
+    'xgboost': ('XGBoost', make_xgboost),
+    'lightgbm': ('LightGBM', make_lightgbm),
+}
+
+
+def classification_metrics(y_true, y_pred, y_pred_proba):
+    return {
+        'accuracy': accuracy_score(y_true, y_pred),
+        'precision': precision_score(y_true, y_pred, zero_division=0),
+        'recall': recall_score(y_true, y_pred, zero_division=0),
+        'f1_score': f1_score(y_true, y_pred, zero_division=0),
+        'roc_auc': roc_auc_score(y_true, y_pred_proba) if len(np.unique(y_true)) > 1 else 0.0
+    }
+
 
 class CreditScoringTrainer:
-    def __init__(self, data_path, model_save_path):
+    def __init__(self, data_path, model_save_path, cache=None, concurrent=False, cores=None,
+                 search=False, search_budget=300, search_workers=None, cv_folds=None,
+                 warm_start=False, warm_start_rounds=None, history_path=None, guardrail_tolerance=0.005):
         self.data_path = data_path
         self.model_save_path = model_save_path
+        # Train the candidates in parallel processes, splitting ``cores``
+        # (default: all) between them; otherwise one after another
+        self.concurrent = concurrent
+        self.cores = cores
+        self.training_time = None
+        # Tune the candidates with ASHA for ``search_budget`` seconds first
+        self.search = search
+        self.search_budget = search_budget
+        self.search_workers = search_workers
+        self.search_results = None
+        self.candidates = dict(CANDIDATES)
+        # Stratified k-fold CV on the training set; the best model is then
+        # chosen by mean CV ROC-AUC instead of the single test split
+        self.cv_folds = cv_folds
+        self.cv_metrics = {}
+        # Continue the latest saved models for ``warm_start_rounds`` (default:
+        # in proportion to the new rows) on this data instead of training
+        # from scratch. Guardrails compare them on the holdout with a full
+        # retrain on ``history_path`` (the previous training data) plus this
+        # data, or else with the previous models.
+        self.warm_start = warm_start
+        self.warm_start_rounds = warm_start_rounds
+        self.history_path = history_path
+        self.guardrail_tolerance = guardrail_tolerance
+        self.warm_start_info = None
+        # StageCache; a run whose data, code and parameters are cached restores its artifacts
+        self.cache = cache
+        self.saved_files = []
         self.models = {}
         self.scalers = {}
         self.metrics = {}
         self.feature_names = []
+        self.transformer = None
         
-    def load_data(self):
+    def data_files(self, path=None):
+        # The parallel cleaner writes numbered parts instead of a single file
+        path = path or self.data_path
+        return [path] if os.path.exists(path) else part_paths(path)
+    
+    def load_data(self, path=None):
         """Load ML-ready processed data"""
         print("Loading ML-ready data...")
         
-        if not os.path.exists(self.data_path):
-            print(f"ERROR: Data file not found: {self.data_path}")
+        paths = self.data_files(path)
+        if not paths:
+            print(f"ERROR: Data file not found: {path or self.data_path}")
             print("Please run data cleaning pipeline first!")
             sys.exit(1)
-            
-        df = pd.read_csv(self.data_path)
+        
+        # Only the ML columns are read; Parquet/Feather skip the rest on disk
+        columns = [
+            col for col in table_columns(paths[0])
+            if col in ML_FEATURES or col.startswith('loan_purpose_')
+        ]
+        df = pd.concat([read_table(path, columns) for path in paths], ignore_index=True)
         print(f"SUCCESS: Loaded {len(df)} records with {len(df.columns)} features")
         return df
     
@@ -89,24 +198,24 @@ class CreditScoringTrainer:
         
         self.scalers['standard'] = scaler
         
+        # Raw fields -> scaled features for serving, with training defaults
+        self.transformer = FeatureTransformer.fit(X_train, scaler)
+        
         return X_train_scaled, X_test_scaled, y_train, y_test
     
     def evaluate_model(self, model, X_test, y_test, model_name):
         """Evaluate model performance"""
-        print(f"\nEvaluating {model_name}...")
-        
         # Predictions
         y_pred = model.predict(X_test)
         y_pred_proba = model.predict_proba(X_test)[:, 1]
+        return self.score_predictions(y_test, y_pred, y_pred_proba, model_name)
+    
+    def score_predictions(self, y_test, y_pred, y_pred_proba, model_name):
+        """Metrics of a model's test-set predictions"""
+        print(f"\nEvaluating {model_name}...")
         
         # Calculate metrics
-        metrics = {
-            'accuracy': accuracy_score(y_test, y_pred),
-            'precision': precision_score(y_test, y_pred, zero_division=0),
-            'recall': recall_score(y_test, y_pred, zero_division=0),
-            'f1_score': f1_score(y_test, y_pred, zero_division=0),
-            'roc_auc': roc_auc_score(y_test, y_pred_proba) if len(np.unique(y_test)) > 1 else 0.0
-        }
+        metrics = classification_metrics(y_test, y_pred, y_pred_proba)
         
         # Confusion matrix
         cm = confusion_matrix(y_test, y_pred)
@@ -122,55 +231,136 @@ class CreditScoringTrainer:
         
         return metrics
     
-    def train_xgboost(self, X_train, y_train, X_test, y_test):
-        """Train XGBoost model"""
+    def train_candidate(self, name, X_train, y_train, X_test, y_test):
+        """Train and evaluate one candidate in this process"""
+        display_name, factory = self.candidates[name]
         print("\n" + "=" * 60)
-        print("Training XGBoost Model")
+        print(f"Training {display_name} Model")
         print("=" * 60)
         
-        model = xgb.XGBClassifier(
-            n_estimators=100,
-            max_depth=6,
-            learning_rate=0.1,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            eval_metric='logloss'
-        )
-        
-        model.fit(X_train, y_train, verbose=False)
+        model = factory(n_jobs=self.cores)
+        model.fit(X_train, y_train)
         
         # Evaluate
-        metrics = self.evaluate_model(model, X_test, y_test, 'XGBoost')
+        metrics = self.evaluate_model(model, X_test, y_test, display_name)
         
-        self.models['xgboost'] = model
-        self.metrics['xgboost'] = metrics
+        self.models[name] = model
+        self.metrics[name] = metrics
         
         return model, metrics
     
+    def train_xgboost(self, X_train, y_train, X_test, y_test):
+        """Train XGBoost model"""
+        return self.train_candidate('xgboost', X_train, y_train, X_test, y_test)
+    
     def train_lightgbm(self, X_train, y_train, X_test, y_test):
         """Train LightGBM model"""
+        return self.train_candidate('lightgbm', X_train, y_train, X_test, y_test)
+    
+    def search_hyperparameters(self, X_train, y_train):
+        """ASHA search over each candidate's parameter space on a validation split of the training set.
+        
+        The best parameters, with the early-stopped number of rounds,
+        replace the candidates' defaults.
+        """
         print("\n" + "=" * 60)
-        print("Training LightGBM Model")
+        print(f"Hyperparameter Search (ASHA, {self.search_budget}s budget)")
         print("=" * 60)
         
-        model = lgb.LGBMClassifier(
-            n_estimators=100,
-            max_depth=6,
-            learning_rate=0.1,
-            random_state=42,
-            verbose=-1
+        X_fit, X_valid, y_fit, y_valid = train_test_split(
+            X_train, y_train, test_size=0.2, random_state=42, stratify=y_train
         )
+        started = time.perf_counter()
+        self.search_results = search(
+            list(self.candidates), X_fit, y_fit, X_valid, y_valid,
+            time_budget=self.search_budget, cores=self.cores or os.cpu_count() or 1,
+            workers=self.search_workers,
+        )
+        print(f"\nSearch finished in {time.perf_counter() - started:.1f}s")
+        
+        for name, result in self.search_results.items():
+            display_name, factory = self.candidates[name]
+            params = {**result['params'], 'n_estimators': result['n_estimators']}
+            self.candidates[name] = (display_name, partial(factory, **params))
+            print(f"\n{display_name}: validation AUC {result['score']:.4f} "
+                  f"({result['trials']} trials, {result['jobs']} runs)")
+            for param, value in params.items():
+                print(f"  {param}: {value}")
+        
+        return self.search_results
+    
+    def cross_validate(self, X_train, y_train):
+        """Stratified k-fold CV of every candidate on the training set, folds in parallel"""
+        cores = self.cores or os.cpu_count() or 1
+        print("\n" + "=" * 60)
+        print(f"{self.cv_folds}-Fold Cross-Validation ({cores} cores)")
+        print("=" * 60)
         
-        model.fit(X_train, y_train)
-        
-        # Evaluate
-        metrics = self.evaluate_model(model, X_test, y_test, 'LightGBM')
-        
-        self.models['lightgbm'] = model
-        self.metrics['lightgbm'] = metrics
-        
-        return model, metrics
+        factories = {name: factory for name, (_, factory) in self.candidates.items()}
+        scores, wall_clock = cross_validate(factories, X_train, y_train, self.cv_folds, cores=cores)
+        
+        for name, folds in scores.items():
+            fold_metrics = [
+                classification_metrics(fold['y_true'], fold['y_pred'], fold['y_pred_proba']) for fold in folds
+            ]
+            self.cv_metrics[name] = {
+                'folds': fold_metrics,
+                'mean': {metric: float(np.mean([m[metric] for m in fold_metrics])) for metric in fold_metrics[0]},
+                'std': {metric: float(np.std([m[metric] for m in fold_metrics])) for metric in fold_metrics[0]},
+                'fit_seconds': [fold['fit_seconds'] for fold in folds],
+            }
+            
+            cv = self.cv_metrics[name]
+            print(f"\n{self.candidates[name][0]}:")
+            for metric in cv['mean']:
+                print(f"  {metric + ':':<10} {cv['mean'][metric]:.4f} +/- {cv['std'][metric]:.4f}")
+        
+        fit_seconds = sum(sum(cv['fit_seconds']) for cv in self.cv_metrics.values())
+        print(f"\nCross-validation wall-clock: {wall_clock:.2f}s (sum of fits {fit_seconds:.2f}s)")
+        return self.cv_metrics
+    
+    def best_model(self):
+        """(name, criterion): by mean CV ROC-AUC when cross-validated, else test ROC-AUC"""
+        if self.cv_metrics:
+            return max(self.cv_metrics, key=lambda name: self.cv_metrics[name]['mean']['roc_auc']), 'CV ROC-AUC'
+        return max(self.metrics.items(), key=lambda x: x[1]['roc_auc'])[0], 'ROC-AUC'
+    
+    def train_candidates(self, X_train, y_train, X_test, y_test):
+        """Train every candidate, one after another or concurrently"""
+        if not self.concurrent:
+            for name in self.candidates:
+                self.train_candidate(name, X_train, y_train, X_test, y_test)
+            return
+        
+        cores = self.cores or os.cpu_count() or 1
+        print("\n" + "=" * 60)
+        print(f"Training {len(self.candidates)} Models Concurrently ({cores} cores)")
+        print("=" * 60)
+        factories = {name: factory for name, (_, factory) in self.candidates.items()}
+        trained, wall_clock = train_concurrently(factories, X_train, y_train, X_test, cores=cores)
+        
+        for name, result in trained.items():
+            display_name = self.candidates[name][0]
+            self.models[name] = result['model']
+            self.metrics[name] = self.score_predictions(
+                y_test, result['y_pred'], result['y_pred_proba'], display_name,
+            )
+        
+        print("\nTraining time:")
+        for name, result in trained.items():
+            print(f"  {self.candidates[name][0]:<10} {result['fit_seconds']:7.2f}s  ({result['threads']} threads)")
+        # The fits' total is what running them back to back at these thread
+        # counts would take; benchmarks/bench_training.py times a real
+        # sequential run with every model using all cores
+        sequential = sum(result['fit_seconds'] for result in trained.values())
+        print(f"  Wall-clock:            {wall_clock:7.2f}s")
+        print(f"  Sum of fits:           {sequential:7.2f}s  ({sequential / wall_clock:.2f}x)")
+        self.training_time = {
+            'wall_clock_seconds': wall_clock,
+            'sequential_seconds': sequential,
+            'fit_seconds': {name: result['fit_seconds'] for name, result in trained.items()},
+            'threads': {name: result['threads'] for name, result in trained.items()},
+        }
     
     # def train_catboost(self, X_train, y_train, X_test, y_test):
     #     """Train CatBoost model"""
@@ -196,6 +386,143 @@ class CreditScoringTrainer:
         
     #     return model, metrics
     
+    def load_previous(self):
+        """The latest saved models and scaler to warm-start from, or None"""
+        previous = latest_saved_models(self.model_save_path)
+        if previous is None:
+            print("\nNo saved models to warm-start from; training from scratch")
+            return None
+        model_info, models, scaler = previous
+        if model_info['feature_names'] != self.feature_names:
+            print("\nSaved models use different features; training from scratch")
+            return None
+        print(f"\nWarm-starting from the models saved at {model_info['timestamp']}")
+        return previous
+    
+    def warm_start_candidates(self, X, y, previous):
+        """Continue the previous models on the new data's training split.
+        
+        The previous scaler's running statistics take in the new training
+        rows. Without ``warm_start_rounds`` each model gets rounds in
+        proportion to the new rows' share of all rows seen, so a small
+        slice does not outweigh the history. Returns the unscaled split for
+        the guardrails.
+        """
+        model_info, previous_models, previous_scaler = previous
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=y
+        )
+        print(f"Training set: {len(X_train)} new samples")
+        print(f"Test set: {len(X_test)} new samples")
+        
+        scaler = update_scaler(previous_scaler, X_train)
+        self.scalers['standard'] = scaler
+        self.transformer = FeatureTransformer.fit(X_train, scaler)
+        X_train_scaled = pd.DataFrame(scaler.transform(X_train), columns=self.feature_names)
+        X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=self.feature_names)
+        
+        previous_samples = int(np.max(previous_scaler.n_samples_seen_))
+        rounds = {}
+        fit_seconds = {}
+        for name, model in previous_models.items():
+            display_name = self.candidates[name][0]
+            rounds[name] = self.warm_start_rounds or max(1, round(boosted_rounds(model) * len(X_train) / previous_samples))
+            print("\n" + "=" * 60)
+            print(f"Warm-starting {display_name} ({boosted_rounds(model)} + {rounds[name]} rounds)")
+            print("=" * 60)
+            
+            started = time.perf_counter()
+            self.models[name] = continue_training(
+                model, X_train_scaled, y_train, rounds[name], previous_scaler, scaler, n_jobs=self.cores,
+            )
+            fit_seconds[name] = time.perf_counter() - started
+            self.metrics[name] = self.evaluate_model(self.models[name], X_test_scaled, y_test, display_name)
+        
+        self.training_time = {'fit_seconds': fit_seconds}
+        self.warm_start_info = {
+            'from': model_info['timestamp'],
+            'rounds': rounds,
+            'previous_samples': previous_samples,
+            'new_samples': len(X_train),
+        }
+        return X_train, X_test, y_train, y_test
+    
+    def check_guardrails(self, previous, X_train, y_train, X_test, y_test):
+        """Compare the warm-started models with a baseline on the new holdout.
+        
+        The baseline is a full retrain from scratch on the history plus the
+        new training rows when ``history_path`` is set (it replaces a model
+        that falls more than ``guardrail_tolerance`` ROC-AUC behind), else
+        the previous model. Returns False when a model falls behind and
+        there is no full retrain to replace it.
+        """
+        _, previous_models, previous_scaler = previous
+        scaler = self.scalers['standard']
+        print("\n" + "=" * 60)
+        print(f"Guardrails ({len(X_test)} holdout samples, tolerance {self.guardrail_tolerance} ROC-AUC)")
+        print("=" * 60)
+        
+        if self.history_path:
+            history = self.load_data(self.history_path)
+            X_full = pd.concat([history[self.feature_names], X_train], ignore_index=True)
+            y_full = pd.concat([history['default'], y_train], ignore_index=True)
+            X_full_scaled = pd.DataFrame(scaler.transform(X_full), columns=self.feature_names)
+        X_test_scaled = pd.DataFrame(scaler.transform(X_test), columns=self.feature_names)
+        
+        passed = True
+        guardrails = {}
+        for name, model in list(self.models.items()):
+            display_name = self.candidates[name][0]
+            previous_proba = previous_models[name].predict_proba(
+                pd.DataFrame(previous_scaler.transform(X_test), columns=self.feature_names)
+            )[:, 1]
+            result = {
+                'warm_start_roc_auc': self.metrics[name]['roc_auc'],
+                'warm_start_seconds': self.training_time['fit_seconds'][name],
+                'previous_roc_auc': roc_auc_score(y_test, previous_proba),
+            }
+            
+            if self.history_path:
+                # Same parameters and number of trees, from scratch
+                full_model = clone(model).set_params(n_estimators=boosted_rounds(model), n_jobs=self.cores)
+                started = time.perf_counter()
+                full_model.fit(X_full_scaled, y_full)
+                result['full_retrain_seconds'] = time.perf_counter() - started
+                full_metrics = classification_metrics(
+                    y_test, full_model.predict(X_test_scaled), full_model.predict_proba(X_test_scaled)[:, 1],
+                )
+                result['full_retrain_roc_auc'] = full_metrics['roc_auc']
+                baseline = 'full_retrain'
+            else:
+                baseline = 'previous'
+            
+            result['passed'] = result['warm_start_roc_auc'] >= result[f'{baseline}_roc_auc'] - self.guardrail_tolerance
+            result['used'] = 'warm_start'
+            
+            print(f"\n{display_name}:")
+            print(f"  Previous ROC-AUC:     {result['previous_roc_auc']:.4f}")
+            print(f"  Warm-start ROC-AUC:   {result['warm_start_roc_auc']:.4f}  ({result['warm_start_seconds']:.2f}s)")
+            if self.history_path:
+                print(f"  Full retrain ROC-AUC: {result['full_retrain_roc_auc']:.4f}  "
+                      f"({result['full_retrain_seconds']:.2f}s, warm start took "
+                      f"{result['warm_start_seconds'] / result['full_retrain_seconds']:.0%} of it)")
+            
+            if not result['passed']:
+                if self.history_path:
+                    print(f"  WARNING: warm start is behind the full retrain; using the full retrain")
+                    self.models[name] = full_model
+                    self.metrics[name] = full_metrics
+                    result['used'] = 'full_retrain'
+                else:
+                    print(f"  WARNING: warm start is behind the previous model")
+                    passed = False
+            else:
+                print(f"  Passed")
+            guardrails[name] = result
+        
+        self.warm_start_info['guardrails'] = guardrails
+        return passed
+    
     def get_feature_importance(self, model, model_name):
         """Get feature importance"""
         if hasattr(model, 'feature_importances_'):
@@ -226,23 +553,32 @@ class CreditScoringTrainer:
         for model_name, model in self.models.items():
             model_path = os.path.join(self.model_save_path, f"{model_name}_{timestamp}.pkl")
             joblib.dump(model, model_path)
+            self.saved_files.append(model_path)
             print(f"Saved: {model_name} -> {model_path}")
         
         # Save scaler
         scaler_path = os.path.join(self.model_save_path, f"scaler_{timestamp}.pkl")
         joblib.dump(self.scalers['standard'], scaler_path)
+        self.saved_files.append(scaler_path)
         print(f"Saved: scaler -> {scaler_path}")
         
+        # Save feature transformer (used by the backend to build model inputs)
+        transformer_path = os.path.join(self.model_save_path, f"transformer_{timestamp}.json")
+        self.saved_files.append(self.transformer.save(transformer_path))
+        print(f"Saved: transformer -> {transformer_path}")
+        
         # Save metrics
         metrics_path = os.path.join(self.model_save_path, f"metrics_{timestamp}.json")
         with open(metrics_path, 'w') as f:
             json.dump(self.metrics, f, indent=2)
+        self.saved_files.append(metrics_path)
         print(f"Saved: metrics -> {metrics_path}")
         
         # Save feature names
         features_path = os.path.join(self.model_save_path, f"features_{timestamp}.json")
         with open(features_path, 'w') as f:
             json.dump({'features': self.feature_names}, f, indent=2)
+        self.saved_files.append(features_path)
         print(f"Saved: features -> {features_path}")
         
         # Save model info
@@ -252,17 +588,121 @@ class CreditScoringTrainer:
             'num_features': len(self.feature_names),
             'feature_names': self.feature_names,
             'metrics': self.metrics,
-            'best_model': max(self.metrics.items(), key=lambda x: x[1]['roc_auc'])[0]
+            'training_time': self.training_time,
+            'search': self.search_results,
+            'cross_validation': self.cv_metrics or None,
+            'warm_start': self.warm_start_info,
+            'best_model': self.best_model()[0]
         }
         
         info_path = os.path.join(self.model_save_path, f"model_info_{timestamp}.json")
         with open(info_path, 'w') as f:
             json.dump(model_info, f, indent=2)
+        self.saved_files.append(info_path)
         print(f"Saved: model_info -> {info_path}")
         
         return timestamp
     
+    def cache_key(self):
+        """Stage cache key: training data, trainer code and library versions"""
+        params = {
+            'xgboost': xgb.__version__,
+            'lightgbm': lgb.__version__,
+            'sklearn': sklearn.__version__,
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'search': {'budget': self.search_budget, 'workers': self.search_workers} if self.search else None,
+            'cv_folds': self.cv_folds,
+            'warm_start': {
+                'rounds': self.warm_start_rounds, 'tolerance': self.guardrail_tolerance,
+            } if self.warm_start else None,
+        }
+        # Everything that shapes the artifacts: column selection and reading
+        # (data_cleaner, storage), features, fitting, CV, search, warm start
+        code = source_hash(
+            sys.modules[__name__], data_cleaner, storage, transformer, scheduler,
+            sys.modules[search.__module__], sys.modules[continue_training.__module__],
+        )
+        inputs = self.data_files()
+        if self.warm_start:
+            # A warm start depends on the models it continues and the history it is checked against
+            inputs += latest_saved_files(self.model_save_path)
+            if self.history_path:
+                inputs += self.data_files(self.history_path)
+        return self.cache.key('train', inputs, code, params), params
+    
+    def restore_cached(self, key):
+        """Restore a cached run's artifacts and load its models and metrics.
+        
+        The artifacts are restored under a new timestamp, so they become the
+        latest version for the backend and for warm starts, as a fresh run's
+        would.
+        """
+        info_name = next(
+            f['name'] for f in self.cache.lookup(key)['files'] if f['name'].startswith('model_info_')
+        )
+        cached_timestamp = info_name[len('model_info_'):-len('.json')]
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        paths = self.cache.restore(
+            key, self.model_save_path, rename=lambda name: name.replace(cached_timestamp, timestamp),
+        )
+        for path in paths:
+            print(f"Restored: {path}")
+        info_path = os.path.join(self.model_save_path, f"model_info_{timestamp}.json")
+        with open(info_path) as f:
+            model_info = json.load(f)
+        model_info['timestamp'] = timestamp
+        with open(info_path, 'w') as f:
+            json.dump(model_info, f, indent=2)
+        self.metrics = model_info['metrics']
+        self.cv_metrics = model_info.get('cross_validation') or {}
+        self.feature_names = model_info['feature_names']
+        self.models = {
+            name: joblib.load(os.path.join(self.model_save_path, f"{name}_{timestamp}.pkl"))
+            for name in model_info['models']
+        }
+        return timestamp
+    
+    def print_summary(self, timestamp):
+        print("\nModel Performance Summary:")
+        for model_name, metrics in self.metrics.items():
+            print(f"\n{model_name.upper()}:")
+            print(f"  Accuracy:  {metrics['accuracy']:.4f}")
+            print(f"  ROC-AUC:   {metrics['roc_auc']:.4f}")
+            print(f"  F1-Score:  {metrics['f1_score']:.4f}")
+            if model_name in self.cv_metrics:
+                cv = self.cv_metrics[model_name]
+                print(f"  CV ROC-AUC: {cv['mean']['roc_auc']:.4f} +/- {cv['std']['roc_auc']:.4f} "
+                      f"({len(cv['folds'])} folds)")
+        
+        # Best model
+        best_model, criterion = self.best_model()
+        print(f"\nBest Model (by {criterion}): {best_model.upper()}")
+        
+        print(f"\nModels saved with timestamp: {timestamp}")
+        print(f"Location: {self.model_save_path}")
+    
     def run_pipeline(self):
+        """Run the training pipeline, or restore its artifacts from the stage cache"""
+        if self.cache is None:
+            return self.run_stages()
+        
+        key, params = self.cache_key()
+        if self.cache.lookup(key) is not None:
+            print("=" * 60)
+            print(f"CREDIT SCORING MODEL TRAINING: cached artifacts found ({key[:16]})")
+            print("=" * 60)
+            timestamp = self.restore_cached(key)
+            self.print_summary(timestamp)
+            return self.models, self.metrics
+        
+        result = self.run_stages()
+        if self.saved_files:
+            self.cache.store(key, 'train', self.saved_files, params)
+            print(f"Cached artifacts as {key[:16]}")
+        return result
+    
+    def run_stages(self):
         """Run complete training pipeline"""
         print("=" * 60)
         print("CREDIT SCORING MODEL TRAINING PIPELINE")
@@ -274,15 +714,29 @@ class CreditScoringTrainer:
         # Prepare features
         X, y = self.prepare_features(df)
         
-        # Split and scale
-        X_train, X_test, y_train, y_test = self.split_and_scale(X, y)
-        
-        # Train models
-        self.train_xgboost(X_train, y_train, X_test, y_test)
-        self.get_feature_importance(self.models['xgboost'], 'XGBoost')
-        
-        self.train_lightgbm(X_train, y_train, X_test, y_test)
-        self.get_feature_importance(self.models['lightgbm'], 'LightGBM')
+        previous = self.load_previous() if self.warm_start else None
+        if previous is not None:
+            # Continue the saved models; search and CV only apply to full runs
+            X_train, X_test, y_train, y_test = self.warm_start_candidates(X, y, previous)
+            if not self.check_guardrails(previous, X_train, y_train, X_test, y_test):
+                print("\nGuardrails failed: keeping the previous models, nothing saved")
+                return self.models, self.metrics
+        else:
+            # Split and scale
+            X_train, X_test, y_train, y_test = self.split_and_scale(X, y)
+            
+            # Tune hyperparameters
+            if self.search:
+                self.search_hyperparameters(X_train, y_train)
+            
+            # Cross-validate for model selection
+            if self.cv_folds:
+                self.cross_validate(X_train, y_train)
+            
+            # Train models
+            self.train_candidates(X_train, y_train, X_test, y_test)
+        for name, (display_name, _) in self.candidates.items():
+            self.get_feature_importance(self.models[name], display_name)
         
         # self.train_catboost(X_train, y_train, X_test, y_test)
         # self.get_feature_importance(self.models['catboost'], 'CatBoost')
@@ -295,32 +749,60 @@ class CreditScoringTrainer:
         print("TRAINING COMPLETE!")
         print("=" * 60)
         
-        print("\nModel Performance Summary:")
-        for model_name, metrics in self.metrics.items():
-            print(f"\n{model_name.upper()}:")
-            print(f"  Accuracy:  {metrics['accuracy']:.4f}")
-            print(f"  ROC-AUC:   {metrics['roc_auc']:.4f}")
-            print(f"  F1-Score:  {metrics['f1_score']:.4f}")
-        
-        # Best model
-        best_model = max(self.metrics.items(), key=lambda x: x[1]['roc_auc'])[0]
-        print(f"\nBest Model (by ROC-AUC): {best_model.upper()}")
-        
-        print(f"\nModels saved with timestamp: {timestamp}")
-        print(f"Location: {self.model_save_path}")
+        self.print_summary(timestamp)
         
         return self.models, self.metrics
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train credit scoring models")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Stage cache directory")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always retrain, without reading or writing the stage cache")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Train the candidate models at the same time in separate processes")
+    parser.add_argument("--cores", type=int, default=None,
+                        help="CPU cores to split between the models (default: all)")
+    parser.add_argument("--search", action="store_true",
+                        help="Tune hyperparameters with successive halving (ASHA) before training")
+    parser.add_argument("--search-budget", type=float, default=300,
+                        help="Wall-clock budget of the search, in seconds")
+    parser.add_argument("--search-workers", type=int, default=None,
+                        help="Trials run at once (default: one per core)")
+    parser.add_argument("--cv-folds", type=int, default=None,
+                        help="Select the best model by stratified k-fold cross-validation with this many folds")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Continue boosting the latest saved models on the data instead of retraining")
+    parser.add_argument("--warm-start-rounds", type=int, default=None,
+                        help="Boosting rounds added by a warm start (default: in proportion to the new rows)")
+    parser.add_argument("--history", default=None,
+                        help="ML-ready data the saved models were trained on; a warm start is checked "
+                             "against a full retrain on it plus the new data")
+    parser.add_argument("--guardrail-tolerance", type=float, default=0.005,
+                        help="ROC-AUC a warm-started model may fall behind its baseline")
+    parser.add_argument("--data", default=None,
+                        help="ML-ready data to train on (default: the cleaner's processed output)")
+    args = parser.parse_args()
+    
     print("\nStarting ML Training Pipeline...\n")
     
     # Configuration
     DATA_PATH = "../../data/processed/credit_applications_clean_ml_ready.csv"
     MODEL_SAVE_PATH = "../../models/saved_models/"
     
+    # Prefer columnar output when the cleaner wrote it
+    for columnar_path in ("../../data/processed/credit_applications_clean.parquet",
+                          "../../data/processed/credit_applications_clean.feather"):
+        if os.path.exists(columnar_path) or part_paths(columnar_path):
+            DATA_PATH = columnar_path
+            break
+    
+    if args.data:
+        DATA_PATH = args.data
+    
     # Check if data exists
-    if not os.path.exists(DATA_PATH):
+    if not os.path.exists(DATA_PATH) and not part_paths(DATA_PATH):
         print(f"ERROR: Data file not found: {DATA_PATH}")
         print("\nPlease run data cleaning pipeline first:")
         print("  cd ml-pipeline")
@@ -328,7 +810,14 @@ if __name__ == "__main__":
         sys.exit(1)
     
     # Run training
-    trainer = CreditScoringTrainer(DATA_PATH, MODEL_SAVE_PATH)
+    trainer = CreditScoringTrainer(
+        DATA_PATH, MODEL_SAVE_PATH, cache=None if args.no_cache else StageCache(args.cache_dir),
+        concurrent=args.concurrent, cores=args.cores,
+        search=args.search, search_budget=args.search_budget, search_workers=args.search_workers,
+        cv_folds=args.cv_folds,
+        warm_start=args.warm_start, warm_start_rounds=args.warm_start_rounds,
+        history_path=args.history, guardrail_tolerance=args.guardrail_tolerance,
+    )
     models, metrics = trainer.run_pipeline()
     
     print("\nTraining pipeline completed successfully!")
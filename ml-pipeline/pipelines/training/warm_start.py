@@ -0,0 +1,131 @@
+"""
+Warm-start retraining: continue boosting the latest saved models on new data.
+
+The scaler's running statistics are updated with the new rows
+(``StandardScaler.partial_fit``), which moves every feature's mean and
+scale. The saved trees split on the old scaling, so before boosting
+continues their thresholds are mapped onto the new one: a split on
+``(x - mean_old) / scale_old`` at ``t`` becomes a split on
+``(x - mean_new) / scale_new`` at ``(t * scale_old + mean_old - mean_new) / scale_new``.
+The previous trees therefore predict as before (XGBoost up to float32
+rounding); only the added ones learn from the new data.
+"""
+
+import copy
+import glob
+import json
+import os
+import re
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import xgboost as xgb
+from sklearn.base import clone
+
+
+def latest_saved_files(model_dir):
+    """Paths of the newest run's model info, models and scaler in ``model_dir``; empty if none"""
+    infos = sorted(glob.glob(os.path.join(model_dir, 'model_info_*.json')))
+    if not infos:
+        return []
+    with open(infos[-1]) as f:
+        model_info = json.load(f)
+    timestamp = model_info['timestamp']
+    models = [os.path.join(model_dir, f"{name}_{timestamp}.pkl") for name in model_info['models']]
+    return [infos[-1]] + models + [os.path.join(model_dir, f"scaler_{timestamp}.pkl")]
+
+
+def latest_saved_models(model_dir):
+    """(model_info, {name: model}, scaler) of the newest run in ``model_dir``, or None"""
+    paths = latest_saved_files(model_dir)
+    if not paths:
+        return None
+    with open(paths[0]) as f:
+        model_info = json.load(f)
+    models = {name: joblib.load(path) for name, path in zip(model_info['models'], paths[1:-1])}
+    return model_info, models, joblib.load(paths[-1])
+
+
+def update_scaler(scaler, X):
+    """Copy of a fitted StandardScaler with ``X`` added to its running statistics"""
+    updated = copy.deepcopy(scaler)
+    updated.partial_fit(X)
+    return updated
+
+
+def remap_thresholds(thresholds, features, old_scaler, new_scaler):
+    """Split thresholds on ``features`` (column indices) moved from the old scaling to the new one"""
+    features = np.asarray(features, dtype=int)
+    raw = np.asarray(thresholds, dtype='float64') * old_scaler.scale_[features] + old_scaler.mean_[features]
+    return (raw - new_scaler.mean_[features]) / new_scaler.scale_[features]
+
+
+def rescale_xgboost(booster, old_scaler, new_scaler):
+    model = json.loads(booster.save_raw(raw_format='json'))
+    for tree in model['learner']['gradient_booster']['model']['trees']:
+        # Leaves keep their value in split_conditions
+        splits = [i for i, left in enumerate(tree['left_children']) if left != -1]
+        if not splits:
+            continue
+        features = [tree['split_indices'][i] for i in splits]
+        thresholds = np.array([tree['split_conditions'][i] for i in splits], dtype='float32')
+        remapped = remap_thresholds(thresholds, features, old_scaler, new_scaler)
+        # Hist cuts are feature values, and a value equal to its cut goes
+        # right (left is x < cut). Inputs are compared in float32, so each
+        # cut moves a few float32 steps below its remapped value to keep
+        # those ties on the right side.
+        ratio = old_scaler.scale_[features] / new_scaler.scale_[features]
+        margin = 2 * (np.abs(np.spacing(thresholds)).astype('float64') * ratio
+                      + np.abs(np.spacing(remapped.astype('float32'))).astype('float64'))
+        for i, threshold in zip(splits, remapped - margin):
+            tree['split_conditions'][i] = float(np.float32(threshold))
+    rescaled = xgb.Booster()
+    rescaled.load_model(bytearray(json.dumps(model).encode()))
+    return rescaled
+
+
+def rescale_lightgbm(booster, old_scaler, new_scaler):
+    lines = booster.model_to_string().splitlines()
+    features = None
+    for i, line in enumerate(lines):
+        if line.startswith('tree_sizes='):
+            # Byte offsets of the trees, no longer valid; LightGBM parses without them
+            lines[i] = ''
+        elif line.startswith('feature_infos='):
+            # Per-feature [min:max] ranges, 'none' for unused features
+            ranges = line[len('feature_infos='):].split(' ')
+            for j, info in enumerate(ranges):
+                bounds = re.fullmatch(r'\[(.+):(.+)\]', info)
+                if bounds:
+                    low, high = remap_thresholds([float(b) for b in bounds.groups()], [j, j], old_scaler, new_scaler)
+                    ranges[j] = f'[{low!r}:{high!r}]'
+            lines[i] = 'feature_infos=' + ' '.join(ranges)
+        elif line.startswith('split_feature='):
+            features = [int(f) for f in line[len('split_feature='):].split(' ')]
+        elif line.startswith('threshold='):
+            thresholds = [float(t) for t in line[len('threshold='):].split(' ')]
+            remapped = remap_thresholds(thresholds, features, old_scaler, new_scaler)
+            lines[i] = 'threshold=' + ' '.join(repr(float(t)) for t in remapped)
+    return lgb.Booster(model_str='\n'.join(lines) + '\n')
+
+
+def boosted_rounds(model):
+    """Boosting rounds in a fitted XGBoost/LightGBM classifier"""
+    if isinstance(model, xgb.XGBClassifier):
+        return model.get_booster().num_boosted_rounds()
+    return model.booster_.current_iteration()
+
+
+def continue_training(model, X, y, rounds, old_scaler, new_scaler, n_jobs=None):
+    """A new classifier: ``model``'s trees, rescaled, plus ``rounds`` more fitted on ``X``/``y``.
+
+    ``X`` is scaled with ``new_scaler``; ``model`` was fitted on data scaled
+    with ``old_scaler``. The model's other parameters are kept.
+    """
+    estimator = clone(model).set_params(n_estimators=rounds, n_jobs=n_jobs)
+    if isinstance(model, xgb.XGBClassifier):
+        return estimator.fit(X, y, xgb_model=rescale_xgboost(model.get_booster(), old_scaler, new_scaler))
+    if isinstance(model, lgb.LGBMClassifier):
+        return estimator.fit(X, y, init_model=rescale_lightgbm(model.booster_, old_scaler, new_scaler))
+    raise TypeError(f"Cannot warm-start a {type(model).__name__}")